@@ -1,16 +1,19 @@
 from decimal import Decimal
 import logging
 from random import randint
+from time import time
 from typing import Callable, cast
+
+import numpy as np
 from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
 
 from geniusweb.profile.utilityspace.UtilitySpace import UtilitySpace
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft.utilities.immutablelist.ImmutableList import ImmutableList
-from agents.time_dependent_agent.extended_util_space import ExtendedUtilSpace
 
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
+from geniusweb.actions.LearningDone import LearningDone
 from geniusweb.actions.Offer import Offer
 from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
@@ -26,7 +29,17 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
     ProfileConnectionFactory,
 )
 from geniusweb.profileconnection.ProfileInterface import ProfileInterface
+from utils.acceptance import AcceptanceCondition, ACModel, AnyOf
+from utils.bayesian_opponent_model import BayesianOpponentModel
+from utils.best_first_bids import BestFirstBids
+from utils.bid_history import BidHistory
+from utils.concession_estimator import ConcessionEstimator
 from utils.frequency_analyzer import FrequencyAnalyzer
+from utils.knowledge_store import Knowledge, KnowledgeStore
+from utils.model_server import ModelServer, get_model_server, limit_threads
+from utils.nearest_bids import NearestBids
+from utils.pareto_front import EstimatedParetoFront
+from utils.profile_fingerprint import changed_issues, profile_fingerprint
 from utils.plot_trace import plot_characteristics
 
 
@@ -41,15 +54,41 @@ class CustomAgent(DefaultParty):
         self._profileint: ProfileInterface = None # type:ignore
         self._last_received_bid: Bid = None # type:ignore
         self._utilspace: UtilitySpace = None # type:ignore
-        self._extendedspace: ExtendedUtilSpace = None # type:ignore
+        self._best_bids: BestFirstBids = None # type:ignore
+        self._fingerprint: dict[str, int] = {}
+        self.received_bids: BidHistory = None # type:ignore # offers of the opponent, oldest first
 
         # General settings
-        self.opponent_model = FrequencyAnalyzer()
+        self.opponent_model: FrequencyAnalyzer | BayesianOpponentModel = FrequencyAnalyzer()
         self.reservation_utility: float = .0 # not sure if this is a good value to have, since any agreement is better than no agreement...
         self.falldown_speed: float = 1.2 # < 1: will concede faster; > 1: will concede slower [0.0, ...]
         self.attempts: int = 100 # the number of iterations it will go through to look for an 'optimal' bid
+        self.seed: int | None = None # seed of the numpy generators of the opponent model and Pareto front
         self.hard_to_get: float = .1 #  the moment from which we'll consider playing nice [0.0, 1.0]
         self.niceness: Decimal = Decimal(.05) # utility we're considering to give up for the sake of being nice [0.0, 1.0]
+        # extra acceptance conditions from utils.acceptance, e.g. AnyOf(ACCombi(.9, 10)), next to the threshold
+        self.acceptance: AcceptanceCondition = AnyOf()
+        # optional trained model that scores candidate bids on [our utility, opponent utility, progress],
+        # see utils.model_server; without it the nice bid is searched as below
+        self._bid_model: ModelServer = None # type:ignore
+        # offer the bid on the estimated Pareto front that is best for the opponent above our threshold
+        self.use_pareto_front: bool = False
+        self._pareto_front: EstimatedParetoFront = None # type:ignore
+        # counter with the bid closest to the opponent's last offer above our threshold
+        self.use_nearest_bids: bool = False
+        self._nearest_bids: NearestBids = None # type:ignore
+        # concede as the opposite of the opponent's estimated concession speed e (see
+        # utils.concession_estimator): hold firm against a conceder, give in against a boulware
+        self.use_concession_estimate: bool = False
+        self._concession: ConcessionEstimator = None # type:ignore
+        self._estimated_offers: int = 0 # number of received offers given to the estimator
+
+        # Knowledge about opponents from earlier sessions, see utils.knowledge_store. Off unless a path
+        # is given (parameter "knowledge_store"), otherwise sessions would depend on the ones before them
+        self.knowledge_store_path: str | None = None
+        self._knowledge_store: KnowledgeStore = None # type:ignore
+        self._knowledge: dict[str, Knowledge] = {}
+        self._opponent: str = None # type:ignore
 
         # Agent characteristics:
         # Can be included in plotting, make sure the dimensionality of all of them match up
@@ -71,11 +110,37 @@ class CustomAgent(DefaultParty):
             # progress towards the deadline has to be tracked manually through the use of the Progress object
             self._progress = self._settings.getProgress()
 
+            # knowledge about opponents is written in the background after every session,
+            # during the Learn phase we only have to wait for those writes to finish
+            if "Learn" == str(self._settings.getProtocol().getURI()):
+                KnowledgeStore.flush()
+                self.getConnection().send(LearningDone(self._me))
+                return
+
+            store_path = self._settings.getParameters().get("knowledge_store")
+            if isinstance(store_path, str):
+                self.knowledge_store_path = store_path
+            if self.knowledge_store_path is not None:
+                self._knowledge_store = KnowledgeStore(self.knowledge_store_path)
+
+            # the general settings can be overridden through the session parameters (e.g. by utils.sweep)
+            self._apply_parameters()
+
+            # the opponent model can be chosen through the session parameters
+            if self._settings.getParameters().get("opponent_model") == "bayesian":
+                self.opponent_model = BayesianOpponentModel(seed=self.seed)
+            if self.use_concession_estimate:
+                self._concession = ConcessionEstimator()
+
             # the profile contains the preferences of the agent over the domain
             self._profileint = ProfileConnectionFactory.create(
                 info.getProfile().getURI(), self.getReporter()
             )
             self.opponent_model.set_domain(self._profileint.getProfile().getDomain())
+            self.received_bids = BidHistory(self._profileint.getProfile().getDomain())
+            # we don't know who the opponent is yet, so load what we know of everyone on this domain
+            if self._knowledge_store is not None:
+                self._knowledge = self._knowledge_store.load(self._profileint.getProfile().getDomain().getName())
 
             reservation_bid = self._profileint.getProfile().getReservationBid()
             if reservation_bid is not None:
@@ -85,9 +150,15 @@ class CustomAgent(DefaultParty):
         elif isinstance(info, ActionDone):
             action: Action = cast(ActionDone, info).getAction()
 
+            # the first action of the opponent tells us who we are dealing with
+            if self._opponent is None and action.getActor() != self._me:
+                self._set_opponent(action.getActor().getName())
+
             # if it is an offer, set the last received bid
             if isinstance(action, Offer):
                 self._last_received_bid = cast(Offer, action).getBid()
+                if action.getActor() != self._me:
+                    self.received_bids.append(self._last_received_bid)
         # YourTurn notifies you that it is your turn to act
         elif isinstance(info, YourTurn):
             # execute a turn
@@ -98,6 +169,7 @@ class CustomAgent(DefaultParty):
 
         # Finished will be send if the negotiation has ended (through agreement or deadline)
         elif isinstance(info, Finished):
+            self._store_knowledge()
             # terminate the agent MUST BE CALLED
             self.terminate()
         else:
@@ -109,7 +181,7 @@ class CustomAgent(DefaultParty):
     # leave it as it is for this course
     def getCapabilities(self) -> Capabilities:
         return Capabilities(
-            set(["SAOP"]),
+            set(["SAOP", "Learn"]),
             set(["geniusweb.profile.utilityspace.LinearAdditive"]),
         )
 
@@ -133,7 +205,22 @@ class CustomAgent(DefaultParty):
     # execute a turn
     def _my_turn(self):
         self._update_utilspace()
-        self.opponent_model.add_bid(self._last_received_bid)
+        _, progress = self._get_profile_and_progress()
+        if isinstance(self.opponent_model, BayesianOpponentModel) and len(self.received_bids) > 0:
+            # the bayesian model expects the opponent to concede over time, it reads the offer
+            # from the history in the encoding they share instead of converting the bid again
+            self.opponent_model.add_row(self.received_bids.rows()[-1], progress)
+        elif isinstance(self.opponent_model, BayesianOpponentModel):
+            self.opponent_model.add_bid(self._last_received_bid, progress)
+        else:
+            self.opponent_model.add_bid(self._last_received_bid)
+        if self._pareto_front is not None:
+            self._pareto_front.update_opponent(self.opponent_model.get_value_utilities())
+        if self._concession is not None and len(self.received_bids) > self._estimated_offers:
+            # how fast the opponent concedes shows in its own (modelled) utility of its offers
+            opponent_utility = self.opponent_model.get_utility(self.received_bids.last())
+            self._concession.add_offer(progress, float(opponent_utility))
+            self._estimated_offers = len(self.received_bids)
         next_bid = self._find_bid(self.attempts)
 
         if self._is_acceptable(self._last_received_bid, next_bid):
@@ -157,12 +244,14 @@ class CustomAgent(DefaultParty):
         bid_utility = profile.getUtility(bid)
         target_bid_utility = profile.getUtility(our_next_bid)
 
-        # TODO non-linear conceding strategy
-        threshold = self.falldown_speed * (1.0 - progress) * float(target_bid_utility)
+        threshold = self.falldown_speed * self._concession_factor(progress) * float(target_bid_utility)
         self.thresholds.append(threshold)
 
+        self.acceptance.observe(float(bid_utility))
+        extra_acceptable = self.acceptance.is_acceptable(float(bid_utility), float(target_bid_utility), progress)
+
         # Has to be at least more than the reservation value
-        return bid_utility > self.reservation_utility and bid_utility > threshold
+        return bid_utility > self.reservation_utility and (bid_utility > threshold or extra_acceptable)
 
 
     # ===============
@@ -186,10 +275,19 @@ class CustomAgent(DefaultParty):
         profile, progress = self._get_profile_and_progress()
 
         target_bid_utility = profile.getUtility(our_bid)
-        threshold = self.falldown_speed * (1.0 - progress) * float(target_bid_utility)
+        threshold = self.falldown_speed * self._concession_factor(progress) * float(target_bid_utility)
 
         return threshold
 
+    def _concession_factor(self, progress: float) -> float:
+        e = self._concession.get_e() if self._concession is not None else None
+        if e is None:
+            # linear until the opponent's concession speed is known
+            return 1.0 - progress
+        # the opposite speed, limited to between a boulware (e = 0.2) and a conceder (e = 5)
+        our_e = min(max(1.0 / e, 0.2), 5.0) if e > 0 else 5.0
+        return 1.0 - progress ** (1.0 / our_e)
+
     """
     Gets a random bid from the given list of all_bids
     """
@@ -218,17 +316,48 @@ class CustomAgent(DefaultParty):
     Find the maximum bids from the domain
     """
     def _find_max_bid(self) -> Bid:
-        max_bids = self._extendedspace.getBids(self._extendedspace.getMax())
-        return self._get_random_bid(max_bids)
+        # bids are enumerated best first, so this only visits the bids with max utility
+        max_bids = list(self._best_bids.above(self._best_bids.getMax()))
+        return max_bids[randint(0, len(max_bids) - 1)]
 
     """
     Finds the maximum bid while trying to also accomodate the opponents interests
     according to _is_better_bid with be_nice set to True
     """
     def _find_max_nice_bid(self, attempts) -> Bid:
+        if self._bid_model is not None:
+            return self._find_model_bid(attempts)
+        if self._pareto_front is not None:
+            bid = self._pareto_front.best_above(self._lower_util_bound(self._find_max_bid()))
+            if bid is not None:
+                return bid
+        if self._nearest_bids is not None and self._last_received_bid is not None:
+            threshold = self._lower_util_bound(self._find_max_bid())
+            bids = self._nearest_bids.nearest(self._last_received_bid, 1, Decimal(str(threshold)))
+            if bids:
+                return bids[0]
         # some cheeky CPL currying
         return self._find_bid_with((lambda a, b: self._is_better_bid(a, b,  self.niceness, be_nice=True)), attempts)
 
+    """
+    Scores attempts random bids with the bid model in one call and returns the best
+    """
+    def _find_model_bid(self, attempts) -> Bid:
+        profile, progress = self._get_profile_and_progress()
+        all_bids = AllBidsList(profile.getDomain())
+        candidates = [self._get_random_bid(all_bids) for _ in range(attempts)]
+
+        if isinstance(self.opponent_model, BayesianOpponentModel):
+            opponent_utilities = self.opponent_model.get_utilities(candidates)
+        else:
+            opponent_utilities = np.array([float(self.opponent_model.get_utility(bid)) for bid in candidates])
+        features = np.column_stack([
+            [float(profile.getUtility(bid)) for bid in candidates],
+            opponent_utilities,
+            np.full(len(candidates), progress),
+        ])
+        return candidates[int(np.argmax(self._bid_model.predict(features)))]
+
     """
     Checks if bid a is better than bid b.
     If be_nice is True, will also consider the opponents utility according to opponent_model and
@@ -251,15 +380,94 @@ class CustomAgent(DefaultParty):
 
     def _get_profile_and_progress(self) -> tuple[LinearAdditive, float]:
         profile: Profile = self._profileint.getProfile()
-        progress: float = self._progress.get(0)
+        # ProgressTime needs the current time, ProgressRounds ignores it
+        progress: float = self._progress.get(round(time() * 1000))
 
         return cast(LinearAdditive, profile), progress
 
     def _update_utilspace(self) -> None:  # throws IOException
         newutilspace = self._profileint.getProfile()
-        if not newutilspace == self._utilspace:
-            self._utilspace = cast(LinearAdditive, newutilspace)
-            self._extendedspace = ExtendedUtilSpace(self._utilspace)
+        # the profile interface returns the same object until the profile changes
+        if newutilspace is self._utilspace:
+            return
+        newutilspace = cast(LinearAdditive, newutilspace)
+        fingerprint = profile_fingerprint(newutilspace)
+        if self._utilspace is None:
+            self._best_bids = BestFirstBids(newutilspace)
+            if self.use_pareto_front:
+                self._pareto_front = EstimatedParetoFront(newutilspace, seed=self.seed)
+            if self.use_nearest_bids:
+                self._nearest_bids = NearestBids(newutilspace)
+        elif fingerprint != self._fingerprint:
+            changed = changed_issues(self._utilspace, self._fingerprint, newutilspace, fingerprint)
+            if changed is None:
+                self._best_bids = BestFirstBids(newutilspace)
+                if self.use_pareto_front:
+                    self._pareto_front = EstimatedParetoFront(newutilspace, seed=self.seed)
+                if self.use_nearest_bids:
+                    self._nearest_bids = NearestBids(newutilspace)
+            else:
+                self._best_bids.update(newutilspace, changed)
+                if self._pareto_front is not None:
+                    self._pareto_front.update_profile(newutilspace, changed)
+                if self._nearest_bids is not None:
+                    self._nearest_bids.update(newutilspace, changed)
+        self._utilspace = newutilspace
+        self._fingerprint = fingerprint
+
+    def _apply_parameters(self) -> None:
+        parameters = self._settings.getParameters()
+        if parameters.get("reservation_utility") is not None:
+            self.reservation_utility = float(parameters.get("reservation_utility"))
+        if parameters.get("falldown_speed") is not None:
+            self.falldown_speed = float(parameters.get("falldown_speed"))
+        if parameters.get("attempts") is not None:
+            self.attempts = int(parameters.get("attempts"))
+        if parameters.get("seed") is not None:
+            self.seed = int(parameters.get("seed"))
+        if parameters.get("hard_to_get") is not None:
+            self.hard_to_get = float(parameters.get("hard_to_get"))
+        if parameters.get("niceness") is not None:
+            self.niceness = Decimal(str(parameters.get("niceness")))
+        if parameters.get("pareto_front") is not None:
+            self.use_pareto_front = bool(parameters.get("pareto_front"))
+        if parameters.get("nearest_bids") is not None:
+            self.use_nearest_bids = bool(parameters.get("nearest_bids"))
+        if parameters.get("concession_estimate") is not None:
+            self.use_concession_estimate = bool(parameters.get("concession_estimate"))
+        if parameters.get("bid_model") is not None or parameters.get("acceptance_model") is not None:
+            # inference threads per process, more than one oversubscribes the cores of a worker pool
+            limit_threads(int(parameters.get("model_threads") or 1))
+            # seconds to wait for the model calls of concurrent sessions, to run them as one batch
+            max_wait = float(parameters.get("model_max_wait") or 0.0)
+            if parameters.get("bid_model") is not None:
+                self._bid_model = get_model_server(str(parameters.get("bid_model")), max_wait)
+            if parameters.get("acceptance_model") is not None:
+                acceptance_model = ACModel(str(parameters.get("acceptance_model")), max_wait=max_wait)
+                self.acceptance = AnyOf(self.acceptance, acceptance_model)
+
+    def _set_opponent(self, party_name: str) -> None:
+        # the runner passes the class of every opponent by the position at the end of
+        # its party id, without it we cannot tell opponents apart and learn nothing
+        opponents = self._settings.getParameters().get("opponents")
+        opponent = opponents.get(party_name.split("_")[-1]) if isinstance(opponents, dict) else None
+        if not isinstance(opponent, str):
+            return
+        self._opponent = opponent
+
+        if self._opponent in self._knowledge and isinstance(self.opponent_model, FrequencyAnalyzer):
+            self.opponent_model.warm_start(self._knowledge[self._opponent])
+
+    def _store_knowledge(self) -> None:
+        if self._knowledge_store is None:
+            return
+        if self._opponent is None or not isinstance(self.opponent_model, FrequencyAnalyzer):
+            return
+        if len(self.opponent_model.frequency_table) == 0:
+            return
+
+        domain = self._profileint.getProfile().getDomain().getName()
+        self._knowledge_store.save_async(self._opponent, domain, self.opponent_model.get_knowledge())
 
     # ===================
     # === DEBUG TOOLS ===
@@ -1,5 +1,6 @@
 import logging
 from random import randint
+from time import time
 from typing import cast
 
 from geniusweb.actions.Accept import Accept
@@ -68,8 +69,9 @@ class TemplateAgent(DefaultParty):
             # execute a turn
             self._myTurn()
 
-            # log that we advanced a turn
-            self._progress = self._progress.advance()
+            # log that we advanced a turn (only needed for a deadline in rounds)
+            if isinstance(self._progress, ProgressRounds):
+                self._progress = self._progress.advance()
 
         # Finished will be send if the negotiation has ended (through agreement or deadline)
         elif isinstance(info, Finished):
@@ -125,7 +127,8 @@ class TemplateAgent(DefaultParty):
             return False
         profile = self._profile.getProfile()
 
-        progress = self._progress.get(0)
+        # the current time is needed for a deadline in time, and ignored for a deadline in rounds
+        progress = self._progress.get(round(time() * 1000))
 
         # very basic approach that accepts if the offer is valued above 0.6 and
         # 80% of the rounds towards the deadline have passed
@@ -1,12 +1,13 @@
 from geniusweb.bidspace.BidsWithUtility import BidsWithUtility
 from geniusweb.bidspace.Interval import Interval
-from geniusweb.bidspace.IssueInfo import IssueInfo
 from geniusweb.issuevalue.Bid import Bid
 from geniusweb.issuevalue.Value import Value
 from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
 from tudelft.utilities.immutablelist.ImmutableList import ImmutableList
 from decimal import Decimal
-from typing import List
+from typing import List, Optional
+from utils.nearest_bids import NearestBids
+from utils.target_utility_bids import TargetUtilityBids
 
 
 class ExtendedUtilSpace:
@@ -17,7 +18,24 @@ class ExtendedUtilSpace:
 
     def __init__(self, space: LinearAdditive):
         self._utilspace = space
-        self._bidutils = BidsWithUtility.create(self._utilspace)
+        self._targetbids = TargetUtilityBids(self._utilspace)
+        # only built when getBids is used, it enumerates the full bid space
+        self._bidutils: Optional[BidsWithUtility] = None
+        # only built when getNearestBid is used
+        self._nearestbids: Optional[NearestBids] = None
+        self._computeMinMax()
+        self._tolerance = self._computeTolerance()
+
+    def update(self, space: LinearAdditive, issues: List[str]):
+        """
+        Updates to a new version of the profile on the same domain, of which only
+        the given issues changed.
+        """
+        self._utilspace = space
+        self._targetbids.update(space, issues)
+        self._bidutils = None
+        if self._nearestbids is not None:
+            self._nearestbids.update(space, issues)
         self._computeMinMax()
         self._tolerance = self._computeTolerance()
 
@@ -25,14 +43,13 @@ class ExtendedUtilSpace:
         """
         Computes the fields minutil and maxUtil.
         <p>
-        TODO this is simplistic, very expensive method and may cause us to run
-        out of time on large domains.
+        The space is linear additive, so these are the sums of the per-issue
+        minimum and maximum weighted utilities.
         <p>
-        Assumes that utilspace and bidutils have been set properly.
+        Assumes that utilspace and targetbids have been set properly.
         """
-        range = self._bidutils.getRange()
-        self._minUtil = range.getMin()
-        self._maxUtil = range.getMax()
+        self._minUtil = self._targetbids.getMin()
+        self._maxUtil = self._targetbids.getMax()
 
         rvbid = self._utilspace.getReservationBid()
         if rvbid != None:
@@ -51,12 +68,15 @@ class ExtendedUtilSpace:
                 value.
         """
         tolerance = Decimal(1)
-        for iss in self._bidutils.getInfo():
-            if iss.getValues().size() > 1:
+        domain = self._utilspace.getDomain()
+        for iss in domain.getIssues():
+            if domain.getValues(iss).size() > 1:
                 # we have at least 2 values.
+                weight = self._utilspace.getWeight(iss)
+                utilities = self._utilspace.getUtilities()[iss]
                 values: List[Decimal] = []
-                for val in iss.getValues():
-                    values.append(iss.getWeightedUtil(val))
+                for val in domain.getValues(iss):
+                    values.append(weight * utilities.getUtility(val))
                 values.sort()
                 values.reverse()
                 tolerance = min(tolerance, values[0] - values[1])
@@ -72,8 +92,39 @@ class ExtendedUtilSpace:
         """
         @param utilityGoal the requested utility
         @return bids with utility inside [utilitygoal-{@link #tolerance},
-                utilitygoal]
+                utilitygoal]. This enumerates the full bid space, use
+                {@link #getRandomBid} on large domains.
         """
+        if self._bidutils is None:
+            self._bidutils = BidsWithUtility.create(self._utilspace)
         return self._bidutils.getBids(
             Interval(utilityGoal - self._tolerance, utilityGoal)
         )
+
+    def getRandomBid(self, utilityGoal: Decimal) -> Optional[Bid]:
+        """
+        @param utilityGoal the requested utility
+        @return a random bid with utility inside [utilitygoal-{@link #tolerance},
+                utilitygoal], or None if no such bid was found.
+        """
+        bids = self._targetbids.sample(utilityGoal - self._tolerance, utilityGoal)
+        return bids[0] if bids else None
+
+    def getNearestBid(self, bid: Bid, utilityGoal: Decimal) -> Optional[Bid]:
+        """
+        @param bid         the bid to stay close to, typically the last offer of
+                           the opponent
+        @param utilityGoal the requested utility
+        @return the bid with utility of at least utilitygoal that differs from bid
+                on the least (issue weighted) issues, or None if no such bid exists.
+        """
+        if self._nearestbids is None:
+            self._nearestbids = NearestBids(self._utilspace)
+        bids = self._nearestbids.nearest(bid, 1, utilityGoal)
+        return bids[0] if bids else None
+
+    def getMaxBid(self) -> Bid:
+        """
+        @return a bid with utility {@link #getMax}
+        """
+        return self._targetbids.getMaxBid()
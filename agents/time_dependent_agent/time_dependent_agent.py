@@ -1,5 +1,5 @@
 import logging
-from random import randint, random
+from random import random
 import traceback
 from typing import cast, Dict, List, Set, Collection
 
@@ -38,6 +38,7 @@ from time import sleep, time as clock
 from decimal import Decimal
 import sys
 from agents.time_dependent_agent.extended_util_space import ExtendedUtilSpace
+from utils.profile_fingerprint import changed_issues, profile_fingerprint
 from tudelft_utilities_logging.Reporter import Reporter
 
 
@@ -74,6 +75,13 @@ class TimeDependentAgent(DefaultParty):
     to simulate human users that take thinking time.</td>
     </tr>
 
+    <tr>
+    <td>nearest</td>
+    <td>If true, the party offers the bid closest to the last received offer
+    (fewest changed issues, weighted by importance) that meets its utility goal,
+    instead of a random bid with that utility. Default false.</td>
+    </tr>
+
     </table>
     <p>
     TimeDependentParty requires a {@link UtilitySpace}
@@ -87,7 +95,9 @@ class TimeDependentAgent(DefaultParty):
         self._progress: Progress = None  # type:ignore
         self._lastReceivedBid: Bid = None  # type:ignore
         self._extendedspace: ExtendedUtilSpace = None  # type:ignore
+        self._fingerprint: Dict[str, int] = {}
         self._e: float = 1.2
+        self._nearest: bool = False
         self._lastvotes: Votes = None  # type:ignore
         self._settings: Settings = None  # type:ignore
         self.getReporter().log(logging.INFO, "party is initialized")
@@ -115,6 +125,7 @@ class TimeDependentAgent(DefaultParty):
                             logging.WARNING,
                             "parameter e should be Double but found " + str(newe),
                         )
+                self._nearest = bool(self._settings.getParameters().get("nearest"))
                 protocol: str = str(self._settings.getProtocol().getURI())
                 if "Learn" == protocol:
                     val(self.getConnection()).send(LearningDone(self._me))
@@ -222,9 +233,21 @@ class TimeDependentAgent(DefaultParty):
 
     def _updateUtilSpace(self) -> LinearAdditive:  # throws IOException
         newutilspace = self._profileint.getProfile()
-        if not newutilspace == self._utilspace:
-            self._utilspace = cast(LinearAdditive, newutilspace)
-            self._extendedspace = ExtendedUtilSpace(self._utilspace)
+        # the profile interface returns the same object until the profile changes
+        if newutilspace is self._utilspace:
+            return self._utilspace
+        newutilspace = cast(LinearAdditive, newutilspace)
+        fingerprint = profile_fingerprint(newutilspace)
+        if self._utilspace is None:
+            self._extendedspace = ExtendedUtilSpace(newutilspace)
+        elif fingerprint != self._fingerprint:
+            changed = changed_issues(self._utilspace, self._fingerprint, newutilspace, fingerprint)
+            if changed is None:
+                self._extendedspace = ExtendedUtilSpace(newutilspace)
+            else:
+                self._extendedspace.update(newutilspace, changed)
+        self._utilspace = newutilspace
+        self._fingerprint = fingerprint
         return self._utilspace
 
     def _makeBid(self) -> Bid:
@@ -240,12 +263,16 @@ class TimeDependentAgent(DefaultParty):
             self._extendedspace.getMin(),
             self._extendedspace.getMax(),
         )
-        options: ImmutableList[Bid] = self._extendedspace.getBids(utilityGoal)
-        if options.size() == 0:
+        if self._nearest and self._lastReceivedBid != None:
+            # counter with the bid closest to the opponent's offer
+            bid = self._extendedspace.getNearestBid(self._lastReceivedBid, utilityGoal)
+        else:
+            # pick a random one.
+            bid = self._extendedspace.getRandomBid(utilityGoal)
+        if bid == None:
             # if we can't find good bid, get max util bid....
-            options = self._extendedspace.getBids(self._extendedspace.getMax())
-        # pick a random one.
-        return options.get(randint(0, options.size() - 1))
+            bid = self._extendedspace.getMaxBid()
+        return bid
 
     def _getUtilityGoal(
         self, t: float, e: float, minUtil: Decimal, maxUtil: Decimal
@@ -279,10 +306,12 @@ class TimeDependentAgent(DefaultParty):
         val = self._settings.getParameters().get("maxPower")
         maxpower = val if isinstance(val, int) else sys.maxsize
 
+        # all offers are scored against a single utility goal
+        bids = [offer.getBid() for offer in set(voting.getOffers())]
         votes: Set[Vote] = {
-            Vote(self._me, offer.getBid(), minpower, maxpower)
-            for offer in set(voting.getOffers())
-            if self._isGood(offer.getBid())
+            Vote(self._me, bid, minpower, maxpower)
+            for bid, good in zip(bids, self._areGood(bids))
+            if good
         }
 
         return Votes(self._me, votes)
@@ -292,17 +321,26 @@ class TimeDependentAgent(DefaultParty):
         @param bid the bid to check
         @return true iff bid is good for us.
         """
-        if bid == None or self._profileint == None:
-            return False
+        return self._areGood([bid])[0]
+
+    def _areGood(self, bids: List[Bid]) -> List[bool]:
+        """
+        @param bids the bids to check
+        @return for every bid, true iff bid is good for us. The profile and the
+                utility goal are determined once for all bids.
+        """
+        if self._profileint == None:
+            return [False] * len(bids)
         profile = cast(LinearAdditive, self._profileint.getProfile())
         # the profile MUST contain UtilitySpace
         time = self._progress.get(round(clock() * 1000))
-        return profile.getUtility(bid) >= self._getUtilityGoal(
+        goal = self._getUtilityGoal(
             time,
             self.getE(),
             self._extendedspace.getMin(),
             self._extendedspace.getMax(),
         )
+        return [bid != None and profile.getUtility(bid) >= goal for bid in bids]
 
     def _delayResponse(self):  # throws InterruptedException
         """
@@ -0,0 +1,35 @@
+import json
+import os
+from glob import glob
+
+from utils.trace_analysis import analyse_traces
+
+# create results directory if it does not exist
+if not os.path.exists("results"):
+    os.mkdir("results")
+
+# Settings to analyse the negotiation dynamics of a corpus of traces:
+#   We need to specify the trace files, run_tournament.py saves them when "traces_dir" is set
+#   Changes in utility smaller than epsilon count as no change
+analysis_settings = {
+    "traces": "results/traces/*.json",
+    "epsilon": 1e-6,
+}
+
+results_traces = []
+for path in sorted(glob(analysis_settings["traces"])):
+    with open(path) as f:
+        results_traces.append(json.load(f))
+
+# analyse all traces at once
+results, summary = analyse_traces(results_traces, analysis_settings["epsilon"])
+
+for agent, analysis in summary.items():
+    moves = ", ".join(f"{move} {share:.2f}" for move, share in analysis["moves"].items())
+    print(
+        f"{agent}: sensitivity {analysis['sensitivity']:.2f}, "
+        f"concession rate {analysis['concession_rate']:.2f} ({moves})"
+    )
+
+with open("results/trace_analysis.json", "w") as f:
+    f.write(json.dumps({"traces": results, "agents": summary}, indent=2))
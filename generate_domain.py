@@ -0,0 +1,16 @@
+from utils.domain_generator import generate_domain
+
+# Settings to generate a synthetic domain:
+#   We need to specify the number of values of every issue, the domain will contain the product of these as bids.
+#   We need to specify the opposition between the two profiles [0.0, 1.0], 1.0 means fully opposed.
+#   Optionally we can specify the utility of the reservation bid and a seed for reproducible domains.
+settings = {
+    "directory": "domains/synthetic00",
+    "name": "synthetic00",
+    "num_values": [10] * 6,
+    "opposition": 0.7,
+    "reservation": 0.3,
+    "seed": 0,
+}
+
+generate_domain(**settings)
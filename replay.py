@@ -0,0 +1,43 @@
+import json
+from statistics import mean
+
+from utils.replay import replay_session
+
+# Settings to replay a session for a single agent:
+#   We need to specify the trace of an earlier session (run.py writes it to results/results_trace.json)
+#   We need to specify the position of the agent to replay, as in the results summary
+#   Optionally we can set "agent" to replay with another class (e.g. a new version of the agent)
+#   and "parameters" to override the parameters the agent received in the session
+#   NOTE: a deadline in time runs on the clock of the replay, so only deadlines in rounds replay exactly
+replay_settings = {
+    "trace": "results/results_trace.json",
+    "position": "2",
+    "repeat": 5,
+    "seed": 0,
+}
+
+with open(replay_settings["trace"]) as f:
+    results_trace = json.load(f)
+
+# replay a few times, the first run also pays for imports and caches
+replays = [
+    replay_session(
+        results_trace,
+        replay_settings["position"],
+        agent=replay_settings.get("agent"),
+        parameters=replay_settings.get("parameters"),
+        seed=replay_settings["seed"],
+    )
+    for _ in range(replay_settings["repeat"])
+]
+
+for replay in replays:
+    turn_times = replay["turn_times"]
+    print(
+        f"{replay['agent']}: total {replay['total_time']:.4f}s, settings {replay['settings_time']:.4f}s, "
+        f"{len(turn_times)} turns (mean {mean(turn_times) if turn_times else 0:.6f}s, "
+        f"max {max(turn_times, default=0):.6f}s), diverged at {len(replay['diverged'])} turns"
+    )
+
+with open("results/replay.json", "w") as f:
+    f.write(json.dumps(replays, indent=2))
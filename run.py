@@ -2,6 +2,8 @@ import json
 import os
 
 from utils.plot_trace import plot_trace
+from utils.profiler import merge_profiles
+from utils.results_db import ResultsDatabase
 from utils.runners import run_session
 
 # create results directory if it does not exist
@@ -12,6 +14,10 @@ if not os.path.exists("results"):
 #   We need to specify the classpath of 2 agents to start a negotiation.
 #   We need to specify the preference profiles for both agents. The first profile will be assigned to the first agent.
 #   We need to specify a deadline of amount of rounds we can negotiate before we end without agreement
+#   (or use "deadline_time_ms" for a deadline in milliseconds, the agents then share that time budget)
+#   Optionally we can set "results_db" to an SQLite file that keeps the session next to those of earlier runs
+#   Optionally we can set "profiler_dir" to a directory to write a flamegraph of every agent to
+#   Optionally we can set "memory" to True to report the peak and retained memory of the session and every agent
 settings = {
     "agents": [
         #"agents.boulware_agent.boulware_agent.BoulwareAgent",
@@ -30,6 +36,15 @@ settings = {
 # run a session and obtain results in dictionaries
 results_trace, results_summary = run_session(settings)
 
+# keep the session in the results database
+if "results_db" in settings:
+    results_db = ResultsDatabase(settings["results_db"])
+    results_db.add_sessions(results_db.start_run(settings), [(0, settings, results_summary, results_trace)])
+
+# merge the sampled stacks of the agents into flamegraphs
+if "profiler_dir" in settings:
+    merge_profiles(settings["profiler_dir"])
+
 # plot trace to html file
 plot_trace(results_trace, "results/trace_plot.html")
 
@@ -0,0 +1,18 @@
+from utils.service import serve
+
+# Settings to run the negotiation service:
+#   The service keeps agents and profiles loaded, and runs batches of sessions (settings as in run.py) it receives
+#   over HTTP, e.g. with utils.service.request_sessions from a notebook or test:
+#       for index, results_summary in request_sessions([settings, ...]):
+#           print(index, results_summary)
+#   Optionally we can set "workers" to run the sessions of a batch in parallel processes, or "threads" to run them
+#   in parallel threads of this process, where agents share loaded models and batch their calls to them (parameter
+#   "model_max_wait" of the agent, see utils.model_server)
+service_settings = {
+    "host": "127.0.0.1",
+    "port": 8000,
+    "workers": 1,
+    "threads": 1,
+}
+
+serve(**service_settings)
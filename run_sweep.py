@@ -0,0 +1,42 @@
+import json
+import os
+
+from utils.sweep import run_sweep
+
+# create results directory if it does not exist
+if not os.path.exists("results"):
+    os.mkdir("results")
+
+# Settings to run a parameter sweep:
+#   We need to specify the classpath of the agent to tune and the values to try for each of its parameters
+#   We need to specify the opponents and the duos of preference profiles to evaluate the candidates on
+#   We need to specify a deadline of amount of rounds we can negotiate before we end without agreement
+#   Every rung keeps the best 1/eta candidates and lets them play eta times as many sessions
+sweep_settings = {
+    "agent": "agents.custom_agents.custom_agent_0.CustomAgent",
+    "grid": {
+        "falldown_speed": [0.8, 1.0, 1.2, 1.4],
+        "hard_to_get": [0.05, 0.1, 0.2],
+        "niceness": [0.0, 0.05, 0.1],
+    },
+    "opponents": [
+        "agents.boulware_agent.boulware_agent.BoulwareAgent",
+        "agents.conceder_agent.conceder_agent.ConcederAgent",
+        "agents.hardliner_agent.hardliner_agent.HardlinerAgent",
+        "agents.linear_agent.linear_agent.LinearAgent",
+        "agents.random_agent.random_agent.RandomAgent",
+    ],
+    "profile_sets": [
+        ["domains/domain00/profileA.json", "domains/domain00/profileB.json"],
+        ["domains/domain01/profileA.json", "domains/domain01/profileB.json"],
+    ],
+    "deadline_rounds": 200,
+    "eta": 3,
+}
+
+# run the sweep and obtain the ranked candidates
+results, rungs = run_sweep(sweep_settings)
+
+# save the ranked candidates and the candidates left after every rung
+with open("results/sweep.json", "w") as f:
+    f.write(json.dumps({"results": results, "rungs": rungs}, indent=2))
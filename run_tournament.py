@@ -1,7 +1,11 @@
 import json
 import os
 
+from utils.distributed import run_coordinator
+from utils.memory import find_memory_growth
+from utils.profiler import merge_profiles
 from utils.runners import run_tournament
+from utils.tournament_report import write_tournament_report
 
 # create results directory if it does not exist
 if not os.path.exists("results"):
@@ -11,6 +15,21 @@ if not os.path.exists("results"):
 #   We need to specify the classpath all agents that will participate in the tournament
 #   We need to specify duos of preference profiles that will be played by the agents
 #   We need to specify a deadline of amount of rounds we can negotiate before we end without agreement
+#   (or use "deadline_time_ms" for a deadline in milliseconds, the agents then share that time budget)
+#   Optionally we can set "workers" to run sessions in parallel, balanced on the durations of earlier sessions
+#   Optionally we can set "traces_dir" to save the trace of every session, e.g. to analyse them with analyse_traces.py
+#   Optionally we can set "memory" to True to trace the memory of every session, agents that keep memory
+#   allocated session after session are reported in results/memory_report.json
+#   Optionally we can set "seed" to seed the random generators of every session (also passed to the agents as their
+#   "seed" parameter), so agents that use randomness play the same sessions again
+#   Optionally we can set "cache" to a directory to store results in, sessions of which the agents' code, the profiles
+#   and the settings did not change are then taken from there instead of played again (this requires a "seed")
+#   Optionally we can set "results_db" to an SQLite file that keeps the sessions, actions and summaries of every run
+#   Optionally we can set "profiler_dir" to a directory, the call stacks of every agent are then sampled and merged
+#   into a collapsed stack file (<agent>.folded) and a flamegraph (<agent>.html) per agent
+#   Optionally we can set "queue" to a (shared) directory, sessions are then run by workers started with run_worker.py
+#   Optionally we can set "protocol" to "MOPAC" to negotiate with more than 2 agents, every profile set
+#   then contains a profile per agent (all agents need to support MOPAC, e.g. the time dependent agents)
 tournament_settings = {
     "agents": [
         "agents.boulware_agent.boulware_agent.BoulwareAgent",
@@ -30,7 +49,10 @@ tournament_settings = {
 }
 
 # run a session and obtain results in dictionaries
-tournament, results_summaries = run_tournament(tournament_settings)
+if "queue" in tournament_settings:
+    tournament, results_summaries = run_coordinator(tournament_settings)
+else:
+    tournament, results_summaries = run_tournament(tournament_settings)
 
 # save the tournament settings for reference
 with open("results/tournament.json", "w") as f:
@@ -38,3 +60,13 @@ with open("results/tournament.json", "w") as f:
 # save the result summaries
 with open("results/results_summaries.json", "w") as f:
     f.write(json.dumps(results_summaries, indent=2))
+# plot the aggregated results to an html file
+write_tournament_report(zip(tournament, results_summaries), "results/tournament_report.html")
+
+# report sessions and agents that keep memory allocated
+if tournament_settings.get("memory", False):
+    with open("results/memory_report.json", "w") as f:
+        f.write(json.dumps(find_memory_growth(results_summaries), indent=2))
+# merge the sampled stacks of all sessions per agent
+if "profiler_dir" in tournament_settings:
+    merge_profiles(tournament_settings["profiler_dir"])
@@ -0,0 +1,13 @@
+from utils.distributed import run_worker
+
+# Settings to run a tournament worker:
+#   We need to specify the queue directory that the coordinator (run_tournament.py with "queue" set) publishes to
+#   The lease should be longer than the time a worker needs to renew it, sessions of a worker that misses it are rerun
+worker_settings = {
+    "queue_path": "results/queue",
+    "lease_seconds": 60,
+}
+
+# run sessions until the coordinator closes the queue
+num_sessions = run_worker(**worker_settings)
+print(f"worker ran {num_sessions} sessions")
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from utils.domain_generator import generate_domain
+
+
+@pytest.fixture
+def make_profiles(tmp_path):
+    """
+    Generates a domain (see utils.domain_generator) and returns its two profiles,
+    parsed the way geniusweb parses profile files:
+
+        profile_a, profile_b = make_profiles([3, 4, 2], seed=1)
+    """
+    pytest.importorskip("geniusweb")
+    ObjectMapper = pytest.importorskip("pyson.ObjectMapper").ObjectMapper
+    from geniusweb.profile.Profile import Profile
+
+    def make(num_values: list[int], opposition: float = 0.5, reservation: float | None = None, seed: int = 0):
+        directory = tmp_path / f"domain{seed}"
+        generate_domain(str(directory), "synthetic", num_values, opposition, reservation, seed)
+        profiles = []
+        for name in ("profileA", "profileB"):
+            with open(directory / f"{name}.json") as f:
+                profiles.append(ObjectMapper().parse(json.load(f), Profile))
+        return profiles
+
+    return make
+
+
+def all_bids(profile) -> list:
+    """Every bid of the profile's domain, for brute force checks."""
+    from itertools import product
+
+    from geniusweb.issuevalue.Bid import Bid
+
+    domain = profile.getDomain()
+    issues = sorted(domain.getIssues())
+    return [Bid(dict(zip(issues, values))) for values in product(*(domain.getValues(issue) for issue in issues))]
@@ -0,0 +1,86 @@
+from random import Random
+
+import pytest
+
+from utils.acceptance import (ACCombi, AcceptanceCondition, ACConst, ACNext, ACTime, AllOf, AnyOf,
+                              EmptyWindowException, SlidingWindow)
+
+
+@pytest.mark.parametrize("size", [None, 1, 3, 10])
+def test_window_matches_brute_force(size):
+    random = Random(size)
+    window = SlidingWindow(size)
+    values: list[float] = []
+    for _ in range(200):
+        value = round(random.random(), 2)  # rounded, so equal values occur
+        window.add(value)
+        values.append(value)
+        last = values if size is None else values[-size:]
+        assert len(window) == len(last)
+        assert window.max() == max(last)
+        assert window.min() == min(last)
+        assert window.mean() == pytest.approx(sum(last) / len(last))
+
+
+@pytest.mark.parametrize("statistic", ["max", "min", "mean"])
+def test_empty_window(statistic):
+    with pytest.raises(EmptyWindowException):
+        getattr(SlidingWindow(5), statistic)()
+
+
+def test_condition_is_abstract():
+    with pytest.raises(TypeError):
+        AcceptanceCondition()  # type:ignore
+
+
+def test_ac_next():
+    assert ACNext().is_acceptable(0.7, 0.7, 0.0)
+    assert not ACNext().is_acceptable(0.6, 0.7, 0.0)
+    assert ACNext(alpha=1.0, beta=0.1).is_acceptable(0.6, 0.7, 0.0)
+    assert not ACNext(alpha=0.5).is_acceptable(1.0, 0.7, 0.0)
+
+
+def test_ac_const():
+    assert ACConst(0.8).is_acceptable(0.8, 1.0, 0.0)
+    assert not ACConst(0.8).is_acceptable(0.79, 0.0, 1.0)
+
+
+def test_ac_time():
+    assert not ACTime(0.9).is_acceptable(1.0, 0.0, 0.89)
+    assert ACTime(0.9).is_acceptable(0.0, 1.0, 0.9)
+
+
+@pytest.mark.parametrize("statistic", ["max", "mean"])
+def test_ac_combi(statistic):
+    condition = ACCombi(0.5, window=2, statistic=statistic)
+    for utility in (0.9, 0.3, 0.5):
+        condition.observe(utility)
+    # AC_next decides before time
+    assert condition.is_acceptable(0.8, 0.8, 0.1)
+    assert not condition.is_acceptable(0.5, 0.8, 0.1)
+    # after time the offer has to match the last 2 offers, 0.9 fell out of the window
+    assert condition.is_acceptable(0.5, 0.8, 0.6)
+    assert condition.is_acceptable(0.4, 0.8, 0.6) == (statistic == "mean")
+    assert not condition.is_acceptable(0.3, 0.8, 0.6)
+
+
+def test_ac_combi_without_offers():
+    assert not ACCombi(0.0).is_acceptable(0.5, 0.8, 1.0)
+
+
+def test_any_of_and_all_of():
+    late = ACTime(0.9)
+    good = ACConst(0.8)
+    assert AnyOf(late, good).is_acceptable(0.8, 1.0, 0.0)
+    assert AnyOf(late, good).is_acceptable(0.1, 1.0, 0.95)
+    assert not AnyOf(late, good).is_acceptable(0.1, 1.0, 0.5)
+    assert not AllOf(late, good).is_acceptable(0.8, 1.0, 0.0)
+    assert AllOf(late, good).is_acceptable(0.8, 1.0, 0.95)
+    assert not AnyOf().is_acceptable(1.0, 0.0, 1.0)
+
+
+def test_observe_reaches_nested_conditions():
+    combi = ACCombi(0.0, window=1)
+    AllOf(AnyOf(combi)).observe(0.6)
+    assert combi.is_acceptable(0.6, 1.0, 0.5)
+    assert not combi.is_acceptable(0.59, 1.0, 0.5)
@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("geniusweb")
+
+from conftest import all_bids  # noqa: E402
+from utils.best_first_bids import BestFirstBids  # noqa: E402
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_enumerates_all_bids_in_descending_order(make_profiles, seed):
+    profile, _ = make_profiles([3, 2, 4, 3], seed=seed)
+    enumerated = list(BestFirstBids(profile))
+
+    assert len(enumerated) == len(all_bids(profile))
+    assert {bid for bid, _ in enumerated} == set(all_bids(profile))
+    utilities = [utility for _, utility in enumerated]
+    assert utilities == sorted(utilities, reverse=True)
+    for bid, utility in enumerated:
+        assert utility == pytest.approx(profile.getUtility(bid))
+
+
+def test_top_and_above(make_profiles):
+    profile, _ = make_profiles([4, 4, 3], seed=7)
+    bids = BestFirstBids(profile)
+    brute_force = sorted((profile.getUtility(bid) for bid in all_bids(profile)), reverse=True)
+
+    assert bids.getMax() == pytest.approx(brute_force[0])
+    assert [profile.getUtility(bid) for bid in bids.top(10)] == pytest.approx(brute_force[:10])
+    threshold = brute_force[20]
+    assert len(list(bids.above(threshold))) == sum(u >= threshold for u in brute_force)
+
+
+def test_update_reranks_changed_issues(make_profiles):
+    profile_a, profile_b = make_profiles([3, 3, 3], opposition=0.0, seed=3)
+    bids = BestFirstBids(profile_a)
+    # same domain, every issue changed
+    bids.update(profile_b, sorted(profile_b.getDomain().getIssues()))
+    utilities = [profile_b.getUtility(bid) for bid, _ in bids]
+    assert utilities == sorted(utilities, reverse=True)
+    assert len(utilities) == 27
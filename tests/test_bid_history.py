@@ -0,0 +1,74 @@
+from random import Random
+
+import pytest
+
+pytest.importorskip("geniusweb")
+
+from geniusweb.issuevalue.Bid import Bid  # noqa: E402
+
+from conftest import all_bids  # noqa: E402
+from utils.bid_history import MISSING, BidHistory  # noqa: E402
+from utils.frequency_analyzer import BidIsNoneException  # noqa: E402
+
+
+def test_matches_a_list_of_bids(make_profiles):
+    profile, _ = make_profiles([3, 5, 2], seed=1)
+    domain = profile.getDomain()
+    random = Random(0)
+    bids = [random.choice(all_bids(profile)) for _ in range(300)]
+    rounds = sorted(random.sample(range(1000), len(bids)))
+
+    # a small capacity, so the rows are copied a few times
+    history = BidHistory(domain, capacity=1)
+    for bid, round in zip(bids, rounds):
+        history.append(bid, round)
+
+    assert len(history) == len(bids)
+    assert [history.get_bid(i) for i in range(len(bids))] == bids
+    assert history.get_bid(-1) == history.last() == bids[-1]
+    assert history.rounds().tolist() == rounds
+
+    start, stop = rounds[50], rounds[200]
+    selected = [bid for bid, round in zip(bids, rounds) if start <= round < stop]
+    assert len(history.rows(start, stop)) == len(selected)
+    for column, issue in enumerate(history.issues):
+        values = list(domain.getValues(issue))
+        counts = history.value_counts(start, stop)[column].tolist()
+        assert counts == [sum(bid.getValue(issue) == value for bid in selected) for value in values]
+
+
+def test_views_are_read_only_and_survive_growth(make_profiles):
+    profile, _ = make_profiles([2, 2], seed=2)
+    history = BidHistory(profile.getDomain(), capacity=2)
+    bids = all_bids(profile)
+    history.append(bids[0])
+    history.append(bids[1])
+    view = history.rows()
+    history.append(bids[2])
+
+    with pytest.raises(ValueError):
+        view[0, 0] = 1
+    assert [history.get_bid(i) for i in range(2)] == bids[:2]
+    assert history.rounds().tolist() == [0, 1, 2]
+
+
+def test_partial_bids(make_profiles):
+    profile, _ = make_profiles([3, 3], seed=3)
+    history = BidHistory(profile.getDomain())
+    issue = history.issues[0]
+    value = list(profile.getDomain().getValues(issue))[2]
+    history.append(Bid({issue: value}))
+
+    assert history.rows()[0].tolist() == [2, MISSING]
+    assert history.last() == Bid({issue: value})
+    assert history.value_counts()[1].tolist() == [0, 0, 0]
+
+
+def test_errors(make_profiles):
+    profile, _ = make_profiles([2, 2], seed=4)
+    history = BidHistory(profile.getDomain())
+    assert history.last() is None
+    with pytest.raises(IndexError):
+        history.get_bid(0)
+    with pytest.raises(BidIsNoneException):
+        history.append(None)  # type:ignore
@@ -0,0 +1,40 @@
+import pytest
+
+from utils.concession_estimator import ConcessionEstimator
+
+
+def _estimate(e: float, reservation: float, num_offers: int = 50) -> ConcessionEstimator:
+    # offers of a time dependent opponent, as in TimeDependentAgent
+    estimator = ConcessionEstimator()
+    for i in range(1, num_offers + 1):
+        t = i / num_offers
+        estimator.add_offer(t, 1.0 - (1.0 - reservation) * t ** (1 / e))
+    return estimator
+
+
+@pytest.mark.parametrize("e", [0.2, 0.5, 1.0, 2.0])
+def test_recovers_concession_curve(e):
+    estimator = _estimate(e, 0.4)
+    assert estimator.get_e() == pytest.approx(e, rel=1e-6)
+    assert estimator.get_reservation() == pytest.approx(0.4, abs=1e-6)
+
+
+def test_boulware_and_conceder():
+    assert _estimate(0.2, 0.4).is_boulware()
+    assert _estimate(2.0, 0.4).is_conceder()
+    assert not _estimate(2.0, 0.4).is_boulware()
+
+
+def test_hardliner():
+    estimator = ConcessionEstimator()
+    for i in range(1, 20):
+        estimator.add_offer(i / 20, 0.98)
+    assert estimator.get_e() == 0.0
+
+
+def test_unknown_before_two_offers():
+    estimator = ConcessionEstimator()
+    assert estimator.get_e() is None
+    estimator.add_offer(0.1, 0.9)
+    assert estimator.get_e() is None
+    assert not estimator.is_boulware() and not estimator.is_conceder()
@@ -0,0 +1,94 @@
+import itertools
+import json
+from decimal import Decimal
+from random import Random
+
+import pytest
+
+from utils.domain_generator import generate_domain, pareto_front
+
+
+def _load(directory) -> tuple[dict, dict, dict]:
+    with open(directory / "profileA.json") as f:
+        profile_a = json.load(f)["LinearAdditiveUtilitySpace"]
+    with open(directory / "profileB.json") as f:
+        profile_b = json.load(f)["LinearAdditiveUtilitySpace"]
+    with open(directory / "specials.json") as f:
+        specials = json.load(f)
+    return profile_a, profile_b, specials
+
+
+def _utility(profile: dict, bid: dict) -> float:
+    utilities = profile["issueUtilities"]
+    return sum(
+        profile["issueWeights"][issue] * utilities[issue]["DiscreteValueSetUtilities"]["valueUtilities"][value]
+        for issue, value in bid.items()
+    )
+
+
+def _brute_force_front(weighted: list[list[tuple[float, float]]]) -> list[tuple[float, float]]:
+    points = [
+        (sum(v[0] for v in values), sum(v[1] for v in values))
+        for values in itertools.product(*weighted)
+    ]
+    return sorted(
+        p for p in points if not any(q[0] >= p[0] and q[1] >= p[1] and q != p for q in points)
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_pareto_front_matches_brute_force(seed):
+    random = Random(seed)
+    # rounded utilities, so ties and duplicate points occur
+    weighted = [
+        [(round(random.random(), 1), round(random.random(), 1)) for _ in range(random.randint(2, 4))]
+        for _ in range(random.randint(1, 4))
+    ]
+    front = pareto_front(weighted)
+    assert [(u_a, u_b) for u_a, u_b, _ in front] == pytest.approx(sorted(set(_brute_force_front(weighted))))
+    for u_a, u_b, indices in front:
+        assert sum(weighted[i][j][0] for i, j in enumerate(indices)) == pytest.approx(u_a)
+        assert sum(weighted[i][j][1] for i, j in enumerate(indices)) == pytest.approx(u_b)
+
+
+def test_generated_profiles(tmp_path):
+    generate_domain(str(tmp_path), "synthetic", [3, 4, 2], reservation=0.6, seed=1)
+    profile_a, profile_b, specials = _load(tmp_path)
+
+    with open(tmp_path / "synthetic.json") as f:
+        domain = json.load(f)
+    assert [len(issue["values"]) for issue in domain["issuesValues"].values()] == [3, 4, 2]
+
+    for profile in (profile_a, profile_b):
+        assert profile["domain"] == domain
+        assert sum(Decimal(str(w)) for w in profile["issueWeights"].values()) == 1
+        for issue in profile["issueUtilities"].values():
+            assert max(issue["DiscreteValueSetUtilities"]["valueUtilities"].values()) == 1.0
+        assert _utility(profile, profile["reservationBid"]["issuevalues"]) == pytest.approx(0.6, abs=0.1)
+
+    # the specials agree with a brute force search over all bids
+    bids = [
+        dict(zip(domain["issuesValues"], values))
+        for values in itertools.product(*(issue["values"] for issue in domain["issuesValues"].values()))
+    ]
+    utilities = [(_utility(profile_a, bid), _utility(profile_b, bid)) for bid in bids]
+    assert specials["nash"]["utility"] == pytest.approx(list(max(utilities, key=lambda u: u[0] * u[1])))
+    assert specials["kalai"]["utility"] == pytest.approx(list(max(utilities, key=lambda u: min(u))))
+    for point in specials["pareto_front"]:
+        assert point["utility"] == pytest.approx([_utility(profile_a, point["bid"]), _utility(profile_b, point["bid"])])
+
+
+def test_opposition(tmp_path):
+    generate_domain(str(tmp_path), "opposed", [5, 5], opposition=1.0, seed=2)
+    profile_a, profile_b, _ = _load(tmp_path)
+    # fully opposed profiles rank the values of every issue in reverse
+    for issue, utilities in profile_a["issueUtilities"].items():
+        a = utilities["DiscreteValueSetUtilities"]["valueUtilities"]
+        b = profile_b["issueUtilities"][issue]["DiscreteValueSetUtilities"]["valueUtilities"]
+        assert sorted(a, key=a.get) == sorted(b, key=b.get, reverse=True)
+
+
+def test_reproducible(tmp_path):
+    generate_domain(str(tmp_path / "first"), "d", [3, 3], reservation=0.5, seed=3)
+    generate_domain(str(tmp_path / "second"), "d", [3, 3], reservation=0.5, seed=3)
+    assert _load(tmp_path / "first") == _load(tmp_path / "second")
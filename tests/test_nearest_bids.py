@@ -0,0 +1,75 @@
+from decimal import Decimal
+from random import Random
+
+import pytest
+
+pytest.importorskip("geniusweb")
+
+from geniusweb.issuevalue.Bid import Bid  # noqa: E402
+
+from conftest import all_bids  # noqa: E402
+from utils.nearest_bids import NearestBids  # noqa: E402
+
+
+def _distance(bid, other, weights: dict) -> float:
+    return sum(weight for issue, weight in weights.items() if bid.getValue(issue) != other.getValue(issue))
+
+
+def _check(profile, bid, k: int, min_utility: Decimal, weights: dict | None = None) -> None:
+    distance_weights = weights or {issue: float(profile.getWeight(issue)) for issue in profile.getDomain().getIssues()}
+    found = NearestBids(profile).nearest(bid, k, min_utility, weights)
+    candidates = [other for other in all_bids(profile) if profile.getUtility(other) >= min_utility]
+    expected = sorted(_distance(bid, other, distance_weights) for other in candidates)[:k]
+
+    assert len(found) == len(set(found)) == len(expected)
+    assert all(profile.getUtility(other) >= min_utility for other in found)
+    assert [_distance(bid, other, distance_weights) for other in found] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_brute_force(make_profiles, seed):
+    profile, _ = make_profiles([3, 2, 4, 3, 2], seed=seed)
+    random = Random(seed)
+    bids = all_bids(profile)
+    maximum = max(profile.getUtility(bid) for bid in bids)
+    for _ in range(5):
+        bid = random.choice(bids)
+        min_utility = maximum * Decimal(random.choice(["0", "0.5", "0.8", "0.95", "1"]))
+        _check(profile, bid, random.choice([1, 3, 10]), min_utility)
+
+
+def test_opponent_weights(make_profiles):
+    profile_a, profile_b = make_profiles([3, 3, 3, 3], seed=3)
+    weights = {issue: float(profile_b.getWeight(issue)) for issue in profile_b.getDomain().getIssues()}
+    for bid in all_bids(profile_a)[::7]:
+        _check(profile_a, bid, 4, Decimal("0.7"), weights)
+
+
+def test_unreachable_minimum(make_profiles):
+    profile, _ = make_profiles([2, 2], seed=4)
+    assert NearestBids(profile).nearest(all_bids(profile)[0], 3, Decimal("1.1")) == []
+
+
+def test_budget_keeps_bids_valid(make_profiles):
+    profile, _ = make_profiles([3, 3, 3, 3, 3], seed=5)
+    for bid in all_bids(profile)[::11]:
+        found = NearestBids(profile).nearest(bid, 5, Decimal("0.8"), max_sets=1)
+        assert 0 < len(found) == len(set(found))
+        assert all(profile.getUtility(other) >= Decimal("0.8") for other in found)
+
+
+@pytest.mark.parametrize("fraction", ["0.5", "0.95"])
+def test_many_issues_from_the_worst_bid(make_profiles, fraction):
+    # from the worst bid every issue gains about its distance, a subset sum
+    # problem over 3^40 bids that the budget cuts short
+    profile, _ = make_profiles([3] * 40, opposition=0.0, seed=5)
+    domain = profile.getDomain()
+    issues = sorted(domain.getIssues())
+    utilities = profile.getUtilities()
+    worst = Bid({issue: min(domain.getValues(issue), key=utilities[issue].getUtility) for issue in issues})
+    best = Bid({issue: max(domain.getValues(issue), key=utilities[issue].getUtility) for issue in issues})
+    min_utility = profile.getUtility(best) * Decimal(fraction)
+
+    found = NearestBids(profile).nearest(worst, 5, min_utility, max_sets=1000)
+    assert len(found) == len(set(found)) == 5
+    assert all(profile.getUtility(bid) >= min_utility for bid in found)
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("geniusweb")
+
+from conftest import all_bids  # noqa: E402
+from utils.pareto_front import EstimatedParetoFront  # noqa: E402
+
+
+def _value_utilities(profile) -> list[np.ndarray]:
+    # weighted value utilities per issue, as the opponent models give them
+    domain = profile.getDomain()
+    tables = []
+    for issue in sorted(domain.getIssues()):
+        weight, issue_utilities = profile.getWeight(issue), profile.getUtilities()[issue]
+        tables.append(np.array([float(weight * issue_utilities.getUtility(value)) for value in domain.getValues(issue)]))
+    return tables
+
+
+def _brute_force_front(profile_a, profile_b) -> set:
+    points = {
+        bid: (round(float(profile_a.getUtility(bid)), 9), round(float(profile_b.getUtility(bid)), 9))
+        for bid in all_bids(profile_a)
+    }
+    return {
+        bid
+        for bid, (a, b) in points.items()
+        if not any(c >= a and d >= b and (c, d) != (a, b) for c, d in points.values())
+    }
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_front_matches_brute_force(make_profiles, seed):
+    profile_a, profile_b = make_profiles([3, 4, 2, 3], seed=seed)
+    front = EstimatedParetoFront(profile_a)
+    front.update_opponent(_value_utilities(profile_b))
+
+    points = front.get_front()
+    assert {bid for bid, _, _ in points} == _brute_force_front(profile_a, profile_b)
+    assert [own for _, own, _ in points] == sorted((own for _, own, _ in points), reverse=True)
+    for bid, own, opponent in points:
+        assert own == pytest.approx(float(profile_a.getUtility(bid)))
+        assert opponent == pytest.approx(float(profile_b.getUtility(bid)))
+
+
+def test_best_above(make_profiles):
+    profile_a, profile_b = make_profiles([4, 3, 3], seed=6)
+    front = EstimatedParetoFront(profile_a)
+    front.update_opponent(_value_utilities(profile_b))
+
+    for threshold in (0.0, 0.3, 0.6, 0.9):
+        above = [bid for bid in all_bids(profile_a) if float(profile_a.getUtility(bid)) >= threshold]
+        bid = front.best_above(threshold)
+        assert float(profile_a.getUtility(bid)) >= threshold
+        assert float(profile_b.getUtility(bid)) == pytest.approx(max(float(profile_b.getUtility(b)) for b in above))
+    assert front.best_above(1.1) is None
+
+
+def test_updates_match_rebuild(make_profiles):
+    profile_a, profile_b = make_profiles([3, 3, 4], opposition=0.0, seed=7)
+    issues = sorted(profile_a.getDomain().getIssues())
+    # learn the opponent in steps, then swap the own profile
+    front = EstimatedParetoFront(profile_a)
+    front.update_opponent(_value_utilities(profile_a))
+    front.get_front()
+    front.update_opponent(_value_utilities(profile_b))
+    front.update_profile(profile_b, issues[:2])
+    front.update_profile(profile_b, issues[2:])
+    front.update_opponent(_value_utilities(profile_a))
+
+    assert {bid for bid, _, _ in front.get_front()} == _brute_force_front(profile_b, profile_a)
+
+
+def test_sampled_space(make_profiles):
+    profile_a, profile_b = make_profiles([5, 5, 5, 5], seed=8)
+    front = EstimatedParetoFront(profile_a, max_bids=100, seed=0)
+    front.update_opponent(_value_utilities(profile_b))
+    # our best bid is always covered, so it heads the front
+    best = max(float(profile_a.getUtility(bid)) for bid in all_bids(profile_a))
+    assert front.get_front()[0][1] == pytest.approx(best)
@@ -0,0 +1,35 @@
+from utils.results_db import ResultsDatabase
+
+
+def _offer(actor: str) -> dict:
+    return {"Offer": {"actor": actor, "bid": {"issuevalues": {"issueA": "valueA"}}, "utilities": {}}}
+
+
+def _add(tmp_path, settings: dict, actions: list[dict]) -> list[dict]:
+    # adds a session with the given actions and returns its stored actions
+    database = ResultsDatabase(str(tmp_path / "results.sqlite"))
+    parties = {f"party_{i + 1}": {} for i in range(len(settings["agents"]))}
+    trace = {"partyprofiles": parties, "actions": actions}
+    summary = {"result": "failed", "agent_1": "A", "utility_1": 0}
+    database.add_sessions(database.start_run(settings), [(0, settings, summary, trace)])
+    return database.query("SELECT action_index, round FROM actions ORDER BY action_index")
+
+
+def test_saop_rounds(tmp_path):
+    settings = {"agents": ["a.A", "b.B"], "profiles": ["domains/domain00/profileA.json"] * 2}
+    rows = _add(tmp_path, settings, [_offer("party_1"), _offer("party_2"), _offer("party_1")])
+    assert [row["round"] for row in rows] == [0, 0, 1]
+
+
+def test_mopac_rounds_follow_the_phases(tmp_path):
+    settings = {
+        "agents": ["a.A", "b.B", "c.C"],
+        "profiles": ["domains/domain00/profileA.json"] * 3,
+        "protocol": "MOPAC",
+    }
+    votes = {"Votes": {"actor": "party_1", "votes": []}}
+    # round 0: two offers and the votes, round 1: three offers
+    actions = [_offer("party_1"), _offer("party_2"), votes, votes]
+    actions += [_offer("party_1"), _offer("party_2"), _offer("party_3")]
+    rows = _add(tmp_path, settings, actions)
+    assert [(row["action_index"], row["round"]) for row in rows] == [(0, 0), (1, 0), (4, 1), (5, 1), (6, 1)]
@@ -0,0 +1,57 @@
+import json
+import os
+
+import pytest
+
+from utils.scheduler import CostModel, schedule
+
+
+def _session(agents: list[str], domain: str) -> dict:
+    return {"agents": agents, "profiles": [f"domains/{domain}/profileA.json", f"domains/{domain}/profileB.json"]}
+
+
+def test_estimate_falls_back_to_less_specific_history(tmp_path):
+    model = CostModel(str(tmp_path / "costs.json"), default=7.0)
+    model.record(_session(["A", "B"], "d0"), 2.0)
+    model.record(_session(["A", "B"], "d0"), 4.0)
+    model.record(_session(["A", "C"], "d1"), 9.0)
+
+    assert model.estimate(_session(["A", "B"], "d0")) == pytest.approx(3.0)
+    assert model.estimate(_session(["A", "B"], "d1")) == pytest.approx(3.0)
+    # mean of A (5.0 over its three sessions) and B (3.0)
+    assert model.estimate(_session(["B", "A"], "d1")) == pytest.approx(4.0)
+    assert model.estimate(_session(["X", "Y"], "d0")) == 7.0
+
+
+def test_history_does_not_grow_with_sessions(tmp_path):
+    path = str(tmp_path / "costs.json")
+    model = CostModel(path, max_count=10)
+    for _ in range(1000):
+        model.record(_session(["A", "B"], "d0"), 1.0)
+    model.save()
+    size = os.path.getsize(path)
+
+    model = CostModel(path, max_count=10)
+    for _ in range(1000):
+        model.record(_session(["A", "B"], "d0"), 5.0)
+    model.save()
+    assert os.path.getsize(path) <= size + 16
+    # the capped count lets the mean follow the new durations
+    assert CostModel(path).estimate(_session(["A", "B"], "d0")) == pytest.approx(5.0)
+
+
+def test_reads_history_of_single_sessions(tmp_path):
+    path = tmp_path / "costs.json"
+    history = [{"agents": ["A", "B"], "domain": "domains/d0", "seconds": s} for s in (1.0, 2.0, 3.0)]
+    path.write_text(json.dumps(history))
+    assert CostModel(str(path)).estimate(_session(["A", "B"], "d0")) == pytest.approx(2.0)
+
+
+def test_schedule_keeps_domains_together(tmp_path):
+    model = CostModel(str(tmp_path / "costs.json"))
+    sessions = [_session(["A", "B"], f"d{i % 4}") for i in range(16)]
+    assignment = schedule(sessions, 4, model)
+
+    assert sorted(i for indices in assignment for i in indices) == list(range(16))
+    for indices in assignment:
+        assert len({sessions[i]["profiles"][0] for i in indices}) == 1
@@ -0,0 +1,65 @@
+from decimal import Decimal
+from random import Random
+
+import pytest
+
+pytest.importorskip("geniusweb")
+
+from conftest import all_bids  # noqa: E402
+from utils.target_utility_bids import TargetUtilityBids  # noqa: E402
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_count_matches_brute_force(make_profiles, seed):
+    profile, _ = make_profiles([3, 4, 2, 3], seed=seed)
+    bids = TargetUtilityBids(profile, resolution=1e-4)
+    utilities = [profile.getUtility(bid) for bid in all_bids(profile)]
+
+    assert bids.getMin() == pytest.approx(min(utilities))
+    assert bids.getMax() == pytest.approx(max(utilities))
+    assert profile.getUtility(bids.getMaxBid()) == pytest.approx(max(utilities))
+    assert bids.count(Decimal(0), Decimal(1)) == len(utilities)
+
+    # bucketing makes the count approximate near the interval bounds only
+    low, high = Decimal("0.4"), Decimal("0.7")
+    slack = Decimal("0.001")
+    inside = sum(low + slack <= u <= high - slack for u in utilities)
+    around = sum(low - slack <= u <= high + slack for u in utilities)
+    assert inside <= bids.count(low, high) <= around
+
+
+def test_samples_are_inside_the_interval(make_profiles):
+    profile, _ = make_profiles([4, 3, 3, 2], seed=11)
+    bids = TargetUtilityBids(profile, rng=Random(0))
+    low, high = Decimal("0.5"), Decimal("0.6")
+    expected = {bid for bid in all_bids(profile) if low <= profile.getUtility(bid) <= high}
+
+    sampled = bids.sample(low, high, n=len(expected), attempts=5000)
+    assert len(sampled) == len(set(sampled))
+    assert set(sampled) == expected
+
+
+def test_sample_of_empty_interval(make_profiles):
+    profile, _ = make_profiles([2, 2], seed=1)
+    assert TargetUtilityBids(profile).sample(Decimal("1.5"), Decimal("2")) == []
+
+
+def test_seeded_samples_repeat(make_profiles):
+    profile, _ = make_profiles([5, 5, 5], seed=2)
+    first = TargetUtilityBids(profile, rng=Random(4)).sample(Decimal("0.3"), Decimal("0.8"), n=10)
+    second = TargetUtilityBids(profile, rng=Random(4)).sample(Decimal("0.3"), Decimal("0.8"), n=10)
+    assert first == second and len(first) == 10
+
+
+def test_update_matches_rebuild(make_profiles):
+    profile_a, profile_b = make_profiles([3, 4, 3], opposition=0.0, seed=5)
+    issues = sorted(profile_b.getDomain().getIssues())
+    updated = TargetUtilityBids(profile_a)
+    # in two steps, so the second keeps the counts of the issues the first updated
+    updated.update(profile_b, issues[1:])
+    updated.update(profile_b, issues[:1])
+    rebuilt = TargetUtilityBids(profile_b)
+
+    assert updated.getMax() == rebuilt.getMax()
+    for low in (Decimal("0.1"), Decimal("0.3"), Decimal("0.5")):
+        assert updated.count(low, low + Decimal("0.2")) == rebuilt.count(low, low + Decimal("0.2"))
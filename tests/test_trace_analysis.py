@@ -0,0 +1,30 @@
+import numpy as np
+
+from utils.trace_analysis import CONCESSION, FORTUNATE, NICE, SELFISH, SILENT, UNFORTUNATE, classify_moves
+
+
+def test_concession_when_opponent_unchanged():
+    # giving up own utility without hurting the opponent is a concession in DANS
+    moves = classify_moves(np.array([-0.1]), np.array([0.0]))
+    assert moves.tolist() == [CONCESSION]
+
+
+def test_move_table():
+    own = np.array([-0.1, -0.1, -0.1, 0.0, 0.0, 0.0, 0.1, 0.1, 0.1])
+    opponent = np.array([-0.1, 0.0, 0.1, -0.1, 0.0, 0.1, -0.1, 0.0, 0.1])
+    assert classify_moves(own, opponent).tolist() == [
+        UNFORTUNATE,
+        CONCESSION,
+        CONCESSION,
+        UNFORTUNATE,
+        SILENT,
+        NICE,
+        SELFISH,
+        SELFISH,
+        FORTUNATE,
+    ]
+
+
+def test_changes_within_epsilon_are_unchanged():
+    moves = classify_moves(np.array([1e-9, -0.1]), np.array([-1e-9, 1e-9]), epsilon=1e-6)
+    assert moves.tolist() == [SILENT, CONCESSION]
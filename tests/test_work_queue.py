@@ -0,0 +1,92 @@
+import os
+from multiprocessing import Pool
+from time import time
+
+from utils.work_queue import DirectoryQueue
+
+
+def _work(path: str) -> list[str]:
+    # a worker process: claims, renews and completes tasks until none are left
+    queue = DirectoryQueue(path)
+    completed = []
+    while (claimed := queue.claim()) is not None:
+        task_id, task = claimed
+        queue.renew(task_id)
+        queue.complete(task_id, task * 2)
+        completed.append(task_id)
+    return completed
+
+
+def _age(path: str, seconds: float) -> None:
+    old = time() - seconds
+    os.utime(path, (old, old))
+
+
+def test_every_task_runs_once_across_processes(tmp_path):
+    queue = DirectoryQueue(str(tmp_path))
+    for i in range(200):
+        queue.publish(f"{i:06d}", i)
+
+    with Pool(4) as pool:
+        completed = pool.map(_work, [str(tmp_path)] * 4)
+
+    task_ids = [task_id for worker in completed for task_id in worker]
+    assert sorted(task_ids) == [f"{i:06d}" for i in range(200)]
+    assert queue.results() == {f"{i:06d}": i * 2 for i in range(200)}
+    assert os.listdir(tmp_path / "claimed") == []
+
+
+def test_task_of_dead_worker_is_requeued(tmp_path):
+    queue = DirectoryQueue(str(tmp_path))
+    for i in range(20):
+        queue.publish(f"{i:06d}", i)
+
+    # a worker claims a task and dies without completing it
+    task_id, _ = queue.claim()
+    _age(str(tmp_path / "claimed" / f"{task_id}.json"), 120)
+    assert queue.requeue_expired(60) == [task_id]
+
+    with Pool(2) as pool:
+        pool.map(_work, [str(tmp_path)] * 2)
+    assert queue.count_done() == 20
+
+
+def test_renewed_lease_is_kept(tmp_path):
+    queue = DirectoryQueue(str(tmp_path))
+    queue.publish("a", 1)
+    task_id, _ = queue.claim()
+
+    _age(str(tmp_path / "claimed" / "a.json"), 120)
+    queue.renew(task_id)
+    assert queue.requeue_expired(60) == []
+
+
+def test_lease_starts_at_claim(tmp_path):
+    queue = DirectoryQueue(str(tmp_path))
+    queue.publish("a", 1)
+    # waited in pending for longer than the lease
+    _age(str(tmp_path / "pending" / "a.json"), 120)
+
+    assert queue.claim() == ("a", 1)
+    assert queue.requeue_expired(60) == []
+
+
+def test_completed_task_is_not_requeued(tmp_path):
+    queue = DirectoryQueue(str(tmp_path))
+    queue.publish("a", 1)
+    queue.claim()
+    queue.complete("a", 2)
+
+    assert queue.requeue_expired(0) == []
+    assert queue.results() == {"a": 2}
+
+
+def test_every_close_is_a_new_run(tmp_path):
+    queue = DirectoryQueue(str(tmp_path))
+    assert queue.closed_run() is None
+    queue.close()
+    first = queue.closed_run()
+    queue.close()
+    assert queue.closed_run() not in (None, first)
+    queue.clear()
+    assert queue.closed_run() is None
@@ -0,0 +1,207 @@
+from abc import ABC, abstractmethod
+from collections import deque
+
+from utils.model_server import get_model_server
+
+
+class SlidingWindow:
+    """
+    Max, min and mean of the last size values added, in O(1) amortized per value.
+    The max and min are kept in monotonic deques, the mean in a running sum.
+    If size is None, the window covers all values added so far.
+    """
+
+    def __init__(self, size: int | None = None) -> None:
+        assert size is None or size > 0
+        self.size = size
+        self._values: deque[float] = deque()
+        self._sum = 0.0
+        self._count = 0
+        # (index, value) pairs with decreasing and increasing values respectively
+        self._max: deque[tuple[int, float]] = deque()
+        self._min: deque[tuple[int, float]] = deque()
+
+    def add(self, value: float) -> None:
+        index = self._count
+        self._count += 1
+
+        self._sum += value
+        if self.size is not None:
+            # values are only kept to drop them from the running sum again
+            self._values.append(value)
+            if len(self._values) > self.size:
+                self._sum -= self._values.popleft()
+
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((index, value))
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((index, value))
+
+        if self.size is not None:
+            oldest = index - self.size + 1
+            if self._max[0][0] < oldest:
+                self._max.popleft()
+            if self._min[0][0] < oldest:
+                self._min.popleft()
+
+    def __len__(self) -> int:
+        return len(self._values) if self.size is not None else self._count
+
+    def max(self) -> float:
+        if not self._max:
+            raise EmptyWindowException()
+        return self._max[0][1]
+
+    def min(self) -> float:
+        if not self._min:
+            raise EmptyWindowException()
+        return self._min[0][1]
+
+    def mean(self) -> float:
+        if len(self) == 0:
+            raise EmptyWindowException()
+        return self._sum / len(self)
+
+
+class AcceptanceCondition(ABC):
+    """
+    Base class of the acceptance conditions. observe is called with the utility of
+    every received offer, is_acceptable decides on the last one:
+
+        utility:      our utility of the received offer
+        next_utility: our utility of the bid we would offer next
+        progress:     progress towards the deadline [0.0, 1.0]
+    """
+
+    def observe(self, utility: float) -> None:
+        pass
+
+    @abstractmethod
+    def is_acceptable(self, utility: float, next_utility: float, progress: float) -> bool:
+        ...
+
+
+class ACNext(AcceptanceCondition):
+    """
+    Accepts if the offer, scaled by alpha and shifted by beta, is at least as good as
+    our next bid
+    """
+
+    def __init__(self, alpha: float = 1.0, beta: float = 0.0) -> None:
+        self.alpha = alpha
+        self.beta = beta
+
+    def is_acceptable(self, utility: float, next_utility: float, progress: float) -> bool:
+        return self.alpha * utility + self.beta >= next_utility
+
+
+class ACConst(AcceptanceCondition):
+    """
+    Accepts if the offer has a utility of at least threshold
+    """
+
+    def __init__(self, threshold: float) -> None:
+        self.threshold = threshold
+
+    def is_acceptable(self, utility: float, next_utility: float, progress: float) -> bool:
+        return utility >= self.threshold
+
+
+class ACTime(AcceptanceCondition):
+    """
+    Accepts anything once progress has reached time
+    """
+
+    def __init__(self, time: float) -> None:
+        self.time = time
+
+    def is_acceptable(self, utility: float, next_utility: float, progress: float) -> bool:
+        return progress >= self.time
+
+
+class ACCombi(AcceptanceCondition):
+    """
+    AC_combi(T, MAX_W): accepts according to AC_next, or, once progress has reached
+    time, if the offer is at least as good as the best (or mean) offer received in
+    the last window offers
+    """
+
+    def __init__(
+        self,
+        time: float,
+        window: int | None = None,
+        statistic: str = "max",
+        next_condition: AcceptanceCondition | None = None,
+    ) -> None:
+        assert statistic in ("max", "mean")
+        self.time = time
+        self.statistic = statistic
+        self.next_condition = next_condition if next_condition is not None else ACNext()
+        self._window = SlidingWindow(window)
+
+    def observe(self, utility: float) -> None:
+        self.next_condition.observe(utility)
+        self._window.add(utility)
+
+    def is_acceptable(self, utility: float, next_utility: float, progress: float) -> bool:
+        if self.next_condition.is_acceptable(utility, next_utility, progress):
+            return True
+        if progress < self.time or len(self._window) == 0:
+            return False
+        if self.statistic == "max":
+            return utility >= self._window.max()
+        return utility >= self._window.mean()
+
+
+class ACModel(AcceptanceCondition):
+    """
+    Accepts if a trained model (see utils.model_server) scores the features
+    [utility, next_utility, progress] above threshold. The model is loaded once per
+    process and shared by all agents that use it.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.5, max_wait: float = 0.0) -> None:
+        self.server = get_model_server(path, max_wait)
+        self.threshold = threshold
+
+    def is_acceptable(self, utility: float, next_utility: float, progress: float) -> bool:
+        return float(self.server.predict([[utility, next_utility, progress]])[0]) > self.threshold
+
+
+class AnyOf(AcceptanceCondition):
+    """
+    Accepts if any of the conditions accepts, never accepts without conditions
+    """
+
+    def __init__(self, *conditions: AcceptanceCondition) -> None:
+        self.conditions = list(conditions)
+
+    def observe(self, utility: float) -> None:
+        for condition in self.conditions:
+            condition.observe(utility)
+
+    def is_acceptable(self, utility: float, next_utility: float, progress: float) -> bool:
+        return any(c.is_acceptable(utility, next_utility, progress) for c in self.conditions)
+
+
+class AllOf(AcceptanceCondition):
+    """
+    Accepts if all of the conditions accept
+    """
+
+    def __init__(self, *conditions: AcceptanceCondition) -> None:
+        self.conditions = list(conditions)
+
+    def observe(self, utility: float) -> None:
+        for condition in self.conditions:
+            condition.observe(utility)
+
+    def is_acceptable(self, utility: float, next_utility: float, progress: float) -> bool:
+        return all(c.is_acceptable(utility, next_utility, progress) for c in self.conditions)
+
+
+class EmptyWindowException(Exception):
+    def __init__(self, *args: object) -> None:
+        super().__init__(*args)
@@ -0,0 +1,212 @@
+from itertools import permutations
+from math import factorial
+
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Domain import Domain
+from geniusweb.issuevalue.Value import Value
+
+from utils.frequency_analyzer import BidIsNoneException, MissingHistoryException
+
+
+class BayesianOpponentModel:
+    """
+    Bayesian model of the opponent's linear additive preferences, after Zeng & Sycara
+    and the scalable variant of Hindriks & Tykhonov.
+
+    The hypotheses are stored as arrays:
+        - weights: (hypotheses, issues), issue weights derived from a ranking of the issues
+        - evaluations: (issues, hypotheses per issue, values), value evaluations per issue
+
+    Rather than one posterior over every combination of weight and evaluation
+    hypotheses (which grows multiplicatively), the posterior is factorised into one
+    over the weights and one per issue over its evaluations. Every received bid is
+    assumed to have an opponent utility close to a target that concedes over time,
+    and all posteriors are updated in a single vectorised step against the expected
+    value of the other factors. An update costs O(hypotheses * issues), so it grows
+    linearly with the number of hypotheses instead of with their product.
+    """
+
+    def __init__(
+        self,
+        max_weight_hypotheses: int = 120,
+        evaluation_hypotheses: int = 8,
+        concession: float = 0.3,
+        sigma: float = 0.15,
+        seed: int | None = None,
+    ) -> None:
+        self.number_bids: int = 0
+        self.last_bid: Bid | None = None
+        self.domain: Domain
+
+        self.max_weight_hypotheses = max_weight_hypotheses
+        self.evaluation_hypotheses = evaluation_hypotheses
+        # the opponent is expected to offer utility 1 - concession * progress
+        self.concession = concession
+        self.sigma = sigma
+        self._random = np.random.default_rng(seed)
+
+        self._issues: list[str] = []
+        self._value_index: list[dict[Value, int]] = []
+        self._weights: np.ndarray
+        self._evaluations: np.ndarray
+        self._log_weight_posterior: np.ndarray
+        self._log_evaluation_posterior: np.ndarray
+
+    def set_domain(self, domain: Domain):
+        self.domain = domain
+        self._issues = sorted(domain.getIssues())
+        self._value_index = [
+            {value: index for index, value in enumerate(domain.getValues(issue))} for issue in self._issues
+        ]
+        self._weights = self._weight_hypotheses(len(self._issues))
+        self._evaluations = self._evaluation_hypotheses([len(values) for values in self._value_index])
+
+        # uniform priors
+        self._log_weight_posterior = np.full(len(self._weights), -np.log(len(self._weights)))
+        self._log_evaluation_posterior = np.full(
+            self._evaluations.shape[:2], -np.log(self._evaluations.shape[1])
+        )
+
+    def add_bid(self, bid: Bid, progress: float = 0.0) -> None:
+        if bid is None:
+            raise BidIsNoneException()
+
+        self.last_bid = bid
+        self.add_row(self._to_indices([bid])[0], progress)
+
+    def add_row(self, indices: np.ndarray, progress: float = 0.0) -> None:
+        """
+        Adds a bid given as a row of value indices, e.g. the last row of a
+        utils.bid_history.BidHistory, without converting it from a Bid. Every issue
+        has to have a value.
+        """
+        self.number_bids += 1
+
+        target = 1.0 - self.concession * progress
+        indices = np.asarray(indices, dtype=np.intp)
+        issue_range = np.arange(len(self._issues))
+
+        # (issues, hypotheses per issue): evaluation of the offered value under every hypothesis
+        offered = self._evaluations[issue_range, :, indices]
+        evaluation_posterior = self._posterior(self._log_evaluation_posterior)
+        expected_evaluations = (evaluation_posterior * offered).sum(axis=1)
+        expected_weights = self._posterior(self._log_weight_posterior) @ self._weights
+
+        # opponent utility under every weight hypothesis, with the expected evaluations
+        weight_utilities = self._weights @ expected_evaluations
+
+        # opponent utility under every evaluation hypothesis, with the expected weights
+        # and the expected evaluations of the other issues
+        expected_contributions = expected_weights * expected_evaluations
+        rest = expected_contributions.sum() - expected_contributions
+        evaluation_utilities = rest[:, None] + expected_weights[:, None] * offered
+
+        self._log_weight_posterior = self._normalise(
+            self._log_weight_posterior + self._log_likelihood(weight_utilities, target)
+        )
+        self._log_evaluation_posterior = self._normalise(
+            self._log_evaluation_posterior + self._log_likelihood(evaluation_utilities, target)
+        )
+
+    def get_utility(self, bid: Bid) -> float:
+        """
+        Returns the expected opponent utility of the given bid
+        """
+        return float(self.get_utilities([bid])[0])
+
+    def get_utilities(self, bids: list[Bid]) -> np.ndarray:
+        """
+        Returns the expected opponent utilities of a batch of bids at once
+        """
+        return self.get_row_utilities(self._to_indices(bids))
+
+    def get_row_utilities(self, indices: np.ndarray) -> np.ndarray:
+        """
+        Returns the expected opponent utilities of bids given as rows of value indices,
+        e.g. a view on a utils.bid_history.BidHistory, which uses the same encoding
+        """
+        expected_weights, expected_evaluations = self._expected()
+        issue_range = np.arange(len(self._issues))
+        return (expected_weights * expected_evaluations[issue_range, indices]).sum(axis=1)
+
+    def get_value_utilities(self) -> list[np.ndarray]:
+        """
+        Returns the expected utility of every value, weighted with the expected
+        issue weight, per issue (issues in sorted order, values in domain order)
+        """
+        expected_weights, expected_evaluations = self._expected()
+        return [
+            expected_weights[i] * expected_evaluations[i, : len(values)] for i, values in enumerate(self._value_index)
+        ]
+
+    def get_weights(self) -> dict[str, float]:
+        """
+        Returns the expected issue weights of the opponent
+        """
+        expected_weights = self._posterior(self._log_weight_posterior) @ self._weights
+        return {issue: float(weight) for issue, weight in zip(self._issues, expected_weights)}
+
+    def _expected(self) -> tuple[np.ndarray, np.ndarray]:
+        # expected weight of every issue and (issues, values) expected evaluation of every value
+        if len(self._issues) == 0:
+            raise MissingHistoryException()
+        expected_weights = self._posterior(self._log_weight_posterior) @ self._weights
+        expected_evaluations = np.einsum(
+            "ih,ihv->iv", self._posterior(self._log_evaluation_posterior), self._evaluations
+        )
+        return expected_weights, expected_evaluations
+
+    def _to_indices(self, bids: list[Bid]) -> np.ndarray:
+        indices = np.empty((len(bids), len(self._issues)), dtype=np.intp)
+        for row, bid in enumerate(bids):
+            for column, issue in enumerate(self._issues):
+                indices[row, column] = self._value_index[column][bid.getValue(issue)]
+        return indices
+
+    def _weight_hypotheses(self, num_issues: int) -> np.ndarray:
+        # weights follow from a ranking of the issues: rank r (0 is most important)
+        # gets 2 * (n - r) / (n * (n + 1)), so the weights sum to 1
+        rank_weights = 2 * np.arange(num_issues, 0, -1) / (num_issues * (num_issues + 1))
+
+        if factorial(num_issues) <= self.max_weight_hypotheses:
+            rankings = np.array(list(permutations(range(num_issues))))
+        else:
+            rankings = np.array(
+                [self._random.permutation(num_issues) for _ in range(self.max_weight_hypotheses)]
+            )
+        # rankings[h, r] is the issue at rank r
+        weights = np.empty(rankings.shape)
+        np.put_along_axis(weights, rankings, np.broadcast_to(rank_weights, rankings.shape), axis=1)
+        return weights
+
+    def _evaluation_hypotheses(self, num_values: list[int]) -> np.ndarray:
+        # per issue: a triangular shape peaking at each of the values (which covers
+        # uphill and downhill for ordered values), padded with random shapes
+        num_hypotheses = max(self.evaluation_hypotheses, max(num_values))
+        evaluations = np.zeros((len(num_values), num_hypotheses, max(num_values)))
+
+        for issue, n in enumerate(num_values):
+            positions = np.arange(n)
+            for hypothesis in range(num_hypotheses):
+                if hypothesis < n:
+                    distance = np.abs(positions - hypothesis)
+                    shape = 1.0 - distance / max(n - 1, 1)
+                else:
+                    shape = self._random.random(n)
+                    shape /= shape.max()
+                evaluations[issue, hypothesis, :n] = shape
+        return evaluations
+
+    def _log_likelihood(self, utilities: np.ndarray, target: float) -> np.ndarray:
+        return -((utilities - target) ** 2) / (2 * self.sigma**2)
+
+    @staticmethod
+    def _normalise(log_posterior: np.ndarray) -> np.ndarray:
+        # normalise along the last axis in log space, to stay clear of underflow
+        maximum = log_posterior.max(axis=-1, keepdims=True)
+        return log_posterior - (maximum + np.log(np.exp(log_posterior - maximum).sum(axis=-1, keepdims=True)))
+
+    @staticmethod
+    def _posterior(log_posterior: np.ndarray) -> np.ndarray:
+        return np.exp(log_posterior)
@@ -0,0 +1,96 @@
+from decimal import Decimal
+from heapq import heappop, heappush
+from itertools import count, islice
+from typing import Iterator
+
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Value import Value
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+
+class BestFirstBids:
+    """
+    Lazily enumerates the bids of a linear additive profile in descending utility
+    order, without building the full bid space.
+
+    Every issue's values are ranked on their weighted utility, so a bid is a vector
+    of ranks and lowering any rank never increases the utility. Bids are expanded
+    from the best bid (all ranks 0) through a priority queue, where a bid only
+    increments ranks at or after the last issue it incremented itself. That way
+    every bid has exactly one parent and pulling N bids costs O(N * issues * log N),
+    regardless of the size of the space.
+    """
+
+    def __init__(self, profile: LinearAdditive):
+        self._issues: list[str] = sorted(profile.getDomain().getIssues())
+        self._values: list[list[Value]] = []
+        self._utils: list[list[Decimal]] = []
+
+        for issue in self._issues:
+            utils, values = self._rank(profile, issue)
+            self._utils.append(utils)
+            self._values.append(values)
+
+    def update(self, profile: LinearAdditive, issues: list[str]) -> None:
+        """
+        Updates to a profile on the same domain of which only the given issues
+        changed, only those issues are ranked again.
+        """
+        for issue in issues:
+            i = self._issues.index(issue)
+            self._utils[i], self._values[i] = self._rank(profile, issue)
+
+    @staticmethod
+    def _rank(profile: LinearAdditive, issue: str) -> tuple[list[Decimal], list[Value]]:
+        weight = profile.getWeight(issue)
+        issue_utilities = profile.getUtilities()[issue]
+        ranked = sorted(
+            ((weight * issue_utilities.getUtility(value), value) for value in profile.getDomain().getValues(issue)),
+            key=lambda util_value: util_value[0],
+            reverse=True,
+        )
+        return [util for util, _ in ranked], [value for _, value in ranked]
+
+    def __iter__(self) -> Iterator[tuple[Bid, Decimal]]:
+        """
+        Yields (bid, utility) pairs, best bid first.
+        """
+        # the counter breaks ties between equal utilities, so ranks are never compared
+        tiebreak = count()
+        ranks = (0,) * len(self._issues)
+        heap = [(-self._utility(ranks), next(tiebreak), ranks, 0)]
+
+        while heap:
+            neg_utility, _, ranks, pivot = heappop(heap)
+            yield self._to_bid(ranks), -neg_utility
+
+            for i in range(pivot, len(ranks)):
+                if ranks[i] + 1 < len(self._values[i]):
+                    child = ranks[:i] + (ranks[i] + 1,) + ranks[i + 1:]
+                    heappush(heap, (-self._utility(child), next(tiebreak), child, i))
+
+    def getMax(self) -> Decimal:
+        return self._utility((0,) * len(self._issues))
+
+    def top(self, n: int) -> list[Bid]:
+        """
+        @param n the number of bids to return
+        @return the n bids with the highest utility, best first
+        """
+        return [bid for bid, _ in islice(self, n)]
+
+    def above(self, threshold: Decimal) -> Iterator[Bid]:
+        """
+        @param threshold the minimum utility
+        @return all bids with utility of at least threshold, best first
+        """
+        for bid, utility in self:
+            if utility < threshold:
+                return
+            yield bid
+
+    def _utility(self, ranks: tuple[int, ...]) -> Decimal:
+        return sum((utils[rank] for utils, rank in zip(self._utils, ranks)), Decimal(0))
+
+    def _to_bid(self, ranks: tuple[int, ...]) -> Bid:
+        return Bid({issue: values[rank] for issue, values, rank in zip(self._issues, self._values, ranks)})
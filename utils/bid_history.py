@@ -0,0 +1,115 @@
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Domain import Domain
+from geniusweb.issuevalue.Value import Value
+
+from utils.frequency_analyzer import BidIsNoneException
+
+# index of an issue that is missing from a (partial) bid
+MISSING = -1
+
+
+class BidHistory:
+    """
+    History of bids stored as rows of value indices, one column per issue (in
+    sorted order) and the values of an issue numbered in domain order. The values
+    are interned in a table per issue, so a bid costs a few bytes instead of a dict
+    of Value objects.
+
+    Rows are kept in an array that doubles in size when it is full, so appending is
+    O(1) amortised. Slices of the history are read-only views on that array, which
+    opponent models can use without copying (e.g. BayesianOpponentModel uses the
+    same encoding). Rows are only converted back to a Bid on request.
+    """
+
+    def __init__(self, domain: Domain, capacity: int = 64) -> None:
+        self.issues: list[str] = sorted(domain.getIssues())
+        self._values: list[list[Value]] = [list(domain.getValues(issue)) for issue in self.issues]
+        self._value_index: list[dict[Value, int]] = [
+            {value: index for index, value in enumerate(values)} for values in self._values
+        ]
+
+        # the smallest integer type that fits every value index
+        max_values = max((len(values) for values in self._values), default=0)
+        dtype = np.int8 if max_values <= np.iinfo(np.int8).max else np.int16
+        if max_values > np.iinfo(np.int16).max:
+            dtype = np.int32
+
+        self._rows = np.empty((capacity, len(self.issues)), dtype=dtype)
+        self._rounds = np.empty(capacity, dtype=np.int64)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, bid: Bid, round: int | None = None) -> None:
+        """
+        Adds a bid, round defaults to the number of bids before it. Rounds have to
+        be increasing.
+        """
+        if bid is None:
+            raise BidIsNoneException()
+        if self._size == len(self._rows):
+            self._grow()
+
+        for column, issue in enumerate(self.issues):
+            value = bid.getValue(issue)
+            self._rows[self._size, column] = MISSING if value is None else self._value_index[column][value]
+        self._rounds[self._size] = self._size if round is None else round
+        self._size += 1
+
+    def rows(self, start_round: int | None = None, stop_round: int | None = None) -> np.ndarray:
+        """
+        Returns a read-only view on the rows of the bids in [start_round, stop_round)
+        """
+        start, stop = self._range(start_round, stop_round)
+        view = self._rows[start:stop]
+        view.flags.writeable = False
+        return view
+
+    def rounds(self, start_round: int | None = None, stop_round: int | None = None) -> np.ndarray:
+        start, stop = self._range(start_round, stop_round)
+        view = self._rounds[start:stop]
+        view.flags.writeable = False
+        return view
+
+    def value_counts(self, start_round: int | None = None, stop_round: int | None = None) -> list[np.ndarray]:
+        """
+        Returns per issue the number of times every value was offered in [start_round, stop_round)
+        """
+        rows = self.rows(start_round, stop_round)
+        return [
+            np.bincount(rows[:, column][rows[:, column] != MISSING], minlength=len(values))
+            for column, values in enumerate(self._values)
+        ]
+
+    def get_bid(self, index: int) -> Bid:
+        if not -self._size <= index < self._size:
+            raise IndexError(index)
+        row = self._rows[index % self._size]
+        return Bid(
+            {
+                issue: self._values[column][row[column]]
+                for column, issue in enumerate(self.issues)
+                if row[column] != MISSING
+            }
+        )
+
+    def last(self) -> Bid | None:
+        return self.get_bid(-1) if self._size > 0 else None
+
+    def _range(self, start_round: int | None, stop_round: int | None) -> tuple[int, int]:
+        # rounds are increasing, so a range of rounds is a range of rows
+        rounds = self._rounds[: self._size]
+        start = 0 if start_round is None else int(np.searchsorted(rounds, start_round, "left"))
+        stop = self._size if stop_round is None else int(np.searchsorted(rounds, stop_round, "left"))
+        return start, stop
+
+    def _grow(self) -> None:
+        # earlier views keep pointing at the old array, which stays valid for them
+        capacity = max(2 * len(self._rows), 1)
+        rows = np.empty((capacity, self._rows.shape[1]), dtype=self._rows.dtype)
+        rows[: self._size] = self._rows[: self._size]
+        rounds = np.empty(capacity, dtype=self._rounds.dtype)
+        rounds[: self._size] = self._rounds[: self._size]
+        self._rows, self._rounds = rows, rounds
@@ -0,0 +1,101 @@
+from math import exp, log
+
+
+class ConcessionEstimator:
+    """
+    Estimates the opponent's concession strategy from the offers it makes, assuming
+    the time dependent family of TimeDependentAgent:
+
+        u(t) = max - (max - reservation) * t^(1/e)
+
+    where u(t) is the opponent's (modelled) utility of its offer at progress t. Taking
+    log(max - u(t)) = log(max - reservation) + (1/e) * log(t) makes this a linear
+    regression, which is fitted from running sums. Offers are weighted with
+    (max - u)^2, so noise on offers close to max is not blown up by the logarithm.
+    Adding an offer and reading the estimate are both O(1), no matter how many offers
+    were received.
+    """
+
+    def __init__(
+        self,
+        max_utility: float = 1.0,
+        decay: float = 1.0,
+        min_concession: float = 0.1,
+        epsilon: float = 1e-6,
+    ) -> None:
+        """
+        Args:
+            max_utility (float): utility the opponent starts conceding from.
+            decay (float): factor with which older offers are forgotten every offer, 1.0
+                keeps all offers. Useful when the modelled utilities still change.
+            min_concession (float): an opponent that concedes less than this by the
+                deadline is considered a hardliner (e = 0).
+            epsilon (float): offers closer than this to max_utility or t = 0 are clipped,
+                since their logarithm is undefined.
+        """
+        self.max_utility = max_utility
+        self.decay = decay
+        self.min_concession = min_concession
+        self.epsilon = epsilon
+
+        # running weighted sums of the regression log(max - u) = a + b * log(t)
+        self._count = 0
+        self._n = 0.0
+        self._sum_x = 0.0
+        self._sum_y = 0.0
+        self._sum_xx = 0.0
+        self._sum_xy = 0.0
+
+    def add_offer(self, progress: float, utility: float) -> None:
+        conceded = max(self.max_utility - utility, self.epsilon)
+        x = log(max(progress, self.epsilon))
+        y = log(conceded)
+        w = conceded**2
+
+        self._count += 1
+        self._n = self.decay * self._n + w
+        self._sum_x = self.decay * self._sum_x + w * x
+        self._sum_y = self.decay * self._sum_y + w * y
+        self._sum_xx = self.decay * self._sum_xx + w * x * x
+        self._sum_xy = self.decay * self._sum_xy + w * x * y
+
+    def get_e(self) -> float | None:
+        """
+        Returns the estimated concession speed e (< 1 Boulware, > 1 Conceder), or None
+        if there are not enough offers to tell
+        """
+        slope = self._slope()
+        if slope is None:
+            return None
+        reservation = self.get_reservation()
+        # no concession by the deadline (or even a rising curve) means a hardliner
+        if slope <= 0 or reservation is None or self.max_utility - reservation < self.min_concession:
+            return 0.0
+        return 1 / slope
+
+    def get_reservation(self) -> float | None:
+        """
+        Returns the estimated utility the opponent will concede to at the deadline, or
+        None if there are not enough offers to tell
+        """
+        slope = self._slope()
+        if slope is None:
+            return None
+        # the fitted curve at t = 1 is exp(intercept) below max
+        intercept = (self._sum_y - slope * self._sum_x) / self._n
+        return self.max_utility - exp(intercept)
+
+    def is_boulware(self) -> bool:
+        e = self.get_e()
+        return e is not None and e < 1.0
+
+    def is_conceder(self) -> bool:
+        e = self.get_e()
+        return e is not None and e > 1.0
+
+    def _slope(self) -> float | None:
+        denominator = self._n * self._sum_xx - self._sum_x * self._sum_x
+        # relative to the total weight, since the weights can be tiny for a hardliner
+        if self._count < 2 or denominator <= self.epsilon * self._n**2:
+            return None
+        return (self._n * self._sum_xy - self._sum_x * self._sum_y) / denominator
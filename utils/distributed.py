@@ -0,0 +1,103 @@
+import os
+import socket
+from threading import Event, Thread
+from time import sleep
+
+from utils.runners import (_run_sessions, create_tournament, error_summary, load_cached_results,
+                           prepare_outputs, write_cached_outputs)
+from utils.work_queue import DirectoryQueue
+
+
+def run_coordinator(tournament_settings: dict) -> tuple[list, list]:
+    """
+    Runs a tournament through the work queue in tournament_settings["queue"]: the
+    sessions are published, workers (run_worker.py, on any host that sees the
+    queue directory) run them, and sessions of workers that stopped renewing
+    their lease are published again.
+
+    "cache", "traces_dir" and "results_db" work as in run_tournament: cached
+    sessions are not published, and the workers cache the sessions they play and
+    write their traces and database rows, so those paths have to be reachable
+    from every worker (like the queue).
+    """
+    queue = DirectoryQueue(tournament_settings["queue"])
+    lease_seconds = tournament_settings.get("lease_seconds", 60)
+    poll_seconds = tournament_settings.get("poll_seconds", 1)
+
+    tournament = create_tournament(tournament_settings)
+    results_summaries = load_cached_results(tournament_settings, tournament)
+    pending = [index for index, summary in enumerate(results_summaries) if summary is None]
+    traces_dir, results_db = prepare_outputs(tournament_settings)
+    write_cached_outputs(tournament_settings, tournament, results_summaries, traces_dir, results_db)
+    cache = tournament_settings.get("cache")
+
+    queue.clear()
+    for index in pending:
+        task = {
+            "index": index,
+            "settings": tournament[index],
+            "traces_dir": traces_dir,
+            "results_db": results_db,
+            "cache": cache,
+        }
+        queue.publish(f"{index:06d}", task)
+
+    while queue.count_done() < len(pending):
+        for task_id in queue.requeue_expired(lease_seconds):
+            print(f"session {task_id} lost its worker, requeued")
+        sleep(poll_seconds)
+    queue.close()
+
+    results = queue.results()
+    for index in pending:
+        results_summaries[index] = results[f"{index:06d}"]
+
+    return tournament, results_summaries
+
+
+def run_worker(queue_path: str, lease_seconds: float = 60, poll_seconds: float = 1) -> int:
+    """
+    Claims and runs sessions from the work queue until the coordinator closes it.
+    The lease of a session is renewed while it runs. A session that fails is
+    completed with an ERROR summary, so neither this worker nor the run stops on
+    it. Returns the number of sessions this worker ran.
+    """
+    queue = DirectoryQueue(queue_path)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    num_sessions = 0
+
+    # a run that was closed before this worker started is an earlier one, wait for
+    # the next run to close instead
+    earlier_run = queue.closed_run()
+    while queue.closed_run() in (None, earlier_run):
+        claimed = queue.claim()
+        if claimed is None:
+            sleep(poll_seconds)
+            continue
+        task_id, task = claimed
+
+        # renew the lease well before it runs out
+        done = Event()
+        heartbeat = Thread(target=_renew, args=(queue, task_id, lease_seconds / 3, done), daemon=True)
+        heartbeat.start()
+        try:
+            results_db = tuple(task["results_db"]) if task["results_db"] is not None else None
+            [(_, results_summary, _)] = _run_sessions(
+                [(task["index"], task["settings"])], task["traces_dir"], results_db, task.get("cache")  # type:ignore
+            )
+        except Exception as e:
+            results_summary = error_summary(task["settings"], repr(e))
+        finally:
+            done.set()
+            heartbeat.join()
+
+        results_summary["worker"] = worker
+        queue.complete(task_id, results_summary)
+        num_sessions += 1
+
+    return num_sessions
+
+
+def _renew(queue: DirectoryQueue, task_id: str, interval: float, done: Event) -> None:
+    while not done.wait(interval):
+        queue.renew(task_id)
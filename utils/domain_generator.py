@@ -0,0 +1,217 @@
+import json
+import os
+from decimal import Decimal
+from random import Random
+from typing import IO
+
+# utilities in the shipped profiles are written with 5 decimals
+PRECISION = Decimal("0.00001")
+
+
+def generate_domain(
+    directory: str,
+    name: str,
+    num_values: list[int],
+    opposition: float = 0.5,
+    reservation: float | None = None,
+    seed: int | None = None,
+) -> None:
+    """Writes a synthetic domain, a pair of LinearAdditiveUtilitySpace profiles and
+    the matching specials.json to directory, using the same layout as domains/domainXX.
+
+    Args:
+        directory (str): directory to write to, created if it does not exist.
+        name (str): name of the domain, the domain file will be called <name>.json.
+        num_values (list[int]): number of values of every issue, the domain has
+            prod(num_values) bids.
+        opposition (float): 0.0 gives two independent random profiles, 1.0 gives
+            fully opposed profiles (what is good for A is bad for B).
+        reservation (float | None): target utility of the reservation bid of both
+            profiles. No reservation bid is written if None.
+        seed (int | None): seed of the random generator for reproducible domains.
+    """
+    assert len(num_values) > 0 and all(n > 1 for n in num_values)
+    assert 0.0 <= opposition <= 1.0
+    assert reservation is None or 0.0 <= reservation <= 1.0
+
+    random = Random(seed)
+    issues = [f"issue{_letters(i)}" for i in range(len(num_values))]
+    values = {issue: [f"value{_letters(j)}" for j in range(n)] for issue, n in zip(issues, num_values)}
+
+    # profile A is random, profile B is a mix of a random profile and the inverse of A.
+    # Issue weights are mixed with A's weights instead, because opposed agents care
+    # about the same issues.
+    weights_a = _normalise_weights([random.random() for _ in issues])
+    weights_b = _normalise_weights(
+        [opposition * float(w) + (1 - opposition) * random.random() for w in weights_a]
+    )
+    utilities_a: dict[str, list[Decimal]] = {}
+    utilities_b: dict[str, list[Decimal]] = {}
+    for issue in issues:
+        utils_a = _normalise_utilities([random.random() for _ in values[issue]])
+        utils_b = _normalise_utilities(
+            [opposition * (1 - float(u)) + (1 - opposition) * random.random() for u in utils_a]
+        )
+        utilities_a[issue] = utils_a
+        utilities_b[issue] = utils_b
+
+    domain = {"name": name, "issuesValues": {issue: {"values": values[issue]} for issue in issues}}
+    profiles = {
+        "profileA": (weights_a, utilities_a),
+        "profileB": (weights_b, utilities_b),
+    }
+
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    with open(os.path.join(directory, f"{name}.json"), "w") as f:
+        f.write(json.dumps(domain, indent=2))
+
+    for profile_name, (weights, utilities) in profiles.items():
+        profile = {
+            "issueUtilities": {
+                issue: {
+                    "DiscreteValueSetUtilities": {
+                        "valueUtilities": {
+                            value: float(util) for value, util in zip(values[issue], utilities[issue])
+                        }
+                    }
+                }
+                for issue in issues
+            },
+            "issueWeights": {issue: float(weight) for issue, weight in zip(issues, weights)},
+            "domain": domain,
+            "name": profile_name,
+        }
+        if reservation is not None:
+            bid = _find_bid_near(random, weights, utilities, issues, reservation)
+            profile["reservationBid"] = {
+                "issuevalues": {issue: values[issue][index] for issue, index in zip(issues, bid)}
+            }
+
+        with open(os.path.join(directory, f"{profile_name}.json"), "w") as f:
+            f.write(json.dumps({"LinearAdditiveUtilitySpace": profile}, indent=2))
+
+    # weighted utilities per issue value for both profiles, used to find the specials
+    weighted = [
+        [
+            (float(w_a * u_a), float(w_b * u_b))
+            for u_a, u_b in zip(utilities_a[issue], utilities_b[issue])
+        ]
+        for issue, w_a, w_b in zip(issues, weights_a, weights_b)
+    ]
+    with open(os.path.join(directory, "specials.json"), "w") as f:
+        _write_specials(f, pareto_front(weighted), issues, values)
+
+
+def pareto_front(weighted: list[list[tuple[float, float]]]) -> list[tuple[float, float, tuple[int, ...]]]:
+    """Computes the Pareto front of an additive two-profile bid space without
+    enumerating it. The front of a sum of independent issues is a subset of the
+    front of the sums of the fronts, so the issues are merged one at a time.
+
+    Args:
+        weighted (list[list[tuple[float, float]]]): per issue, per value the weighted
+            utility for both profiles.
+
+    Returns:
+        list[tuple[float, float, tuple[int, ...]]]: points (utility A, utility B,
+            value indices) of the front, sorted on utility A.
+    """
+    front: list[tuple[float, float, tuple[int, ...]]] = [(0.0, 0.0, ())]
+    for issue_values in weighted:
+        candidates = [
+            (u_a + v_a, u_b + v_b, indices + (index,))
+            for u_a, u_b, indices in front
+            for index, (v_a, v_b) in enumerate(issue_values)
+        ]
+        front = _non_dominated(candidates)
+    return front
+
+
+def _non_dominated(points: list[tuple[float, float, tuple[int, ...]]]) -> list[tuple[float, float, tuple[int, ...]]]:
+    # sweep from high to low utility A, keeping points that improve utility B
+    points.sort(key=lambda p: (-p[0], -p[1]))
+    front = []
+    best_b = float("-inf")
+    for point in points:
+        if point[1] > best_b:
+            front.append(point)
+            best_b = point[1]
+    front.reverse()
+    return front
+
+
+def _write_specials(
+    f: IO[str],
+    front: list[tuple[float, float, tuple[int, ...]]],
+    issues: list[str],
+    values: dict[str, list[str]],
+) -> None:
+    # the Pareto front can get large, so it is streamed to the file point by point
+    def to_special(point: tuple[float, float, tuple[int, ...]]) -> dict:
+        u_a, u_b, indices = point
+        return {
+            "bid": {issue: values[issue][index] for issue, index in zip(issues, indices)},
+            "utility": [u_a, u_b],
+        }
+
+    nash = max(front, key=lambda p: p[0] * p[1])
+    kalai = max(front, key=lambda p: min(p[0], p[1]))
+
+    f.write("{\n")
+    f.write(f'  "nash": {_indent(json.dumps(to_special(nash), indent=2))},\n')
+    f.write(f'  "kalai": {_indent(json.dumps(to_special(kalai), indent=2))},\n')
+    f.write('  "pareto_front": [\n')
+    for i, point in enumerate(front):
+        separator = ",\n" if i < len(front) - 1 else "\n"
+        f.write("    " + _indent(json.dumps(to_special(point), indent=2), 4) + separator)
+    f.write("  ]\n}")
+
+
+def _find_bid_near(
+    random: Random,
+    weights: list[Decimal],
+    utilities: dict[str, list[Decimal]],
+    issues: list[str],
+    target: float,
+    attempts: int = 1000,
+) -> tuple[int, ...]:
+    # sampling keeps this independent of the size of the bid space
+    best_bid: tuple[int, ...] = ()
+    best_distance = float("inf")
+    for _ in range(attempts):
+        bid = tuple(random.randrange(len(utilities[issue])) for issue in issues)
+        utility = sum(float(w * utilities[issue][i]) for w, issue, i in zip(weights, issues, bid))
+        if abs(utility - target) < best_distance:
+            best_bid, best_distance = bid, abs(utility - target)
+    return best_bid
+
+
+def _normalise_weights(raw: list[float]) -> list[Decimal]:
+    # weights have to sum to exactly 1, so the rounding error goes to the last issue
+    total = sum(raw)
+    weights = [(Decimal(x / total)).quantize(PRECISION) for x in raw[:-1]]
+    weights.append(Decimal(1) - sum(weights))
+    return weights
+
+
+def _normalise_utilities(raw: list[float]) -> list[Decimal]:
+    # the best value of every issue has utility 1.0, like in the shipped profiles
+    low, high = min(raw), max(raw)
+    span = high - low if high > low else 1.0
+    return [Decimal((x - low) / span).quantize(PRECISION) for x in raw]
+
+
+def _letters(index: int) -> str:
+    # A, B, ..., Z, AA, AB, ... like spreadsheet columns
+    name = ""
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(ord("A") + remainder) + name
+    return name
+
+
+def _indent(text: str, level: int = 2) -> str:
+    return text.replace("\n", "\n" + " " * level)
+
@@ -9,16 +9,49 @@ class FrequencyAnalyzer:
         self.domain: Domain
 
         self.frequency_table: dict[str, tuple[float, dict[Value, float], int]] = {}
+        # number of times every value was offered, e.g. to store for later sessions
+        self.value_counts: dict[str, dict[Value, int]] = {}
+        # table to start from instead of the first bid, see warm_start
+        self.prior: dict[str, tuple[float, dict[Value, float], int]] = {}
 
     def set_domain(self, domain: Domain):
         self.domain = domain
 
+    def warm_start(self, knowledge: dict[str, tuple[float, dict[str, float]]], strength: int = 5) -> None:
+        """
+        Start from the issue weights and value counts of earlier sessions (see
+        utils.knowledge_store) instead of from scratch. strength is the number of bids
+        the prior counts for.
+        """
+        for issue in self.domain.getIssues():
+            if issue not in knowledge:
+                continue
+            weight, counts = knowledge[issue]
+            values = {str(value.getValue()): value for value in self.domain.getValues(issue)}
+            max_count = max(counts.values(), default=0.0)
+            if max_count <= 0:
+                continue
+
+            value_freqs = {value: 0.0 for value in values.values()}
+            for value, count in counts.items():
+                if value in values:
+                    value_freqs[values[value]] = count / max_count
+            self.prior[issue] = (weight, value_freqs, strength)
+
     def _init_table(self) -> None:
         if self.last_bid is None:
             raise MissingHistoryException()
 
         issues = self.domain.getIssues()
 
+        if len(self.prior) == len(issues):
+            # start from the prior and add the first bid like any other
+            for issue, (freq, value_freqs, value_max_occurence) in self.prior.items():
+                self.frequency_table[issue] = (freq, dict(value_freqs), value_max_occurence)
+            for issue in issues:
+                self._update_issue_value_frequency(self.last_bid.getValue(issue), issue)
+            return
+
         # init frequency table
         for issue in issues:
             values = self.domain.getValues(issue)
@@ -89,6 +122,12 @@ class FrequencyAnalyzer:
 
         self.number_bids += 1
 
+        for issue in self.domain.getIssues():
+            value = bid.getValue(issue)
+            if value is not None:
+                counts = self.value_counts.setdefault(issue, {})
+                counts[value] = counts.get(value, 0) + 1
+
         if self.last_bid is None:
             self.last_bid = bid
             self._init_table()
@@ -112,6 +151,17 @@ class FrequencyAnalyzer:
 
         return max_key
 
+    """
+    Returns the issue weights and value counts of this session, in the format of
+    utils.knowledge_store
+    """
+    def get_knowledge(self) -> dict[str, tuple[float, dict[str, float]]]:
+        knowledge: dict[str, tuple[float, dict[str, float]]] = {}
+        for issue, (freq, _, _) in self.frequency_table.items():
+            counts = self.value_counts.get(issue, {})
+            knowledge[issue] = (freq, {str(value.getValue()): float(count) for value, count in counts.items()})
+        return knowledge
+
     """
     Returns an approximation of the opponents utility for the given bid
     """
@@ -130,6 +180,21 @@ class FrequencyAnalyzer:
 
         return utility
 
+    """
+    Returns the approximated utility of every value, weighted with the importance of
+    its issue, per issue (issues in sorted order, values in domain order)
+    """
+    def get_value_utilities(self) -> list[list[float]]:
+        if len(self.frequency_table) == 0:
+            raise MissingHistoryException()
+
+        utilities: list[list[float]] = []
+        for issue in sorted(self.domain.getIssues()):
+            freq, value_freqs, _ = self.frequency_table[issue]
+            utilities.append([freq * value_freqs[value] for value in self.domain.getValues(issue)])
+
+        return utilities
+
     """
     Return a list of issues and the difference in their importance [0.0, 1.0]
     The higher the number, the better the compatibility
@@ -0,0 +1,105 @@
+import sqlite3
+from contextlib import contextmanager
+from threading import Lock, Thread
+from typing import Iterator
+
+# issue -> (weight, value -> number of times the opponent offered it)
+Knowledge = dict[str, tuple[float, dict[str, float]]]
+
+# writes that have not finished yet, shared by all agents in this process so the
+# Learn phase can wait for the writes of the sessions before it
+_pending: list[Thread] = []
+_pending_lock = Lock()
+
+
+class KnowledgeStore:
+    """
+    File backed (SQLite) store of what was learned about opponents in earlier
+    sessions, keyed by opponent class and domain.
+
+    Sessions are aggregated on write: issue weights are averaged over the sessions
+    and value counts are summed, so a lookup returns one row per issue value no
+    matter how many sessions were played. Both tables have (domain, opponent) as
+    the leading columns of their primary key, so loading a domain is an index lookup.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with self._connect() as connection:
+            connection.execute(
+                """CREATE TABLE IF NOT EXISTS issue_weights (
+                    domain TEXT, opponent TEXT, issue TEXT, weight REAL, sessions INTEGER,
+                    PRIMARY KEY (domain, opponent, issue))"""
+            )
+            connection.execute(
+                """CREATE TABLE IF NOT EXISTS value_counts (
+                    domain TEXT, opponent TEXT, issue TEXT, value TEXT, count REAL,
+                    PRIMARY KEY (domain, opponent, issue, value))"""
+            )
+
+    def load(self, domain: str) -> dict[str, Knowledge]:
+        """
+        Returns the aggregated knowledge of every opponent seen on the given domain
+        """
+        knowledge: dict[str, Knowledge] = {}
+        with self._connect() as connection:
+            for opponent, issue, weight in connection.execute(
+                "SELECT opponent, issue, weight FROM issue_weights WHERE domain = ?", (domain,)
+            ):
+                knowledge.setdefault(opponent, {})[issue] = (weight, {})
+            for opponent, issue, value, count in connection.execute(
+                "SELECT opponent, issue, value, count FROM value_counts WHERE domain = ?", (domain,)
+            ):
+                if opponent in knowledge and issue in knowledge[opponent]:
+                    knowledge[opponent][issue][1][value] = count
+        return knowledge
+
+    def save(self, opponent: str, domain: str, knowledge: Knowledge) -> None:
+        """
+        Adds the knowledge of one session to the aggregate of this opponent and domain
+        """
+        with self._connect() as connection:
+            for issue, (weight, value_counts) in knowledge.items():
+                connection.execute(
+                    """INSERT INTO issue_weights VALUES (?, ?, ?, ?, 1)
+                    ON CONFLICT (domain, opponent, issue) DO UPDATE SET
+                        weight = (weight * sessions + excluded.weight) / (sessions + 1),
+                        sessions = sessions + 1""",
+                    (domain, opponent, issue, weight),
+                )
+                connection.executemany(
+                    """INSERT INTO value_counts VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (domain, opponent, issue, value) DO UPDATE SET
+                        count = count + excluded.count""",
+                    [(domain, opponent, issue, value, count) for value, count in value_counts.items()],
+                )
+
+    def save_async(self, opponent: str, domain: str, knowledge: Knowledge) -> Thread:
+        """
+        Saves in a background thread, so the agent does not wait on the disk.
+        flush waits for all writes that are still pending.
+        """
+        thread = Thread(target=self.save, args=(opponent, domain, knowledge))
+        with _pending_lock:
+            _pending.append(thread)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def flush() -> None:
+        with _pending_lock:
+            threads = list(_pending)
+            _pending.clear()
+        for thread in threads:
+            thread.join()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # a connection per call, since connections can not be shared between threads;
+        # the timeout lets concurrent writers wait on each other
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
@@ -0,0 +1,143 @@
+import gc
+import os
+import tracemalloc
+from collections import defaultdict
+from statistics import mean
+
+from utils.party_hooks import party_hooks
+
+
+class MemoryTracker:
+    """
+    Tracks the memory allocated during a session with tracemalloc. Besides the
+    peak and the memory that is still allocated after the session (residual), it
+    attributes the allocations to the party that was acting (as WallTimeTracker
+    does for time) and to the source files that allocated them.
+
+        with MemoryTracker(agents) as tracker:
+            runner.run()
+        tracker.get_report()
+
+    tracemalloc also counts what other threads allocate meanwhile, so the session
+    should be the only thing running in the process (see utils.service).
+    """
+
+    def __init__(self, agents: list[str], top: int = 10) -> None:
+        self._agents = agents
+        self._top = top
+        self._hooks = None
+        self._started_tracing = False
+        self._before: tracemalloc.Snapshot = None  # type:ignore
+        self._after: tracemalloc.Snapshot = None  # type:ignore
+        self._baseline = 0
+        self._interval_start = 0
+        self._peak = 0
+        self._acting: str | None = None
+        # per party, the highest memory above the baseline and the net allocation
+        self._party_peak: dict[str, int] = defaultdict(int)
+        self._party_net: dict[str, int] = defaultdict(int)
+
+    def __enter__(self) -> "MemoryTracker":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        gc.collect()
+        self._before = tracemalloc.take_snapshot()
+        self._baseline = self._interval_start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+        self._hooks = party_hooks(self._agents, self._enter, self._exit)
+        self._hooks.__enter__()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._hooks.__exit__(*exc_info)
+        self._close_interval()
+
+        # what is left after collecting garbage is retained by the session
+        gc.collect()
+        self._after = tracemalloc.take_snapshot()
+        self._residual = tracemalloc.get_traced_memory()[0] - self._baseline
+        if self._started_tracing:
+            tracemalloc.stop()
+
+    def get_report(self) -> dict:
+        # allocations that are still there after the session, per source file
+        filters = (tracemalloc.Filter(False, tracemalloc.__file__),)
+        differences = self._after.filter_traces(filters).compare_to(
+            self._before.filter_traces(filters), "filename"
+        )
+        differences.sort(key=lambda d: d.size_diff, reverse=True)
+
+        return {
+            "peak": self._peak,
+            "residual": self._residual,
+            "parties": {
+                party: {"peak": self._party_peak[party], "net": self._party_net[party]}
+                for party in self._party_net
+            },
+            "top_allocations": [
+                [_short_path(d.traceback[0].filename), d.size_diff]
+                for d in differences[: self._top]
+                if d.size_diff > 0
+            ],
+        }
+
+    def _enter(self, party: str) -> None:
+        self._close_interval()
+        self._acting = party
+
+    def _exit(self, party: str) -> None:
+        self._close_interval()
+        self._acting = None
+
+    def _close_interval(self) -> None:
+        # attribute the memory since the last party event to the party that was acting
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        self._peak = max(self._peak, peak - self._baseline)
+        if self._acting is not None:
+            self._party_peak[self._acting] = max(self._party_peak[self._acting], peak - self._baseline)
+            self._party_net[self._acting] += current - self._interval_start
+        self._interval_start = current
+
+
+def find_memory_growth(results_summaries: list[dict], threshold: int = 1 << 20) -> dict:
+    """
+    Flags sessions that retained more than threshold bytes after they finished,
+    and agents that kept more than threshold bytes allocated (net) in most of
+    the sessions they played. Memory that is retained session after session
+    keeps growing over a tournament.
+    """
+    sessions = [
+        index
+        for index, summary in enumerate(results_summaries)
+        if summary.get("memory_residual", 0) > threshold
+    ]
+
+    # net allocation of every agent per session, found by the position of the agent
+    net: dict[str, list[int]] = defaultdict(list)
+    for summary in results_summaries:
+        for key, value in summary.items():
+            if key.startswith("memory_net_"):
+                net[summary[f"agent_{key[len('memory_net_'):]}"]].append(value)
+
+    agents = {
+        agent: {
+            "sessions": len(values),
+            "growing_sessions": sum(1 for v in values if v > threshold),
+            "mean_net": mean(values),
+        }
+        for agent, values in net.items()
+    }
+    for report in agents.values():
+        report["flagged"] = report["growing_sessions"] > report["sessions"] / 2
+
+    return {"threshold": threshold, "sessions": sessions, "agents": agents}
+
+
+def _short_path(filename: str) -> str:
+    # path within the installed package or within the repository
+    if "site-packages" in filename:
+        return filename.split("site-packages" + os.sep, 1)[-1]
+    return os.path.relpath(filename)
@@ -0,0 +1,162 @@
+import os
+import sys
+import zipfile
+from threading import Condition, Lock
+from typing import Any
+
+import numpy as np
+
+# models by path, with the modification time of their file; shared by all
+# sessions (and agents) in this process
+_models: dict[str, tuple[float, Any]] = {}
+_servers: dict[tuple[str, float], "ModelServer"] = {}
+_lock = Lock()
+
+
+def limit_threads(threads: int) -> None:
+    """
+    Limits the threads numerical libraries use for inference in this process, so
+    a pool of tournament workers does not oversubscribe the cores. The
+    environment variables cover libraries that are not imported yet, the
+    libraries that are imported are limited directly.
+    """
+    for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "TF_NUM_INTRAOP_THREADS"):
+        os.environ[variable] = str(threads)
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+
+        threadpool_limits(threads)
+    except ImportError:
+        pass
+
+
+def load_model(path: str) -> Any:
+    """
+    Loads a model once per process (again when the file changes). The format
+    follows from the extension: .joblib/.pkl (scikit-learn), .pt (torch) or
+    .h5/.keras (keras). These libraries are optional, they are imported only when
+    a model of their format is loaded.
+    """
+    modified = os.path.getmtime(path)
+    with _lock:
+        if path in _models and _models[path][0] == modified:
+            return _models[path][1]
+
+        extension = os.path.splitext(path)[1]
+        if extension in (".joblib", ".pkl"):
+            import joblib
+
+            model = joblib.load(path)
+        elif extension == ".pt":
+            import torch
+
+            model = torch.jit.load(path) if _is_torchscript(path) else torch.load(path)
+            model.eval()
+        elif extension in (".h5", ".keras"):
+            from tensorflow import keras
+
+            model = keras.models.load_model(path)
+        else:
+            raise ValueError(f"unknown model format: {path}")
+
+        _models[path] = (modified, model)
+        return model
+
+
+def predict(model: Any, features: np.ndarray) -> np.ndarray:
+    """
+    Returns one score per row of features: the probability of the positive class
+    for classifiers, the output otherwise
+    """
+    if "torch" in sys.modules and isinstance(model, sys.modules["torch"].nn.Module):
+        torch = sys.modules["torch"]
+        with torch.no_grad():
+            return model(torch.from_numpy(features).float()).numpy().reshape(len(features), -1)[:, -1]
+    if hasattr(model, "predict_proba"):
+        return model.predict_proba(features)[:, -1]
+    return np.asarray(model.predict(features)).reshape(len(features), -1)[:, -1]
+
+
+class ModelServer:
+    """
+    Serves one model to every agent in this process, use get_model_server to get
+    the shared instance. Agents pass all rows of a turn at once (e.g. every
+    candidate bid), so a turn costs one call into the model.
+
+    Sessions that run concurrently in this process (threads, e.g. the negotiation
+    service with threads > 1) can also share calls: with max_wait > 0 a call waits
+    that many seconds for the calls of other threads and runs them as one batch
+    (agent parameter "model_max_wait"). Sessions in a tournament worker run one
+    after the other, so there it is best left at 0.
+    """
+
+    def __init__(self, path: str, max_wait: float = 0.0, max_batch: int = 4096) -> None:
+        self.path = path
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self._condition = Condition()
+        # features of the calls that wait for the next batch, and their results
+        self._queue: list[tuple[int, np.ndarray]] = []
+        self._results: dict[int, np.ndarray | Exception] = {}
+        self._next_call = 0
+        self._running = False
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        features = np.asarray(features, dtype=np.float32)
+        if self.max_wait <= 0:
+            return predict(load_model(self.path), features)
+
+        with self._condition:
+            call = self._next_call
+            self._next_call += 1
+            self._queue.append((call, features))
+            self._condition.notify_all()
+
+            # the first call to find no batch running runs the next one
+            while call not in self._results:
+                if self._running:
+                    self._condition.wait()
+                    continue
+                self._running = True
+                self._condition.wait_for(lambda: sum(len(f) for _, f in self._queue) >= self.max_batch, self.max_wait)
+                batch, self._queue = self._queue, []
+                self._condition.release()
+                try:
+                    scores = predict(load_model(self.path), np.concatenate([f for _, f in batch]))
+                    results = np.split(scores, np.cumsum([len(f) for _, f in batch])[:-1])
+                except Exception as e:
+                    # every call of the batch gets the error
+                    results = [e] * len(batch)
+                finally:
+                    self._condition.acquire()
+                    self._running = False
+                for (batch_call, _), result in zip(batch, results):
+                    self._results[batch_call] = result
+                self._condition.notify_all()
+
+            result = self._results.pop(call)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+
+def get_model_server(path: str, max_wait: float = 0.0) -> ModelServer:
+    """
+    Returns the server of the model at path shared by the agents in this process
+    that use the same max_wait
+    """
+    with _lock:
+        if (path, max_wait) not in _servers:
+            _servers[(path, max_wait)] = ModelServer(path, max_wait)
+        return _servers[(path, max_wait)]
+
+
+def _is_torchscript(path: str) -> bool:
+    # TorchScript archives hold a "constants.pkl" next to the code
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return any(name.endswith("constants.pkl") for name in archive.namelist())
+    except zipfile.BadZipFile:
+        return False
@@ -0,0 +1,243 @@
+from decimal import Decimal
+from heapq import heappop, heappush
+from itertools import count
+from typing import Iterator
+
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Value import Value
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+
+class NearestBids:
+    """
+    Finds the bids nearest to a given bid (e.g. the last offer of the opponent)
+    under the issue weighted Hamming distance, the summed weight of the issues on
+    which two bids differ, among the bids with at least a minimum own utility.
+    Works on a linear additive profile without building the bid space.
+
+    Every issue's values are ranked on their weighted utility, as in BestFirstBids.
+    Sets of issues to change are visited in increasing distance; a set is skipped
+    when even the best other values of its issues do not reach the minimum
+    utility, otherwise its bids are enumerated best first over the ranked values
+    until they drop below it. The sets are generated as a tree: a subtree is left
+    out when even changing all its issues that can gain utility does not reach the
+    minimum, and subtrees are visited in order of a lower bound of the distance
+    their sets need to reach it (as if parts of an issue could be changed, a
+    fractional knapsack).
+
+    Reaching a minimum from a bad bid is a knapsack problem: when every issue
+    gains about as much utility as it adds distance (e.g. from the worst bid
+    under our own weights) the bound prunes little and the number of sets nearer
+    than the answer grows exponentially with the issues. A query therefore visits
+    at most max_sets sets, after which the remaining bids come from greedy sets
+    (issues that gain the most per distance first) and may not be the nearest.
+    Apart from the bids it returns, a query costs about
+    O(issues^2 log issues + sets visited * issues).
+    """
+
+    def __init__(self, profile: LinearAdditive):
+        self._issues: list[str] = sorted(profile.getDomain().getIssues())
+        self._weights: list[float] = []
+        self._values: list[list[Value]] = []
+        self._utils: list[list[Decimal]] = []
+
+        for issue in self._issues:
+            utils, values = self._rank(profile, issue)
+            self._weights.append(float(profile.getWeight(issue)))
+            self._utils.append(utils)
+            self._values.append(values)
+
+    def update(self, profile: LinearAdditive, issues: list[str]) -> None:
+        """
+        Updates to a profile on the same domain of which only the given issues
+        changed, only those issues are ranked again.
+        """
+        for issue in issues:
+            i = self._issues.index(issue)
+            self._weights[i] = float(profile.getWeight(issue))
+            self._utils[i], self._values[i] = self._rank(profile, issue)
+
+    @staticmethod
+    def _rank(profile: LinearAdditive, issue: str) -> tuple[list[Decimal], list[Value]]:
+        weight = profile.getWeight(issue)
+        issue_utilities = profile.getUtilities()[issue]
+        ranked = sorted(
+            ((weight * issue_utilities.getUtility(value), value) for value in profile.getDomain().getValues(issue)),
+            key=lambda util_value: util_value[0],
+            reverse=True,
+        )
+        return [util for util, _ in ranked], [value for _, value in ranked]
+
+    def nearest(
+        self,
+        bid: Bid,
+        k: int = 1,
+        min_utility: Decimal = Decimal(0),
+        weights: dict[str, float] | None = None,
+        max_sets: int = 10_000,
+    ) -> list[Bid]:
+        """
+        @param bid         the bid to search around, every issue has to have a value
+        @param k           the number of bids to return
+        @param min_utility the minimum own utility of the returned bids
+        @param weights     the weight of every issue in the distance, defaults to
+                           our own issue weights (e.g. pass the estimated weights
+                           of the opponent to stay close in its terms)
+        @param max_sets    the maximum number of sets of issues to visit, after
+                           which the remaining bids are found greedily
+        @return up to k bids with utility of at least min_utility, nearest first
+                (except for the bids found greedily, which come last)
+        """
+        return [found for found, _, _ in self._search(bid, k, min_utility, weights, max_sets)]
+
+    def _search(
+        self, bid: Bid, k: int, min_utility: Decimal, weights: dict[str, float] | None, max_sets: int
+    ) -> Iterator[tuple[Bid, float, Decimal]]:
+        issue_weights = self._weights if weights is None else [float(weights[issue]) for issue in self._issues]
+        # rank of the value of bid per issue, and the utility if it is kept
+        ranks = [values.index(bid.getValue(issue)) for issue, values in zip(self._issues, self._values)]
+        kept = [utils[rank] for utils, rank in zip(self._utils, ranks)]
+        # per issue the utilities of the other values, best first
+        others = [utils[:rank] + utils[rank + 1 :] for utils, rank in zip(self._utils, ranks)]
+
+        if sum((utils[0] for utils in self._utils), Decimal(0)) < min_utility:
+            return
+        yielded: set[Bid] = set()
+        base = sum(kept, Decimal(0))
+        if base >= min_utility:
+            yielded.add(bid)
+            yield bid, 0.0, base
+        if len(yielded) >= k:
+            return
+
+        # sets of changed issues in increasing distance: with the issues sorted on
+        # weight, a set with last position p has the children "also change p + 1"
+        # and "change p + 1 instead of p", so every set has one parent, and its
+        # subtree holds the sets of its other positions plus positions from p on
+        changeable = sorted((i for i in range(len(self._issues)) if others[i]), key=lambda i: issue_weights[i])
+        distances = [issue_weights[i] for i in changeable]
+        # the most a changed issue can add, and per position the most that the
+        # issues from there on can add together
+        gains = [others[i][0] - kept[i] for i in changeable]
+        reachable = [Decimal(0)] * (len(changeable) + 1)
+        for p in reversed(range(len(changeable))):
+            reachable[p] = reachable[p + 1] + max(gains[p], Decimal(0))
+        # per position the issues from there on that gain, most gain per distance first
+        by_rate = [
+            sorted(
+                ((float(gains[q]), distances[q]) for q in range(p, len(changeable)) if gains[q] > 0),
+                key=lambda gain_distance: gain_distance[1] / gain_distance[0],
+            )
+            for p in range(len(changeable))
+        ]
+
+        def least_distance(missing: Decimal, p: int) -> float:
+            # the distance to gain missing with the issues from p on, if parts of
+            # an issue could be changed (fractional knapsack), a lower bound
+            missing_gain = float(missing)
+            total = 0.0
+            for gain, distance in by_rate[p]:
+                if gain >= missing_gain:
+                    return total + distance * missing_gain / gain
+                total += distance
+                missing_gain -= gain
+            return total
+
+        tiebreak = count()
+        heap: list[tuple[float, int, float, tuple[int, ...], Decimal]] = []
+
+        def push(prefix: tuple[int, ...], prefix_distance: float, prefix_gain: Decimal, p: int) -> None:
+            # the subtree is left out when all its issues that gain together do not
+            # reach the minimum, and ordered on a lower bound of the distance of its
+            # sets that do (a set that reaches it is ordered on its own distance)
+            missing = min_utility - base - prefix_gain
+            if missing > reachable[p]:
+                return
+            distance = prefix_distance + distances[p]
+            nearest = distance
+            if missing > 0:
+                nearest = max(distance, prefix_distance + least_distance(missing, p) * (1 - 1e-9))
+            heappush(heap, (nearest, next(tiebreak), distance, prefix + (p,), prefix_gain + gains[p]))
+
+        def bids(positions: tuple[int, ...]) -> Iterator[tuple[Bid, Decimal]]:
+            # the bids that change the issues at positions, best first
+            changed = [changeable[p] for p in positions]
+            fixed = base - sum((kept[i] for i in changed), Decimal(0))
+            for alternatives, utility in self._best_first(fixed, [others[i] for i in changed]):
+                if utility < min_utility:
+                    return
+                values = {issue: bid.getValue(issue) for issue in self._issues}
+                for i, alternative in zip(changed, alternatives):
+                    # skip the rank of the value of bid, it is left out of others
+                    rank = alternative + (alternative >= ranks[i])
+                    values[self._issues[i]] = self._values[i][rank]
+                yield Bid(values), utility
+
+        if changeable:
+            push((), 0.0, Decimal(0), 0)
+
+        visited = 0
+        while heap and visited < max_sets:
+            _, _, distance, positions, gain = heappop(heap)
+            visited += 1
+            last = positions[-1]
+            if last + 1 < len(changeable):
+                push(positions, distance, gain, last + 1)
+                push(positions[:-1], distance - distances[last], gain - gains[last], last + 1)
+
+            if base + gain < min_utility:
+                continue
+            for found_bid, utility in bids(positions):
+                yielded.add(found_bid)
+                yield found_bid, distance, utility
+                if len(yielded) >= k:
+                    return
+        if not heap:
+            return
+
+        # out of sets: change the issues that gain the most per distance until the
+        # minimum is reached and drop the farthest issues that are not needed, then
+        # add the other issues in the same order while more bids are needed
+        greedy = sorted(
+            (p for p in range(len(changeable)) if gains[p] > 0),
+            key=lambda p: distances[p] / float(gains[p]),
+        )
+        gain = Decimal(0)
+        greedy_positions: list[int] = []
+        for p in greedy:
+            if base + gain >= min_utility:
+                break
+            greedy_positions.append(p)
+            gain += gains[p]
+        for p in sorted(greedy_positions, key=lambda p: distances[p], reverse=True):
+            if base + gain - gains[p] >= min_utility:
+                greedy_positions.remove(p)
+                gain -= gains[p]
+        added = [p for p in greedy if p not in greedy_positions]
+
+        for extra in range(len(added) + 1):
+            positions = tuple(sorted(greedy_positions + added[:extra]))
+            distance = sum(distances[p] for p in positions)
+            for found_bid, utility in bids(positions):
+                if found_bid not in yielded:
+                    yielded.add(found_bid)
+                    yield found_bid, distance, utility
+                    if len(yielded) >= k:
+                        return
+
+    @staticmethod
+    def _best_first(fixed: Decimal, utils: list[list[Decimal]]) -> Iterator[tuple[tuple[int, ...], Decimal]]:
+        # combinations of ranks with their utility, best first (see BestFirstBids)
+        def utility(ranks: tuple[int, ...]) -> Decimal:
+            return fixed + sum((issue_utils[rank] for issue_utils, rank in zip(utils, ranks)), Decimal(0))
+
+        tiebreak = count()
+        ranks = (0,) * len(utils)
+        heap = [(-utility(ranks), next(tiebreak), ranks, 0)]
+        while heap:
+            neg_utility, _, ranks, pivot = heappop(heap)
+            yield ranks, -neg_utility
+            for i in range(pivot, len(ranks)):
+                if ranks[i] + 1 < len(utils[i]):
+                    child = ranks[:i] + (ranks[i] + 1,) + ranks[i + 1 :]
+                    heappush(heap, (-utility(child), next(tiebreak), child, i))
@@ -0,0 +1,129 @@
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Value import Value
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+
+class EstimatedParetoFront:
+    """
+    Pareto front of (own utility, estimated opponent utility) over the bid space of
+    a linear additive profile, kept up to date while the opponent model learns.
+
+    Bids are rows of value indices (issues in sorted order, values in domain order,
+    as in utils.bid_history), sorted once on own utility. The opponent utility of a
+    bid is a sum of one contribution per issue, so when the model changes only the
+    contributions of the issues that changed are added to it. The own utility order
+    does not depend on the opponent, so the front is a single pass over it: a bid
+    is on the front if its opponent utility beats every bid with a higher own
+    utility. The front is only recomputed when it is asked for after a change.
+
+    Spaces with more than max_bids bids are covered by a uniform sample of that
+    size (plus our best bid).
+    """
+
+    def __init__(self, profile: LinearAdditive, max_bids: int = 100_000, seed: int | None = None) -> None:
+        domain = profile.getDomain()
+        self._issues: list[str] = sorted(domain.getIssues())
+        self._values: list[list[Value]] = [list(domain.getValues(issue)) for issue in self._issues]
+        sizes = [len(values) for values in self._values]
+
+        self._own_tables = [self._own_table(profile, i) for i in range(len(self._issues))]
+        if np.prod(sizes, dtype=float) <= max_bids:
+            rows = np.indices(sizes).reshape(len(sizes), -1).T
+        else:
+            random = np.random.default_rng(seed)
+            best = [[int(np.argmax(table)) for table in self._own_tables]]
+            rows = np.unique(np.vstack([best, random.integers(0, sizes, (max_bids, len(sizes)))]), axis=0)
+        self._rows = np.ascontiguousarray(rows, dtype=np.intp)
+
+        self._own = self._sum(self._own_tables)
+        self._opponent_tables: list[np.ndarray] = [np.zeros(size) for size in sizes]
+        self._opponent = np.zeros(len(self._rows))
+        self._sort()
+
+    def update_profile(self, profile: LinearAdditive, issues: list[str]) -> None:
+        """
+        Updates to a profile on the same domain of which only the given issues
+        changed (see utils.profile_fingerprint)
+        """
+        for issue in issues:
+            i = self._issues.index(issue)
+            table = self._own_table(profile, i)
+            self._own += (table - self._own_tables[i])[self._rows[:, i]]
+            self._own_tables[i] = table
+        if issues:
+            self._sort()
+
+    def update_opponent(self, value_utilities: list[np.ndarray], tolerance: float = 1e-9) -> None:
+        """
+        Updates to the estimated opponent utilities of the values, weighted with
+        their issue weight, per issue (see get_value_utilities of the opponent
+        models). Issues that changed less than tolerance are skipped.
+        """
+        changed = False
+        for i, table in enumerate(value_utilities):
+            difference = np.asarray(table, dtype=float) - self._opponent_tables[i]
+            if np.abs(difference).max() <= tolerance:
+                continue
+            self._opponent += difference[self._rows[:, i]]
+            self._opponent_tables[i] = self._opponent_tables[i] + difference
+            changed = True
+        if changed:
+            self._front = None
+
+    def get_front(self) -> list[tuple[Bid, float, float]]:
+        """
+        Returns the (bid, own utility, opponent utility) of the bids on the front,
+        best own utility first (so worst opponent utility first)
+        """
+        front = self._get_front()
+        return [(self._to_bid(self._rows[b]), float(self._own[b]), float(self._opponent[b])) for b in front]
+
+    def best_above(self, utility: float) -> Bid | None:
+        """
+        Returns the front bid with the best opponent utility among the bids with an
+        own utility of at least utility, None if there is no such bid
+        """
+        front = self._get_front()
+        # own utilities are descending along the front, so the bids at or above
+        # utility are a prefix and the last of it is the best for the opponent
+        position = int(np.searchsorted(-self._own[front], -utility, side="right")) - 1
+        if position < 0:
+            return None
+        return self._to_bid(self._rows[front[position]])
+
+    def _get_front(self) -> np.ndarray:
+        if self._front is not None:
+            return self._front
+
+        opponent = self._opponent[self._order]
+        # best opponent utility among the bids with a strictly higher own utility,
+        # bids with equal own utility are compared within their group
+        starts = np.flatnonzero(np.r_[True, self._sorted_own[1:] != self._sorted_own[:-1]])
+        group_sizes = np.diff(np.r_[starts, len(opponent)])
+        best_before = np.r_[-np.inf, np.maximum.accumulate(opponent)[:-1]][starts]
+        group_best = np.maximum.reduceat(opponent, starts)
+
+        on_front = (opponent > np.repeat(best_before, group_sizes)) & (opponent == np.repeat(group_best, group_sizes))
+        self._front = self._order[on_front]
+        return self._front
+
+    def _sort(self) -> None:
+        # rounded, so bids with the same utility tie despite float sums in another order
+        self._order = np.argsort(-np.round(self._own, 12), kind="stable")
+        self._sorted_own = np.round(self._own[self._order], 12)
+        self._front: np.ndarray | None = None
+
+    def _own_table(self, profile: LinearAdditive, i: int) -> np.ndarray:
+        weight = profile.getWeight(self._issues[i])
+        issue_utilities = profile.getUtilities()[self._issues[i]]
+        return np.array([float(weight * issue_utilities.getUtility(value)) for value in self._values[i]])
+
+    def _sum(self, tables: list[np.ndarray]) -> np.ndarray:
+        total = np.zeros(len(self._rows))
+        for i, table in enumerate(tables):
+            total += table[self._rows[:, i]]
+        return total
+
+    def _to_bid(self, row: np.ndarray) -> Bid:
+        return Bid({issue: values[index] for issue, values, index in zip(self._issues, self._values, row)})
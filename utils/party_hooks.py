@@ -0,0 +1,106 @@
+from contextlib import contextmanager
+from importlib import import_module
+from threading import Lock, local
+from typing import Callable, Iterator
+
+from geniusweb.inform.Inform import Inform
+from geniusweb.inform.Settings import Settings
+
+# called with the party name when a party starts and when it stops handling an Inform
+Hook = Callable[[str], None]
+
+# wrapped classes with their own notifyChange (None if inherited) and the number of
+# contexts that use the wrapper; shared by the sessions of all threads
+_wrapped: dict[type, list] = {}
+_lock = Lock()
+# the contexts of the sessions running in this thread
+_contexts = local()
+
+
+class _Context:
+    def __init__(self, classes: set[type], on_enter: Hook, on_exit: Hook) -> None:
+        self.classes = classes
+        self.on_enter = on_enter
+        self.on_exit = on_exit
+        # party that is currently acting, innermost last
+        self.active: list[str] = []
+
+
+@contextmanager
+def party_hooks(agents: list[str], on_enter: Hook, on_exit: Hook) -> Iterator[None]:
+    """
+    Wraps notifyChange of the given agent classes (python class paths) for the
+    duration of the context, so the runner can see which party is acting.
+
+    Parties call each other through the protocol, so a notifyChange can run inside
+    the notifyChange of another party. The hooks are called such that only the
+    innermost party counts as acting: when a nested party starts, the outer party
+    exits, and it enters again when the nested party is done.
+
+    A session runs its parties in its own thread, so the hooks are kept per thread
+    and sessions in other threads (e.g. of the negotiation service) can use the
+    same classes at the same time. A class is wrapped once, as long as any context
+    uses it.
+    """
+    classes = set()
+    for agent in agents:
+        module, name = agent.rsplit(".", 1)
+        classes.add(getattr(import_module(module), name))
+
+    with _lock:
+        for cls in classes:
+            if cls not in _wrapped:
+                _wrapped[cls] = [cls.__dict__.get("notifyChange"), 0]
+                cls.notifyChange = _wrap(cls, cls.notifyChange)
+            _wrapped[cls][1] += 1
+
+    context = _Context(classes, on_enter, on_exit)
+    if not hasattr(_contexts, "stack"):
+        _contexts.stack = []
+    _contexts.stack.append(context)
+    try:
+        yield
+    finally:
+        _contexts.stack.remove(context)
+        with _lock:
+            for cls in classes:
+                _wrapped[cls][1] -= 1
+                if _wrapped[cls][1] == 0:
+                    original, _ = _wrapped.pop(cls)
+                    if original is None:
+                        # the class inherited notifyChange, remove our override
+                        del cls.notifyChange
+                    else:
+                        cls.notifyChange = original
+
+
+def _wrap(cls: type, notify_change):
+    def notifyChange(self, info: Inform):
+        if isinstance(info, Settings):
+            self._hooked_name = info.getID().getName()
+        name = getattr(self, "_hooked_name", None)
+        contexts = [c for c in getattr(_contexts, "stack", []) if cls in c.classes]
+        return _call(contexts, name, lambda: notify_change(self, info))
+
+    return notifyChange
+
+
+def _call(contexts: list[_Context], name: str | None, call):
+    # runs call inside the hooks of every context, the first context outermost
+    if not contexts:
+        return call()
+    context = contexts[0]
+    if name is None or (context.active and context.active[-1] == name):
+        # unknown party, or an inherited notifyChange that was wrapped as well
+        return _call(contexts[1:], name, call)
+
+    if context.active:
+        context.on_exit(context.active[-1])
+    context.active.append(name)
+    context.on_enter(name)
+    try:
+        return _call(contexts[1:], name, call)
+    finally:
+        context.on_exit(context.active.pop())
+        if context.active:
+            context.on_enter(context.active[-1])
@@ -0,0 +1,32 @@
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+
+def profile_fingerprint(profile: LinearAdditive) -> dict[str, int]:
+    """
+    Returns per issue a hash of its weight and value utilities. It is computed
+    once when a profile is loaded, after which comparing versions of a profile
+    only compares these hashes (and tells which issues changed).
+    """
+    domain = profile.getDomain()
+    fingerprint = {}
+    for issue in domain.getIssues():
+        utilities = profile.getUtilities()[issue]
+        fingerprint[issue] = hash(
+            (
+                str(profile.getWeight(issue)),
+                tuple(sorted((str(value), str(utilities.getUtility(value))) for value in domain.getValues(issue))),
+            )
+        )
+    return fingerprint
+
+
+def changed_issues(
+    old: LinearAdditive, old_fingerprint: dict[str, int], new: LinearAdditive, new_fingerprint: dict[str, int]
+) -> list[str] | None:
+    """
+    Returns the issues that changed between two versions of a profile, or None if
+    the domain changed (and nothing of the old version can be reused).
+    """
+    if old_fingerprint.keys() != new_fingerprint.keys() or old.getDomain() != new.getDomain():
+        return None
+    return [issue for issue, fingerprint in new_fingerprint.items() if fingerprint != old_fingerprint[issue]]
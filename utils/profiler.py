@@ -0,0 +1,141 @@
+import os
+import sys
+from collections import Counter, defaultdict
+from glob import glob
+from threading import Event, Thread, get_ident
+
+import plotly.graph_objects as go
+
+from utils.party_hooks import party_hooks
+
+# samples taken while no party was acting (the protocol and the runner)
+RUNNER = "runner"
+# frames of the hooks themselves are left out of the stacks
+_HOOKS_FILE = party_hooks.__wrapped__.__code__.co_filename
+
+
+class SamplingProfiler:
+    """
+    Samples the call stack of the thread that runs the session at a fixed
+    interval, and attributes every sample to the party that was acting at that
+    moment (as WallTimeTracker does for time). The stacks are kept as collapsed
+    stacks ("frame;frame;frame" -> number of samples), the input format of most
+    flamegraph tools.
+
+        with SamplingProfiler(agents) as profiler:
+            runner.run()
+        profiler.get_stacks()  # party name -> collapsed stack -> samples
+    """
+
+    def __init__(self, agents: list[str], interval: float = 0.005) -> None:
+        self._agents = agents
+        self._interval = interval
+        self._hooks = None
+        # read by the sampler thread, so it is only ever replaced
+        self._acting = RUNNER
+        self._stacks: dict[str, Counter] = defaultdict(Counter)
+        self._thread_id = 0
+        self._done = Event()
+        self._sampler: Thread = None  # type:ignore
+
+    def __enter__(self) -> "SamplingProfiler":
+        self._thread_id = get_ident()
+        self._hooks = party_hooks(self._agents, self._enter, self._exit)
+        self._hooks.__enter__()
+        self._sampler = Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._done.set()
+        self._sampler.join()
+        self._hooks.__exit__(*exc_info)
+
+    def get_stacks(self) -> dict[str, Counter]:
+        return dict(self._stacks)
+
+    def _enter(self, party: str) -> None:
+        self._acting = party
+
+    def _exit(self, party: str) -> None:
+        self._acting = RUNNER
+
+    def _sample(self) -> None:
+        while not self._done.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            party = self._acting
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                if code.co_filename != _HOOKS_FILE:
+                    frames.append(f"{os.path.splitext(os.path.basename(code.co_filename))[0]}:{code.co_name}")
+                frame = frame.f_back
+            self._stacks[party][";".join(reversed(frames))] += 1
+
+
+def save_stacks(directory: str, stacks: dict[str, Counter]) -> None:
+    """
+    Appends collapsed stacks per agent (class name) to files in directory, one
+    file per process so parallel workers do not write to the same file
+    """
+    os.makedirs(directory, exist_ok=True)
+    for agent, counts in stacks.items():
+        with open(os.path.join(directory, f"{agent}.{os.getpid()}.collapsed"), "a") as f:
+            f.writelines(f"{stack} {samples}\n" for stack, samples in counts.items())
+
+
+def merge_profiles(directory: str, min_share: float = 0.005) -> dict[str, Counter]:
+    """
+    Merges the stacks that save_stacks wrote into one collapsed stack file per
+    agent (<agent>.folded, e.g. for flamegraph.pl or speedscope) and an
+    interactive flamegraph (<agent>.html). Frames with less than min_share of
+    the samples of an agent are left out of the html, to keep it small.
+    """
+    merged: dict[str, Counter] = defaultdict(Counter)
+    for path in glob(os.path.join(directory, "*.collapsed")):
+        agent = os.path.basename(path).split(".")[0]
+        with open(path) as f:
+            for line in f:
+                stack, _, samples = line.rstrip("\n").rpartition(" ")
+                merged[agent][stack] += int(samples)
+        os.remove(path)
+
+    for agent, counts in merged.items():
+        # add to what earlier runs merged into the same directory
+        folded = os.path.join(directory, f"{agent}.folded")
+        if os.path.exists(folded):
+            with open(folded) as f:
+                for line in f:
+                    stack, _, samples = line.rstrip("\n").rpartition(" ")
+                    counts[stack] += int(samples)
+        with open(folded, "w") as f:
+            f.writelines(f"{stack} {samples}\n" for stack, samples in counts.most_common())
+        _write_flamegraph(os.path.join(directory, f"{agent}.html"), agent, counts, min_share)
+
+    return dict(merged)
+
+
+def _write_flamegraph(path: str, agent: str, counts: Counter, min_share: float) -> None:
+    # every prefix of a stack is a node, with the samples of all stacks below it
+    totals: Counter = Counter()
+    for stack, samples in counts.items():
+        frames = stack.split(";")
+        for depth in range(1, len(frames) + 1):
+            totals[";".join(frames[:depth])] += samples
+
+    minimum = min_share * sum(counts.values())
+    nodes = [node for node, samples in totals.items() if samples >= minimum]
+    fig = go.Figure(
+        go.Icicle(
+            ids=nodes,
+            labels=[node.rpartition(";")[2] for node in nodes],
+            parents=[node.rpartition(";")[0] for node in nodes],
+            values=[totals[node] for node in nodes],
+            branchvalues="total",
+            tiling={"orientation": "v", "flip": "y"},
+        )
+    )
+    fig.update_layout(title=f"{agent}: {sum(counts.values())} samples", height=800)
+    fig.write_html(path)
@@ -0,0 +1,170 @@
+import os
+import random
+from copy import deepcopy
+from datetime import datetime
+from importlib import import_module
+from tempfile import TemporaryDirectory
+from time import perf_counter, time
+from typing import Any
+
+import numpy as np
+
+from geniusweb.actions.Action import Action
+from geniusweb.inform.Inform import Inform
+from geniusweb.progress.ProgressRounds import ProgressRounds
+from geniusweb.progress.ProgressTime import ProgressTime
+from pyson.ObjectMapper import ObjectMapper
+
+from utils.knowledge_store import KnowledgeStore
+
+
+class _RecordingConnection:
+    """
+    Stands in for the connection to the protocol: the actions the agent sends
+    are kept instead of being delivered.
+    """
+
+    def __init__(self) -> None:
+        self.sent: list[Action] = []
+
+    def send(self, action: Action) -> None:
+        self.sent.append(action)
+
+    def addListener(self, listener) -> None:
+        pass
+
+    def removeListener(self, listener) -> None:
+        pass
+
+    def getReference(self):
+        return None
+
+    def getRemoteURI(self):
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+def replay_session(
+    results_trace: dict, position: str, agent: str | None = None, parameters: dict | None = None, seed: int = 0
+) -> dict:
+    """
+    Replays a SAOP session from its results_trace for one agent. The agent gets the
+    recorded Settings, ActionDone and YourTurn sequence, and its opponent is
+    replaced by the recorded actions, so nothing else runs and every run sees the
+    same opponent.
+
+    The random module and the global numpy generator are seeded, and the seed is
+    passed to the agent as its "seed" parameter (unless the session recorded one)
+    for the generators it creates itself, so agents that take their randomness
+    from these replay the same way every time. A knowledge store of the agent is
+    replaced by an empty temporary one, so a replay does not depend on or change
+    what other sessions stored.
+
+    Args:
+        results_trace (dict): trace as returned by run_session.
+        position (str): position of the agent to replay, as in the results summary.
+        agent (str, optional): class path of the agent, defaults to the recorded agent.
+        parameters (dict, optional): overrides the recorded parameters of the agent.
+        seed (int): seed for the random module, numpy and the agent.
+
+    Returns:
+        dict: duration of the Settings and of every turn, the total time, and the
+            turns where the agent did something else than recorded.
+    """
+    # quick and dirty check, MOPAC has a different sequence of Informs
+    assert "SAOPSettings" in results_trace["settings"]
+
+    party = next(p for p in results_trace["partyprofiles"] if p.split("_")[-1] == str(position))
+    party_profile = results_trace["partyprofiles"][party]
+    if agent is None:
+        agent = party_profile["party"]["partyref"][len("pythonpath:") :]
+    agent_parameters = {**party_profile["party"]["parameters"], **(parameters or {})}
+    agent_parameters.setdefault("seed", seed)
+
+    with TemporaryDirectory() as directory:
+        if "knowledge_store" in agent_parameters:
+            agent_parameters["knowledge_store"] = os.path.join(directory, "knowledge.sqlite")
+        replay = _replay(results_trace, party, party_profile, agent, agent_parameters, seed)
+        # the agent stores its knowledge in the background, wait for it before the directory goes
+        KnowledgeStore.flush()
+    return replay
+
+
+def _replay(
+    results_trace: dict, party: str, party_profile: dict, agent: str, agent_parameters: dict, seed: int
+) -> dict:
+    mapper = ObjectMapper()
+    settings = {
+        "Settings": {
+            "id": party,
+            "profile": party_profile["profile"],
+            "protocol": "SAOP",
+            "progress": mapper.toJson(_new_progress(results_trace["settings"]["SAOPSettings"]["deadline"])),
+            "parameters": agent_parameters,
+        }
+    }
+
+    module, name = agent.rsplit(".", 1)
+    random.seed(seed)
+    np.random.seed(seed)
+    instance = getattr(import_module(module), name)()
+    connection = _RecordingConnection()
+    instance.connect(connection)
+
+    replay = {"agent": agent, "party": party, "settings_time": 0.0, "turn_times": [], "diverged": []}
+
+    start = perf_counter()
+    instance.notifyChange(mapper.parse(settings, Inform))
+    replay["settings_time"] = perf_counter() - start
+
+    for index, action in enumerate(results_trace["actions"]):
+        action = _strip_utilities(action)
+        if _actor(action) == party:
+            # the agent has to act, time its turn and compare with what it did back then
+            start = perf_counter()
+            instance.notifyChange(mapper.parse({"YourTurn": {}}, Inform))
+            replay["turn_times"].append(perf_counter() - start)
+            sent = [mapper.toJson(a) for a in connection.sent]
+            connection.sent.clear()
+            if sent != [action]:
+                replay["diverged"].append(index)
+        # every party is informed of every action, including its own
+        instance.notifyChange(mapper.parse({"ActionDone": {"action": action}}, Inform))
+
+    instance.notifyChange(mapper.parse({"Finished": {"agreements": _agreements(results_trace)}}, Inform))
+
+    replay["total_time"] = replay["settings_time"] + sum(replay["turn_times"])
+    return replay
+
+
+def _new_progress(deadline: dict):
+    # the session starts now, a deadline in time thus runs on the clock of the replay
+    now = round(time() * 1000)
+    if "DeadlineRounds" in deadline:
+        rounds = deadline["DeadlineRounds"]
+        return ProgressRounds(
+            rounds["rounds"], 0, datetime.fromtimestamp((now + rounds["durationms"]) / 1000)
+        )
+    return ProgressTime(deadline["DeadlineTime"]["durationms"], datetime.fromtimestamp(now / 1000))
+
+
+def _strip_utilities(action: dict) -> dict:
+    # process_results adds the utilities to the actions, they are not part of an Action
+    action = deepcopy(action)
+    for content in action.values():
+        content.pop("utilities", None)
+    return action
+
+
+def _actor(action: dict) -> str:
+    return next(iter(action.values()))["actor"]
+
+
+def _agreements(results_trace: dict) -> dict[str, Any]:
+    actions = results_trace["actions"]
+    if actions and "Accept" in actions[-1]:
+        bid = _strip_utilities(actions[-1])["Accept"]["bid"]
+        return {party: bid for party in results_trace["partyprofiles"]}
+    return {}
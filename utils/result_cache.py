@@ -0,0 +1,133 @@
+import ast
+import hashlib
+import json
+import os
+from importlib.util import find_spec
+
+
+# session settings that only control what is written next to the results
+_OUTPUT_KEYS = ("memory", "profiler_dir")
+# root of this repository, modules outside of it (installed packages) are not hashed
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ResultCache:
+    """
+    Stores session summaries and traces under a hash of everything that determines
+    the session: the source of the agents (and of the modules of this repository
+    they import), the contents of the profiles and the other session settings
+    (deadline, parameters, protocol, seed, ...). After changing one agent only the
+    sessions it plays in get a new key, so a rerun only plays those.
+
+    Only sessions with a "seed" are cached: the runner seeds the random generators
+    and passes the seed to the agents, so an agent that uses randomness plays the
+    same session again. Sessions without a seed have no key and are always played;
+    change the seed for fresh samples.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        # hashes of files and modules, these do not change during a run
+        self._file_hashes: dict[str, str] = {}
+        self._module_hashes: dict[str, str] = {}
+
+    def key(self, settings: dict) -> str | None:
+        """
+        Returns the key of a session, None if it has no seed and cannot be cached
+        """
+        if settings.get("seed") is None:
+            return None
+        digest = hashlib.sha256()
+        for agent in settings["agents"]:
+            digest.update(self._module_hash(agent.rsplit(".", 1)[0]).encode())
+        for profile in settings["profiles"]:
+            digest.update(self._file_hash(profile).encode())
+        other = {k: v for k, v in settings.items() if k not in ("agents", "profiles", *_OUTPUT_KEYS)}
+        digest.update(json.dumps([settings["agents"], other], sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        try:
+            with open(os.path.join(self.path, f"{key}.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def get_trace(self, key: str) -> dict | None:
+        try:
+            with open(os.path.join(self.path, f"{key}.trace.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, results_summary: dict, results_trace: dict | None = None) -> None:
+        # the summary is written last, a key with a summary also has its trace
+        if results_trace is not None:
+            self._write(os.path.join(self.path, f"{key}.trace.json"), results_trace)
+        self._write(os.path.join(self.path, f"{key}.json"), results_summary)
+
+    @staticmethod
+    def _write(path: str, content: dict) -> None:
+        # written to a temporary file first, so readers never see half a file
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            f.write(json.dumps(content))
+        os.replace(temporary, path)
+
+    def _module_hash(self, module: str) -> str:
+        # hash of the module's source and of the repository modules it imports, recursively
+        if module in self._module_hashes:
+            return self._module_hashes[module]
+        self._module_hashes[module] = ""  # guards against import cycles
+
+        digest = hashlib.sha256()
+        path = _local_source(module)
+        if path is not None:
+            digest.update(self._file_hash(path).encode())
+            for imported in sorted(_imports(path, module)):
+                if _local_source(imported) is not None:
+                    digest.update(self._module_hash(imported).encode())
+
+        self._module_hashes[module] = digest.hexdigest()
+        return self._module_hashes[module]
+
+    def _file_hash(self, path: str) -> str:
+        if path not in self._file_hashes:
+            with open(path, "rb") as f:
+                self._file_hashes[path] = hashlib.sha256(f.read()).hexdigest()
+        return self._file_hashes[path]
+
+
+def _local_source(module: str) -> str | None:
+    # source file of a module in this repository, installed packages are left out
+    try:
+        spec = find_spec(module)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or spec.origin is None or not spec.origin.endswith(".py"):
+        return None
+    path = os.path.abspath(spec.origin)
+    if os.path.commonpath([path, _ROOT]) != _ROOT or "site-packages" in os.path.relpath(path, _ROOT):
+        return None
+    return path
+
+
+def _imports(path: str, module: str) -> set[str]:
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    package = module if path.endswith("__init__.py") else module.rpartition(".")[0]
+
+    imports = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level > 0:
+                parent = package.rsplit(".", node.level - 1)[0] if node.level > 1 else package
+                base = f"{parent}.{base}" if base else parent
+            imports.add(base)
+            # "from package import module" imports a module as well
+            imports.update(f"{base}.{alias.name}" for alias in node.names)
+    return imports
@@ -0,0 +1,157 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator
+
+from utils.scheduler import session_domain
+
+
+class ResultsDatabase:
+    """
+    File backed (SQLite) store of the sessions, summaries and actions of every
+    run, so results of earlier runs are kept and can be queried without loading
+    JSON files:
+
+        runs            one row per run (a tournament or a single session)
+        sessions        one row per session, with the main numbers of its summary
+        session_agents  one row per agent per session, with its utility
+        actions         one row per offer or accept, with the utility of every party
+
+    The columns that are searched on (agent, domain, run, round) are indexed, and
+    the sessions of a worker are inserted in bulk in one transaction.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with self._connect() as connection:
+            connection.executescript(
+                """CREATE TABLE IF NOT EXISTS runs (
+                    run_id INTEGER PRIMARY KEY AUTOINCREMENT, started TEXT, settings TEXT);
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id INTEGER PRIMARY KEY AUTOINCREMENT, run_id INTEGER, session_index INTEGER,
+                    domain TEXT, result TEXT, num_offers INTEGER, nash_product REAL, social_welfare REAL,
+                    settings TEXT, summary TEXT);
+                CREATE TABLE IF NOT EXISTS session_agents (
+                    session_id INTEGER, position TEXT, agent TEXT, utility REAL,
+                    PRIMARY KEY (session_id, position));
+                CREATE TABLE IF NOT EXISTS actions (
+                    session_id INTEGER, action_index INTEGER, round INTEGER, actor TEXT, type TEXT,
+                    bid TEXT, utilities TEXT,
+                    PRIMARY KEY (session_id, action_index));
+                CREATE INDEX IF NOT EXISTS sessions_run ON sessions (run_id, session_index);
+                CREATE INDEX IF NOT EXISTS sessions_domain ON sessions (domain, result);
+                CREATE INDEX IF NOT EXISTS session_agents_agent ON session_agents (agent, session_id);
+                CREATE INDEX IF NOT EXISTS actions_round ON actions (session_id, round);"""
+            )
+
+    def start_run(self, settings: dict) -> int:
+        """
+        Registers a run and returns its id
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO runs (started, settings) VALUES (?, ?)",
+                (datetime.now().isoformat(), json.dumps(settings)),
+            )
+            return int(cursor.lastrowid)
+
+    def add_sessions(self, run_id: int, sessions: list[tuple[int, dict, dict, dict | None]]) -> None:
+        """
+        Adds (index, settings, summary, trace) of sessions of a run in one
+        transaction. The trace is optional, without it no actions are stored.
+        """
+        with self._connect() as connection:
+            for index, settings, results_summary, results_trace in sessions:
+                cursor = connection.execute(
+                    """INSERT INTO sessions (run_id, session_index, domain, result, num_offers,
+                        nash_product, social_welfare, settings, summary)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (
+                        run_id,
+                        index,
+                        session_domain(settings),
+                        results_summary.get("result"),
+                        results_summary.get("num_offers"),
+                        results_summary.get("nash_product"),
+                        results_summary.get("social_welfare"),
+                        json.dumps(settings),
+                        json.dumps(results_summary),
+                    ),
+                )
+                session_id = cursor.lastrowid
+                positions = [key[len("agent_") :] for key in results_summary if key.startswith("agent_")]
+                connection.executemany(
+                    "INSERT INTO session_agents VALUES (?, ?, ?, ?)",
+                    [
+                        (session_id, p, results_summary[f"agent_{p}"], results_summary.get(f"utility_{p}"))
+                        for p in positions
+                    ],
+                )
+                if results_trace is not None:
+                    connection.executemany(
+                        "INSERT INTO actions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        _action_rows(session_id, results_trace, settings.get("protocol", "SAOP")),
+                    )
+
+    def agreements(self, agent: str, domain: str | None = None) -> list[dict]:
+        """
+        Returns the agreements of an agent (class name) over all runs, optionally
+        only on the given domain (its directory, e.g. "domains/domain04")
+        """
+        query = """SELECT s.run_id, s.session_index, s.domain, a.position, a.utility,
+                s.nash_product, s.social_welfare
+            FROM session_agents a JOIN sessions s ON s.session_id = a.session_id
+            WHERE a.agent = ? AND s.result = 'agreement'"""
+        parameters: tuple = (agent,)
+        if domain is not None:
+            query += " AND s.domain = ?"
+            parameters += (domain,)
+        return self.query(query, parameters)
+
+    def query(self, sql: str, parameters: tuple = ()) -> list[dict]:
+        with self._connect() as connection:
+            cursor = connection.execute(sql, parameters)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor]
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # a connection per call, workers in other processes write to the same file;
+        # the timeout lets concurrent writers wait on each other
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+
+def _action_rows(session_id: int, results_trace: dict, protocol: str = "SAOP") -> list[tuple]:
+    # with alternating offers (SAOP) every party acts once per round, with MOPAC a
+    # round is an offer phase followed by voting, so an offer after a vote starts one
+    num_parties = max(len(results_trace.get("partyprofiles", {})), 1)
+    rows = []
+    round = 0
+    previous: dict = {}
+    for action_index, action in enumerate(results_trace.get("actions", [])):
+        if protocol == "SAOP":
+            round = action_index // num_parties
+        elif "Offer" in action and previous and "Offer" not in previous:
+            round += 1
+        previous = action
+        for action_type in ("Offer", "Accept"):
+            if action_type in action:
+                content = action[action_type]
+                rows.append(
+                    (
+                        session_id,
+                        action_index,
+                        round,
+                        content["actor"],
+                        action_type,
+                        json.dumps(content["bid"]["issuevalues"]),
+                        json.dumps(content.get("utilities", {})),
+                    )
+                )
+    return rows
@@ -1,13 +1,21 @@
+import json
+import os
+import random
+from collections import Counter
+from contextlib import ExitStack
+from functools import partial
 from itertools import permutations
-from math import factorial
+from math import prod
+from multiprocessing import Pool
+from time import perf_counter
 from typing import Tuple
 
+import numpy as np
 from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import \
     LinearAdditiveUtilitySpace
 from geniusweb.profileconnection.ProfileConnectionFactory import \
     ProfileConnectionFactory
 from geniusweb.protocol.NegoSettings import NegoSettings
-from geniusweb.protocol.session.saop.SAOPState import SAOPState
 from geniusweb.simplerunner.ClassPathConnectionFactory import \
     ClassPathConnectionFactory
 from geniusweb.simplerunner.NegoRunner import NegoRunner
@@ -15,56 +23,95 @@ from pyson.ObjectMapper import ObjectMapper
 from uri.uri import URI
 
 from utils.ask_proceed import ask_proceed
+from utils.memory import MemoryTracker
+from utils.profiler import RUNNER, SamplingProfiler, save_stacks
+from utils.result_cache import ResultCache
+from utils.results_db import ResultsDatabase
+from utils.scheduler import CostModel, schedule
 from utils.std_out_reporter import StdOutReporter
+from utils.wall_time import WallTimeTracker
+
+# parsed profiles by uri, with the modification time of their file
+_profiles: dict[str, tuple[float | None, LinearAdditiveUtilitySpace]] = {}
 
 
 def run_session(settings) -> Tuple[dict, dict]:
     agents = settings["agents"]
     profiles = settings["profiles"]
-    rounds = settings["deadline_rounds"]
+    rounds = settings.get("deadline_rounds")
+    time_ms = settings.get("deadline_time_ms")
+    protocol = settings.get("protocol", "SAOP")
+    # parameters for every agent, these end up in the Settings the agent receives
+    parameters = settings.get("parameters", [{} for _ in agents])
+    seed = settings.get("seed")
 
     # quick and dirty checks
-    assert isinstance(agents, list) and len(agents) == 2
-    assert isinstance(profiles, list) and len(profiles) == 2
-    assert isinstance(rounds, int) and rounds > 0
+    assert protocol in ("SAOP", "MOPAC")
+    if protocol == "SAOP":
+        assert isinstance(agents, list) and len(agents) == 2
+    else:
+        assert isinstance(agents, list) and len(agents) >= 2
+    assert isinstance(profiles, list) and len(profiles) == len(agents)
+    assert isinstance(parameters, list) and len(parameters) == len(agents)
+    # the deadline is either a number of rounds or a duration in milliseconds
+    assert (rounds is None) != (time_ms is None)
+    assert rounds is None or (isinstance(rounds, int) and rounds > 0)
+    assert time_ms is None or (isinstance(time_ms, int) and time_ms > 0)
+
+    if seed is not None:
+        # agents that use the random module or numpy play the same session for the
+        # same seed, agents with their own generators get the seed as a parameter
+        random.seed(seed)
+        np.random.seed(seed)
+        parameters = [{"seed": seed, **agent_parameters} for agent_parameters in parameters]
+
+    # every agent gets the classes of the others by position (the number at the end
+    # of their party id), e.g. to key what it learns about them (see CustomAgent)
+    parameters = [
+        {"opponents": {str(j): other for j, other in enumerate(agents, 1) if j != i}, **agent_parameters}
+        for i, agent_parameters in enumerate(parameters, 1)
+    ]
 
     # file path to uri
     profiles_uri = [f"file:{x}" for x in profiles]
 
     # create full settings dictionary that geniusweb requires
-    settings_full = {
-        "SAOPSettings": {
-            "participants": [
-                {
-                    "TeamInfo": {
-                        "parties": [
-                            {
-                                "party": {
-                                    "partyref": f"pythonpath:{agents[0]}",
-                                    "parameters": {},
-                                },
-                                "profile": profiles_uri[0],
-                            }
-                        ]
-                    }
-                },
-                {
-                    "TeamInfo": {
-                        "parties": [
-                            {
-                                "party": {
-                                    "partyref": f"pythonpath:{agents[1]}",
-                                    "parameters": {},
-                                },
-                                "profile": profiles_uri[1],
-                            }
-                        ]
+    participants = [
+        {
+            "TeamInfo": {
+                "parties": [
+                    {
+                        "party": {
+                            "partyref": f"pythonpath:{agent}",
+                            "parameters": agent_parameters,
+                        },
+                        "profile": profile_uri,
                     }
-                },
-            ],
-            "deadline": {"DeadlineRounds": {"rounds": rounds, "durationms": 60000}},
+                ]
+            }
+        }
+        for agent, profile_uri, agent_parameters in zip(agents, profiles_uri, parameters)
+    ]
+    if rounds is not None:
+        deadline = {"DeadlineRounds": {"rounds": rounds, "durationms": 60000}}
+    else:
+        deadline = {"DeadlineTime": {"durationms": time_ms}}
+
+    if protocol == "SAOP":
+        settings_full = {
+            "SAOPSettings": {
+                "participants": participants,
+                "deadline": deadline,
+            }
+        }
+    else:
+        settings_full = {
+            "MOPACSettings": {
+                "participants": participants,
+                "deadline": deadline,
+                "votingevaluator": {settings.get("voting_evaluator", "LargestAgreement"): {}},
+            }
         }
-    }
 
     # parse settings dict to settings object
     settings_obj = ObjectMapper().parse(settings_full, NegoSettings)
@@ -72,54 +119,230 @@ def run_session(settings) -> Tuple[dict, dict]:
     # create the negotiation session runner object
     runner = NegoRunner(settings_obj, ClassPathConnectionFactory(), StdOutReporter(), 0)
 
-    # run the negotiation session
-    runner.run()
+    # run the negotiation session, keeping track of the time every agent spends
+    # (and optionally the memory, tracing allocations slows the session down)
+    with WallTimeTracker(agents) as wall_time, ExitStack() as stack:
+        if settings.get("memory", False):
+            memory = stack.enter_context(MemoryTracker(agents))
+        if "profiler_dir" in settings:
+            profiler = stack.enter_context(SamplingProfiler(agents))
+        runner.run()
 
     # get results from the session in class format and dict format
-    results_class: SAOPState = runner.getProtocol().getState()
+    results_class = runner.getProtocol().getState()
     results_dict = ObjectMapper().toJson(results_class)
 
     # add utilities to the results and create a summary
-    results_trace, results_summary = process_results(results_class, results_dict)
+    if protocol == "SAOP":
+        results_trace, results_summary = process_results(results_class, results_dict)
+    else:
+        results_trace, results_summary = process_mopac_results(results_class, results_dict)
+
+    # with a time deadline the agents share the budget, so also report their share
+    for party, seconds in wall_time.get_times().items():
+        position = party.split("_")[-1]
+        results_summary[f"time_{position}"] = seconds
+        if time_ms is not None:
+            results_summary[f"time_share_{position}"] = seconds / (time_ms / 1000)
+
+    if settings.get("memory", False):
+        report = memory.get_report()
+        results_summary["memory_peak"] = report["peak"]
+        results_summary["memory_residual"] = report["residual"]
+        for party, party_report in report["parties"].items():
+            position = party.split("_")[-1]
+            results_summary[f"memory_peak_{position}"] = party_report["peak"]
+            results_summary[f"memory_net_{position}"] = party_report["net"]
+        results_summary["memory_top_allocations"] = report["top_allocations"]
+
+    # stacks sampled while an agent was acting, saved per agent class for merge_profiles
+    if "profiler_dir" in settings:
+        stacks = {}
+        for party, counts in profiler.get_stacks().items():
+            name = results_summary.get(f"agent_{party.split('_')[-1]}", RUNNER) if party != RUNNER else RUNNER
+            stacks.setdefault(name, Counter()).update(counts)
+        save_stacks(settings["profiler_dir"], stacks)
 
     return results_trace, results_summary
 
 
 def run_tournament(tournament_settings: dict) -> Tuple[list, list]:
-    # create agent permutations, ensures that every agent plays against every other agent on both sides of a profile set.
-    agents = tournament_settings["agents"]
-    profile_sets = tournament_settings["profile_sets"]
-    deadline_rounds = tournament_settings["deadline_rounds"]
+    tournament = create_tournament(tournament_settings)
 
-    num_sessions = (factorial(len(agents)) // factorial(len(agents) - 2)) * len(profile_sets)
-    if num_sessions > 100:
-        message = f"WARNING: this would run {num_sessions} negotiation sessions. Proceed?"
+    # sessions whose agents, profiles and settings are unchanged since an earlier run are not played again
+    results_summaries = load_cached_results(tournament_settings, tournament)
+    pending = [index for index, summary in enumerate(results_summaries) if summary is None]
+
+    if len(pending) > 100:
+        message = f"WARNING: this would run {len(pending)} negotiation sessions. Proceed?"
         if not ask_proceed(message):
             print("Exiting script")
             exit()
 
+    # durations of earlier sessions, used to balance the workers
+    cost_model = CostModel(tournament_settings.get("cost_history", "results/session_costs.json"))
+    workers = tournament_settings.get("workers", 1)
+    traces_dir, results_db = prepare_outputs(tournament_settings)
+    write_cached_outputs(tournament_settings, tournament, results_summaries, traces_dir, results_db)
+    cache = tournament_settings.get("cache")
+
+    if workers > 1:
+        # every worker runs its own list of sessions, grouped by domain
+        assignment = schedule([tournament[i] for i in pending], workers, cost_model)
+        with Pool(workers) as pool:
+            worker_results = pool.map(
+                partial(_run_sessions, traces_dir=traces_dir, results_db=results_db, cache=cache),
+                [[(pending[i], tournament[pending[i]]) for i in indices] for indices in assignment],
+            )
+        session_results = [result for results in worker_results for result in results]
+    else:
+        session_results = _run_sessions([(i, tournament[i]) for i in pending], traces_dir, results_db, cache)
+
+    # assemble results
+    for index, results_summary, seconds in session_results:
+        results_summaries[index] = results_summary
+        cost_model.record(tournament[index], seconds)
+    cost_model.save()
+
+    return tournament, results_summaries
+
+
+def load_cached_results(tournament_settings: dict, tournament: list) -> list[dict | None]:
+    """
+    Returns the summary of every session from the result cache in
+    tournament_settings["cache"], None for the sessions that have to be played
+    (all of them if no cache is set). Sessions are only cached with a "seed".
+    """
+    if "cache" not in tournament_settings:
+        return [None] * len(tournament)
+    if tournament_settings.get("seed") is None:
+        print("WARNING: the tournament has no seed, its sessions are not cached")
+    cache = ResultCache(tournament_settings["cache"])
+    results_summaries: list[dict | None] = []
+    for settings in tournament:
+        key = cache.key(settings)
+        cached = cache.get(key) if key is not None else None
+        results_summaries.append({**cached, "cached": True} if cached is not None else None)
+    return results_summaries
+
+
+def write_cached_outputs(
+    tournament_settings: dict,
+    tournament: list,
+    results_summaries: list[dict | None],
+    traces_dir: str | None,
+    results_db: tuple[str, int] | None,
+) -> None:
+    """
+    Writes the traces and results database rows of the sessions taken from the
+    cache, as _run_sessions does for the sessions it plays, so a partly cached run
+    still has all of them
+    """
+    if "cache" not in tournament_settings or (traces_dir is None and results_db is None):
+        return
+    cache = ResultCache(tournament_settings["cache"])
+    stored = []
+    for index, (settings, results_summary) in enumerate(zip(tournament, results_summaries)):
+        if results_summary is None or not results_summary.get("cached", False):
+            continue
+        results_trace = cache.get_trace(cache.key(settings))  # type:ignore
+        if results_trace is None:
+            print(f"WARNING: the cached session {index} has no trace, its trace and actions are not written")
+        elif traces_dir is not None:
+            with open(os.path.join(traces_dir, f"{index:06d}.json"), "w") as f:
+                f.write(json.dumps(results_trace))
+        if results_db is not None:
+            stored.append((index, settings, results_summary, results_trace))
+    if results_db is not None and stored:
+        path, run_id = results_db
+        ResultsDatabase(path).add_sessions(run_id, stored)
+
+
+def prepare_outputs(tournament_settings: dict) -> tuple[str | None, tuple[str, int] | None]:
+    """
+    Returns the directory to save the trace of every session in (e.g. for
+    utils.trace_analysis) and the results database (path, run id) to keep the
+    sessions of this run in, next to those of earlier runs; either is None if not set
+    """
+    traces_dir = tournament_settings.get("traces_dir")
+    if traces_dir is not None:
+        os.makedirs(traces_dir, exist_ok=True)
+    results_db = None
+    if "results_db" in tournament_settings:
+        path = tournament_settings["results_db"]
+        results_db = (path, ResultsDatabase(path).start_run(tournament_settings))
+    return traces_dir, results_db
+
+
+def create_tournament(tournament_settings: dict) -> list:
+    # create agent permutations, ensures that every agent plays against every other agent on all sides of a profile set.
+    agents = tournament_settings["agents"]
+    profile_sets = tournament_settings["profile_sets"]
+    deadline = {
+        k: tournament_settings[k]
+        for k in ("deadline_rounds", "deadline_time_ms")
+        if k in tournament_settings
+    }
+    protocol = tournament_settings.get("protocol", "SAOP")
+    seed = tournament_settings.get("seed")
 
-    results_summaries = []
     tournament = []
     for profiles in profile_sets:
         # quick an dirty check
-        assert isinstance(profiles, list) and len(profiles) == 2
-        for agent_duo in permutations(agents, 2):
+        assert isinstance(profiles, list) and len(profiles) >= 2
+        assert protocol == "MOPAC" or len(profiles) == 2
+        for agent_group in permutations(agents, len(profiles)):
             # create session settings dict
             settings = {
-                "agents": list(agent_duo),
+                "agents": list(agent_group),
                 "profiles": profiles,
-                "deadline_rounds": deadline_rounds,
+                **deadline,
             }
-
-            # run a single negotiation session
-            _, results_summary = run_session(settings)
-
-            # assemble results
+            if protocol != "SAOP":
+                settings["protocol"] = protocol
+            if seed is not None:
+                settings["seed"] = seed
+            if tournament_settings.get("memory", False):
+                settings["memory"] = True
+            if "profiler_dir" in tournament_settings:
+                settings["profiler_dir"] = tournament_settings["profiler_dir"]
+            if "voting_evaluator" in tournament_settings:
+                settings["voting_evaluator"] = tournament_settings["voting_evaluator"]
             tournament.append(settings)
-            results_summaries.append(results_summary)
 
-    return tournament, results_summaries
+    return tournament
+
+
+def _run_sessions(
+    sessions: list[tuple[int, dict]],
+    traces_dir: str | None = None,
+    results_db: tuple[str, int] | None = None,
+    cache: str | None = None,
+) -> list[tuple[int, dict, float]]:
+    results = []
+    # sessions to add to the results database (path, run id), in one go at the end
+    stored = []
+    # sessions are cached where they are played, so their traces stay in this process
+    result_cache = ResultCache(cache) if cache is not None else None
+    for index, settings in sessions:
+        # run a single negotiation session
+        start = perf_counter()
+        results_trace, results_summary = run_session(settings)
+        results.append((index, results_summary, perf_counter() - start))
+        if traces_dir is not None:
+            with open(os.path.join(traces_dir, f"{index:06d}.json"), "w") as f:
+                f.write(json.dumps(results_trace))
+        if results_db is not None:
+            stored.append((index, settings, results_summary, results_trace))
+        # a session that failed is played again next run
+        if result_cache is not None and results_summary.get("result") != "ERROR":
+            key = result_cache.key(settings)
+            if key is not None:
+                result_cache.put(key, results_summary, results_trace)
+    if results_db is not None and stored:
+        path, run_id = results_db
+        ResultsDatabase(path).add_sessions(run_id, stored)
+    return results
 
 
 def process_results(results_class, results_dict):
@@ -191,11 +414,94 @@ def process_results(results_class, results_dict):
     return results_dict, results_summary
 
 
+def process_mopac_results(results_class, results_dict):
+    results_dict = results_dict["MOPACState"]
+
+    # dict to translate geniusweb agent reference to Python class name
+    agent_translate = {
+        k: v["party"]["partyref"].split(".")[-1]
+        for k, v in results_dict["partyprofiles"].items()
+    }
+
+    results_summary = {}
+
+    # check if there are any actions (could have crashed)
+    if results_dict["actions"]:
+        # obtain utility functions
+        utility_funcs = {
+            k: get_utility_function(v["profile"])
+            for k, v in results_dict["partyprofiles"].items()
+        }
+
+        # add utility of all agents to every offer
+        num_offers = 0
+        for action_class, action_dict in zip(results_class.getActions(), results_dict["actions"]):
+            if "Offer" in action_dict:
+                num_offers += 1
+                bid = action_class.getBid()
+                action_dict["Offer"]["utilities"] = {
+                    k: float(v.getUtility(bid)) for k, v in utility_funcs.items()
+                }
+
+        # every party that is part of an agreement gets the utility of its agreed bid
+        agreements = {
+            party.getName(): bid for party, bid in results_class.getAgreements().getMap().items()
+        }
+
+        results_summary["num_offers"] = num_offers
+        utilities = []
+        for actor, utility_func in utility_funcs.items():
+            position = actor.split("_")[-1]
+            utility = float(utility_func.getUtility(agreements[actor])) if actor in agreements else 0
+            results_summary[f"agent_{position}"] = agent_translate[actor]
+            results_summary[f"utility_{position}"] = utility
+            utilities.append(utility)
+
+        results_summary["nash_product"] = prod(utilities) if agreements else 0
+        results_summary["social_welfare"] = sum(utilities)
+        results_summary["result"] = "agreement" if agreements else "failed"
+    else:
+        # something crashed
+        for actor in results_dict["partyprofiles"]:
+            position = actor.split("_")[-1]
+            results_summary[f"agent_{position}"] = agent_translate[actor]
+            results_summary[f"utility_{position}"] = 0
+        results_summary["nash_product"] = 0
+        results_summary["social_welfare"] = 0
+        results_summary["result"] = "ERROR"
+
+    return results_dict, results_summary
+
+
+def error_summary(settings: dict, error: str) -> dict:
+    """
+    Summary of a session that failed outside of the protocol (e.g. the session
+    raised on a worker), with the keys process_results gives a crashed session
+    """
+    results_summary = {}
+    for position, agent in enumerate(settings["agents"], 1):
+        results_summary[f"agent_{position}"] = agent.split(".")[-1]
+        results_summary[f"utility_{position}"] = 0
+    results_summary["nash_product"] = 0
+    results_summary["social_welfare"] = 0
+    results_summary["result"] = "ERROR"
+    results_summary["error"] = error
+    return results_summary
+
+
 def get_utility_function(profile_uri) -> LinearAdditiveUtilitySpace:
+    # profiles are parsed once per process, and again when the file changes
+    path = profile_uri[len("file:"):] if profile_uri.startswith("file:") else None
+    modified = os.path.getmtime(path) if path is not None and os.path.exists(path) else None
+    if profile_uri in _profiles and modified is not None and _profiles[profile_uri][0] == modified:
+        return _profiles[profile_uri][1]
+
     profile_connection = ProfileConnectionFactory.create(
         URI(profile_uri), StdOutReporter()
     )
     profile = profile_connection.getProfile()
+    profile_connection.close()
     assert isinstance(profile, LinearAdditiveUtilitySpace)
 
+    _profiles[profile_uri] = (modified, profile)
     return profile
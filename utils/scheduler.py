@@ -0,0 +1,125 @@
+import json
+import os
+from collections import defaultdict
+from statistics import mean
+
+
+class CostModel:
+    """
+    Estimates how long a session takes from the durations of earlier sessions,
+    kept in a JSON file. The estimate uses the most specific history available:
+    the same agents on the same domain, then the same agents on any domain, then
+    the mean of the agents separately, then a default.
+
+    Durations are kept as a running mean and count per agents and domain, so the
+    file does not grow with every session played. Counts stop at max_count, after
+    which new sessions weigh 1 / max_count, so the means follow agents that change.
+    """
+
+    def __init__(self, path: str, default: float = 1.0, max_count: int = 100) -> None:
+        self.path = path
+        self.default = default
+        self.max_count = max_count
+        # (agents, domain) -> [count, mean seconds]
+        self._stats: dict[tuple[tuple, str], list[float]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for record in json.load(f):
+                    key = (tuple(record["agents"]), record["domain"])
+                    if "seconds" in record:
+                        # a single session, as written by earlier versions
+                        self._merge(self._stats, key, 1, record["seconds"])
+                    else:
+                        self._stats[key] = [record["count"], record["mean"]]
+        self._index()
+
+    def estimate(self, settings: dict) -> float:
+        agents = tuple(settings["agents"])
+        domain = session_domain(settings)
+
+        if (agents, domain) in self._stats:
+            return self._stats[(agents, domain)][1]
+        if agents in self._by_agents:
+            return self._by_agents[agents][1]
+        known = [self._by_agent[agent][1] for agent in agents if agent in self._by_agent]
+        if known:
+            return mean(known)
+        return self.default
+
+    def record(self, settings: dict, seconds: float) -> None:
+        agents = tuple(settings["agents"])
+        self._merge(self._stats, (agents, session_domain(settings)), 1, seconds)
+        self._add(agents, 1, seconds)
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        records = [
+            {"agents": list(agents), "domain": domain, "count": count, "mean": seconds}
+            for (agents, domain), (count, seconds) in self._stats.items()
+        ]
+        with open(self.path, "w") as f:
+            f.write(json.dumps(records, indent=2))
+
+    def _index(self) -> None:
+        self._by_agents: dict[tuple, list[float]] = {}
+        # per agent, the durations of the sessions it played
+        self._by_agent: dict[str, list[float]] = {}
+        for (agents, _), (count, seconds) in self._stats.items():
+            self._add(agents, count, seconds)
+
+    def _add(self, agents: tuple, count: float, seconds: float) -> None:
+        self._merge(self._by_agents, agents, count, seconds)
+        for agent in agents:
+            self._merge(self._by_agent, agent, count, seconds)
+
+    def _merge(self, stats: dict, key, count: float, seconds: float) -> None:
+        # adds count sessions with the given mean to the [count, mean] of key
+        old_count, old_mean = stats.get(key, (0, 0.0))
+        total = old_count + count
+        stats[key] = [min(total, self.max_count), old_mean + (seconds - old_mean) * count / total]
+
+
+def session_domain(settings: dict) -> str:
+    # profiles of a domain live in the domain's directory
+    return os.path.dirname(settings["profiles"][0])
+
+
+def schedule(sessions: list[dict], workers: int, cost_model: CostModel) -> list[list[int]]:
+    """
+    Divides sessions over workers, returning the session indices per worker.
+
+    Sessions of a domain stay together on one worker, so its caches stay hot.
+    Domains are assigned longest first to the least loaded worker (LPT), and a
+    domain that alone costs more than a fair share of the total is split in
+    chunks of about that share, so one large domain can not stall the others.
+    Every worker runs its domains one after the other, longest session first.
+    """
+    costs = [cost_model.estimate(settings) for settings in sessions]
+    fair_share = sum(costs) / workers
+
+    by_domain: dict[str, list[int]] = defaultdict(list)
+    for index, settings in enumerate(sessions):
+        by_domain[session_domain(settings)].append(index)
+
+    groups: list[list[int]] = []
+    for indices in by_domain.values():
+        indices.sort(key=lambda i: costs[i], reverse=True)
+        group: list[int] = []
+        group_cost = 0.0
+        for i in indices:
+            if group and group_cost + costs[i] > fair_share:
+                groups.append(group)
+                group, group_cost = [], 0.0
+            group.append(i)
+            group_cost += costs[i]
+        groups.append(group)
+
+    groups.sort(key=lambda g: sum(costs[i] for i in g), reverse=True)
+    assignment: list[list[int]] = [[] for _ in range(workers)]
+    loads = [0.0] * workers
+    for group in groups:
+        worker = loads.index(min(loads))
+        assignment[worker].extend(group)
+        loads[worker] += sum(costs[i] for i in group)
+
+    return assignment
@@ -0,0 +1,176 @@
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
+from contextlib import contextmanager
+from threading import Condition
+from typing import Iterator
+from urllib.request import Request, urlopen
+
+from utils.runners import error_summary, run_session
+
+
+class _SessionGate:
+    """
+    Lets sessions in this process run side by side, except for sessions that
+    trace memory: tracemalloc counts the allocations of every thread, so those
+    wait for the running sessions to finish and run alone. Waiting memory
+    sessions go before sessions that arrive later, so they are not starved.
+    """
+
+    def __init__(self) -> None:
+        self._condition = Condition()
+        self._running = 0
+        self._exclusive = False
+        self._waiting_exclusive = 0
+
+    @contextmanager
+    def shared(self):
+        with self._condition:
+            self._condition.wait_for(lambda: not self._exclusive and not self._waiting_exclusive)
+            self._running += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._running -= 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._condition:
+            self._waiting_exclusive += 1
+            self._condition.wait_for(lambda: not self._exclusive and not self._running)
+            self._waiting_exclusive -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._exclusive = False
+                self._condition.notify_all()
+
+
+_session_gate = _SessionGate()
+
+
+class NegotiationService:
+    """
+    Runs batches of sessions in a long-lived process, so agent modules, parsed
+    profiles (see get_utility_function) and anything else the agents cache stay
+    loaded between batches. Can be used directly, e.g. from a notebook:
+
+        service = NegotiationService()
+        for index, results_summary in service.run_batch(sessions):
+            ...
+
+    or behind a local HTTP server with serve(). With more than one worker the
+    sessions run in a pool of processes that also lives as long as the service.
+    With one worker and more than one thread they run in a pool of threads in
+    this process, where they can share loaded models and batch their calls to
+    them (see utils.model_server). Batches of concurrent requests also run at the
+    same time. Sessions with "memory" set are the exception: tracemalloc measures
+    the whole process, so they run alone in their process.
+    """
+
+    def __init__(self, workers: int = 1, threads: int = 1) -> None:
+        self._pool = Pool(workers) if workers > 1 else ThreadPool(threads) if threads > 1 else None
+
+    def run_batch(self, sessions: list[dict]) -> Iterator[tuple[int, dict]]:
+        """
+        Runs the sessions (settings as for run_session) and yields (index, summary)
+        pairs as the sessions finish, which is not necessarily in order.
+        """
+        if self._pool is not None:
+            yield from self._pool.imap_unordered(_run_indexed, enumerate(sessions))
+            return
+        for job in enumerate(sessions):
+            yield _run_indexed(job)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+
+
+def serve(host: str = "127.0.0.1", port: int = 8000, workers: int = 1, threads: int = 1) -> None:
+    """
+    Serves a NegotiationService over HTTP until interrupted:
+
+        POST /sessions  with {"sessions": [settings, ...]}, answers with a line of
+                        JSON {"index": ..., "summary": ...} per finished session
+        GET  /health    answers with {"status": "ok"}
+    """
+    service = NegotiationService(workers, threads)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/health":
+                self.send_error(404)
+                return
+            self._send_json_headers()
+            self.wfile.write(json.dumps({"status": "ok"}).encode() + b"\n")
+
+        def do_POST(self):
+            if self.path != "/sessions":
+                self.send_error(404)
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                sessions = body["sessions"]
+                assert isinstance(sessions, list)
+            except (ValueError, KeyError, AssertionError):
+                self.send_error(400, "expected {\"sessions\": [...]}")
+                return
+
+            # stream the summaries as they come, the connection closes at the end
+            self._send_json_headers()
+            for index, results_summary in service.run_batch(sessions):
+                self.wfile.write(json.dumps({"index": index, "summary": results_summary}).encode() + b"\n")
+                self.wfile.flush()
+
+        def _send_json_headers(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Connection", "close")
+            self.end_headers()
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"negotiation service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+def request_sessions(sessions: list[dict], url: str = "http://127.0.0.1:8000") -> Iterator[tuple[int, dict]]:
+    """
+    Client for serve(): sends a batch of sessions and yields (index, summary) pairs
+    as the service finishes them.
+    """
+    request = Request(
+        f"{url}/sessions",
+        data=json.dumps({"sessions": sessions}).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urlopen(request) as response:
+        for line in response:
+            if line.strip():
+                result = json.loads(line)
+                yield result["index"], result["summary"]
+
+
+def _run_indexed(job: tuple[int, dict]) -> tuple[int, dict]:
+    index, settings = job
+    try:
+        gate = _session_gate.exclusive() if settings.get("memory", False) else _session_gate.shared()
+        with gate:
+            _, results_summary = run_session(settings)
+    except Exception as e:
+        # a broken session should not take the rest of the batch down
+        results_summary = error_summary(settings, repr(e))
+    return index, results_summary
@@ -0,0 +1,108 @@
+from itertools import product
+from multiprocessing import Pool
+from random import Random
+from statistics import mean
+
+from utils.runners import run_session
+
+
+def run_sweep(sweep_settings: dict) -> tuple[list, list]:
+    """
+    Searches the parameters of an agent with successive halving: every candidate
+    in the grid plays a few sessions, the best 1/eta of them play eta times as many,
+    and so on until one candidate is left or all sessions are played. Sessions are
+    run in parallel and injected through the session parameters, so the agent
+    reads them from its Settings.
+
+    Returns:
+        tuple[list, list]: the candidates ranked best first, with the number of sessions
+            they played and their mean utility, and the candidates left after every rung.
+    """
+    agent = sweep_settings["agent"]
+    grid = sweep_settings["grid"]
+    opponents = sweep_settings["opponents"]
+    profile_sets = sweep_settings["profile_sets"]
+    deadline = {
+        k: sweep_settings[k]
+        for k in ("deadline_rounds", "deadline_time_ms")
+        if k in sweep_settings
+    }
+    eta = sweep_settings.get("eta", 3)
+    workers = sweep_settings.get("workers")
+
+    # quick and dirty checks
+    assert isinstance(grid, dict) and len(grid) > 0
+    assert eta >= 2
+
+    names = list(grid.keys())
+    candidates = [dict(zip(names, values)) for values in product(*grid.values())]
+
+    # every candidate plays the sessions in the same (shuffled) order, so early
+    # rungs see a mix of opponents and domains and scores stay comparable
+    sessions = [
+        (opponent, profiles, side)
+        for opponent in opponents
+        for profiles in profile_sets
+        for side in (0, 1)
+    ]
+    Random(sweep_settings.get("seed", 0)).shuffle(sessions)
+
+    budget = sweep_settings.get("min_sessions", len(opponents))
+    alive = list(range(len(candidates)))
+    utilities: dict[int, list[float]] = {i: [] for i in alive}
+    rungs = []
+
+    with Pool(workers) as pool:
+        while True:
+            budget = min(budget, len(sessions))
+            jobs = [
+                (i, (agent, candidates[i], session, deadline))
+                for i in alive
+                for session in sessions[len(utilities[i]) : budget]
+            ]
+            for (i, _), utility in zip(jobs, pool.map(_evaluate, [job for _, job in jobs], chunksize=1)):
+                utilities[i].append(utility)
+
+            alive.sort(key=lambda i: mean(utilities[i]), reverse=True)
+            rungs.append({"sessions": budget, "candidates": [candidates[i] for i in alive]})
+
+            if len(alive) == 1 or budget == len(sessions):
+                break
+            alive = alive[: max(1, len(alive) // eta)]
+            budget *= eta
+
+    results = [
+        {
+            "parameters": candidates[i],
+            "sessions": len(utilities[i]),
+            "mean_utility": mean(utilities[i]),
+        }
+        for i in utilities
+    ]
+    # candidates that survived longer played more sessions, so they rank first
+    results.sort(key=lambda r: (r["sessions"], r["mean_utility"]), reverse=True)
+
+    return results, rungs
+
+
+def _evaluate(job) -> float:
+    agent, parameters, (opponent, profiles, side), deadline = job
+
+    agents = [agent, opponent] if side == 0 else [opponent, agent]
+    agent_parameters = [parameters, {}] if side == 0 else [{}, parameters]
+    settings = {
+        "agents": agents,
+        "profiles": profiles,
+        "parameters": agent_parameters,
+        **deadline,
+    }
+    _, results_summary = run_session(settings)
+
+    # find our agent in the summary by its class name, both if it plays itself
+    name = agent.split(".")[-1]
+    utilities = [
+        float(results_summary[f"utility_{key[len('agent_'):]}"])
+        for key, value in results_summary.items()
+        if key.startswith("agent_") and value == name
+    ]
+    return mean(utilities) if utilities else 0.0
@@ -0,0 +1,161 @@
+import random
+from decimal import Decimal
+from math import floor
+
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Value import Value
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+
+class TargetUtilityBids:
+    """
+    Finds random bids with a utility inside an interval for a linear additive
+    profile, without enumerating the bid space.
+
+    Weighted value utilities are floored to buckets of size resolution. A dynamic
+    program over the issues counts, for every issue and every bucketed utility, how
+    many ways the remaining issues can add up to it. Sampling then walks the issues
+    once, picking each value proportional to the number of completions that stay
+    inside the interval, so every bid in the interval is (about) equally likely.
+    Because the buckets are floored, a sampled bid is off by less than
+    resolution * issues and is checked against the exact utility before it is
+    returned.
+
+    Building costs O(issues * values * buckets), sampling O(issues * values) per bid.
+    Random numbers come from rng, by default from the random module, so seeding
+    random fixes the sampled bids.
+    """
+
+    def __init__(self, profile: LinearAdditive, resolution: float = 1e-4, rng: random.Random | None = None):
+        self._profile = profile
+        # the random module has the same random() as a Random instance
+        self._random = rng if rng is not None else random
+        self._resolution = resolution
+        self._issues: list[str] = sorted(profile.getDomain().getIssues())
+        self._values: list[list[Value]] = []
+        self._buckets: list[np.ndarray] = []
+
+        for issue in self._issues:
+            self._values.append(list(profile.getDomain().getValues(issue)))
+            self._buckets.append(self._issue_buckets(issue, self._values[-1]))
+
+        # self._counts[i][s]: number of ways issues i..n-1 add up to bucket s
+        self._counts: list[np.ndarray] = []
+        self._build_counts(len(self._issues) - 1)
+
+    def update(self, profile: LinearAdditive, issues: list[str]) -> None:
+        """
+        Updates to a profile on the same domain of which only the given issues
+        changed. The counts of the issues after the last changed one are kept.
+        """
+        self._profile = profile
+        changed = [self._issues.index(issue) for issue in issues]
+        for i in changed:
+            self._buckets[i] = self._issue_buckets(self._issues[i], self._values[i])
+        if changed:
+            self._build_counts(max(changed))
+
+    def _issue_buckets(self, issue: str, values: list[Value]) -> np.ndarray:
+        weight = self._profile.getWeight(issue)
+        issue_utilities = self._profile.getUtilities()[issue]
+        return np.array([floor(float(weight * issue_utilities.getUtility(v)) / self._resolution) for v in values])
+
+    def _build_counts(self, last_changed: int) -> None:
+        # the counts of issues last_changed+1..n-1 only depend on those issues, so
+        # they are kept (resized, the counts beyond their own maximum are zero)
+        size = sum(int(b.max()) for b in self._buckets) + 1
+        kept = []
+        for counts in self._counts[last_changed + 1 :]:
+            resized = np.zeros(size)
+            resized[: min(size, len(counts))] = counts[:size]
+            kept.append(resized)
+        if not kept:
+            kept = [np.zeros(size)]
+            kept[0][0] = 1.0
+
+        counts = kept[0]
+        computed: list[np.ndarray] = []
+        for buckets in reversed(self._buckets[: last_changed + 1]):
+            shifted = np.zeros(size)
+            for bucket in buckets:
+                shifted[bucket:] += counts[: size - bucket]
+            counts = shifted
+            computed.insert(0, counts)
+        self._counts = computed + kept
+
+        self._min = sum((self._extreme_utility(i, min) for i in range(len(self._issues))), Decimal(0))
+        self._max = sum((self._extreme_utility(i, max) for i in range(len(self._issues))), Decimal(0))
+
+    def getMin(self) -> Decimal:
+        return self._min
+
+    def getMax(self) -> Decimal:
+        return self._max
+
+    def getMaxBid(self) -> Bid:
+        """
+        @return a bid with utility getMax(), the best value of every issue
+        """
+        bid: dict[str, Value] = {}
+        for issue, values in zip(self._issues, self._values):
+            issue_utilities = self._profile.getUtilities()[issue]
+            bid[issue] = max(values, key=issue_utilities.getUtility)
+        return Bid(bid)
+
+    def count(self, low: Decimal, high: Decimal) -> float:
+        """
+        @return approximation of the number of bids with utility in [low, high]
+        """
+        first, last = self._bucket_range(low, high)
+        return float(self._counts[0][first : last + 1].sum())
+
+    def sample(self, low: Decimal, high: Decimal, n: int = 1, attempts: int = 100) -> list[Bid]:
+        """
+        @param low      the minimum utility
+        @param high     the maximum utility
+        @param n        the number of different bids to return
+        @param attempts the maximum number of bids to draw
+        @return up to n different random bids with utility in [low, high], can be
+                empty if no such bid exists or none was found within attempts
+        """
+        first, last = self._bucket_range(low, high)
+        cumulative = np.cumsum(self._counts[0][first : last + 1])
+        if len(cumulative) == 0 or cumulative[-1] == 0:
+            return []
+
+        bids: list[Bid] = []
+        for _ in range(attempts):
+            target = first + int(np.searchsorted(cumulative, self._random.random() * cumulative[-1], side="right"))
+            bid = self._sample_bid(min(target, last))
+            if low <= self._profile.getUtility(bid) <= high and bid not in bids:
+                bids.append(bid)
+                if len(bids) == n:
+                    break
+        return bids
+
+    def _sample_bid(self, target: int) -> Bid:
+        remaining = target
+        bid: dict[str, Value] = {}
+        for i, issue in enumerate(self._issues):
+            following = self._counts[i + 1]
+            indices = remaining - self._buckets[i]
+            valid = (indices >= 0) & (indices < len(following))
+            weights = np.where(valid, following[np.clip(indices, 0, len(following) - 1)], 0.0)
+            choice = int(np.searchsorted(np.cumsum(weights), self._random.random() * weights.sum(), side="right"))
+            choice = min(choice, len(weights) - 1)
+            bid[issue] = self._values[i][choice]
+            remaining -= int(self._buckets[i][choice])
+        return Bid(bid)
+
+    def _bucket_range(self, low: Decimal, high: Decimal) -> tuple[int, int]:
+        # a bid's bucket sum lies within len(issues) buckets below its exact utility
+        first = max(floor(float(low) / self._resolution) - len(self._issues), 0)
+        last = min(floor(float(high) / self._resolution), len(self._counts[0]) - 1)
+        return first, max(first - 1, last)
+
+    def _extreme_utility(self, index: int, extreme) -> Decimal:
+        issue = self._issues[index]
+        issue_utilities = self._profile.getUtilities()[issue]
+        weight = self._profile.getWeight(issue)
+        return extreme(weight * issue_utilities.getUtility(v) for v in self._values[index])
@@ -0,0 +1,165 @@
+import json
+import os
+from collections import defaultdict
+from typing import Iterable
+
+import numpy as np
+import plotly.graph_objects as go
+
+from utils.scheduler import session_domain
+
+
+class TournamentAggregate:
+    """
+    Running aggregates of tournament results, so a report only holds a few numbers
+    per agent pair and per agent and domain, however many sessions are added. The
+    Pareto front of a domain is read from its specials.json (if it has one).
+    """
+
+    def __init__(self) -> None:
+        # (agent, opponent) -> [utility sum, sessions]
+        self.pairs: dict[tuple[str, str], list[float]] = defaultdict(lambda: [0.0, 0])
+        # domain -> [agreements, sessions]
+        self.domains: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+        # (agent, domain) -> [utility sum, distance to Pareto sum, agreements]
+        self.agent_domains: dict[tuple[str, str], list[float]] = defaultdict(lambda: [0.0, 0.0, 0])
+        self._fronts: dict[str, np.ndarray | None] = {}
+
+    def add(self, settings: dict, results_summary: dict) -> None:
+        domain = session_domain(settings)
+        # positions are numbered in the order of the agents (and profiles) of the session
+        positions = sorted(
+            (key[len("agent_") :] for key in results_summary if key.startswith("agent_")),
+            key=lambda p: int(p) if p.isdigit() else p,
+        )
+        agents = [results_summary[f"agent_{p}"] for p in positions]
+        utilities = [float(results_summary[f"utility_{p}"]) for p in positions]
+        agreement = results_summary.get("result") == "agreement"
+
+        for i, (agent, utility) in enumerate(zip(agents, utilities)):
+            for j, opponent in enumerate(agents):
+                if i != j:
+                    self.pairs[(agent, opponent)][0] += utility
+                    self.pairs[(agent, opponent)][1] += 1
+
+        self.domains[domain][0] += int(agreement)
+        self.domains[domain][1] += 1
+
+        if agreement and len(agents) == 2:
+            distance = self._distance_to_pareto(domain, settings["profiles"], utilities)
+            for agent, utility in zip(agents, utilities):
+                aggregate = self.agent_domains[(agent, domain)]
+                aggregate[0] += utility
+                aggregate[1] += distance
+                aggregate[2] += 1
+
+    def _distance_to_pareto(self, domain: str, profiles: list[str], utilities: list[float]) -> float:
+        if domain not in self._fronts:
+            self._fronts[domain] = _read_front(domain)
+        front = self._fronts[domain]
+        if front is None:
+            return float("nan")
+        # the front in specials.json has the utilities of the profiles in file name order
+        order = sorted(range(len(profiles)), key=lambda i: profiles[i])
+        point = np.array([utilities[i] for i in order])
+        return float(np.sqrt(((front - point) ** 2).sum(axis=1)).min())
+
+
+def write_tournament_report(sessions: Iterable[tuple[dict, dict]], path: str, offline: bool = False) -> None:
+    """
+    Writes an HTML report of a tournament with an agent x agent utility heatmap,
+    the agreement rate per domain and the distance of agreements to the Pareto
+    front per agent and domain.
+
+    sessions can be any iterable of (settings, summary), e.g. a generator over
+    streamed results; only the aggregates are kept. The plots are made from the
+    aggregates, so the report stays small for any number of sessions. plotly.js
+    is loaded from a CDN, or embedded once when offline is set.
+    """
+    aggregate = TournamentAggregate()
+    for settings, results_summary in sessions:
+        aggregate.add(settings, results_summary)
+
+    figures = [_utility_heatmap(aggregate), _agreement_rates(aggregate), _pareto_distances(aggregate)]
+
+    with open(path, "w") as f:
+        f.write("<html><head><meta charset='utf-8'><title>Tournament report</title></head><body>\n")
+        for i, figure in enumerate(figures):
+            include = ("cdn" if not offline else True) if i == 0 else False
+            f.write(figure.to_html(full_html=False, include_plotlyjs=include))
+        f.write("</body></html>\n")
+
+
+def _utility_heatmap(aggregate: TournamentAggregate) -> go.Figure:
+    agents = sorted({agent for pair in aggregate.pairs for agent in pair})
+    index = {agent: i for i, agent in enumerate(agents)}
+    utilities = np.full((len(agents), len(agents)), np.nan)
+    for (agent, opponent), (total, count) in aggregate.pairs.items():
+        utilities[index[agent], index[opponent]] = total / count
+
+    fig = go.Figure(
+        go.Heatmap(
+            z=utilities,
+            x=agents,
+            y=agents,
+            zmin=0,
+            zmax=1,
+            colorscale="Viridis",
+            hovertemplate="%{y} against %{x}: %{z:.3f}<extra></extra>",
+        )
+    )
+    fig.update_layout(title="mean utility of agent (row) against opponent (column)", height=600)
+    return fig
+
+
+def _agreement_rates(aggregate: TournamentAggregate) -> go.Figure:
+    domains = sorted(aggregate.domains)
+    fig = go.Figure(
+        go.Bar(
+            x=[os.path.basename(domain) for domain in domains],
+            y=[aggregate.domains[d][0] / aggregate.domains[d][1] for d in domains],
+            text=[f"{aggregate.domains[d][0]}/{aggregate.domains[d][1]}" for d in domains],
+        )
+    )
+    fig.update_layout(title="agreement rate per domain", height=500)
+    fig.update_yaxes(title_text="agreement rate", range=[0, 1])
+    return fig
+
+
+def _pareto_distances(aggregate: TournamentAggregate) -> go.Figure:
+    points: dict[str, dict[str, list]] = defaultdict(lambda: {"x": [], "y": [], "size": [], "text": []})
+    for (agent, domain), (utility, distance, count) in sorted(aggregate.agent_domains.items()):
+        points[agent]["x"].append(utility / count)
+        points[agent]["y"].append(distance / count)
+        points[agent]["size"].append(count)
+        points[agent]["text"].append(f"{agent} on {os.path.basename(domain)}: {count} agreements")
+
+    fig = go.Figure()
+    max_count = max((c for _, _, c in aggregate.agent_domains.values()), default=1)
+    for agent, data in points.items():
+        fig.add_trace(
+            go.Scatter(
+                mode="markers",
+                x=data["x"],
+                y=data["y"],
+                name=agent,
+                marker={"size": [6 + 24 * c / max_count for c in data["size"]]},
+                hovertext=data["text"],
+                hoverinfo="text",
+            )
+        )
+    fig.update_layout(
+        title="agreements per agent and domain: mean utility and distance to the Pareto front", height=600
+    )
+    fig.update_xaxes(title_text="mean utility", range=[0, 1])
+    fig.update_yaxes(title_text="mean distance to Pareto front", rangemode="tozero")
+    return fig
+
+
+def _read_front(domain: str) -> np.ndarray | None:
+    path = os.path.join(domain, "specials.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        specials = json.load(f)
+    return np.array([point["utility"] for point in specials["pareto_front"]])
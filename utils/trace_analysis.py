@@ -0,0 +1,173 @@
+from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
+
+MOVE_TYPES = ["concession", "selfish", "nice", "fortunate", "unfortunate", "silent"]
+CONCESSION, SELFISH, NICE, FORTUNATE, UNFORTUNATE, SILENT = range(len(MOVE_TYPES))
+
+
+def analyse_traces(results_traces: list[dict], epsilon: float = 1e-6) -> tuple[list, dict]:
+    """
+    Analyses the negotiation dynamics of the agents in a corpus of SAOP traces.
+
+    Every offer of an agent is a move from its previous offer, classified by the
+    change in its own utility and in the utility of its opponent (both within
+    epsilon counts as unchanged):
+
+        own \\ opponent   up           same          down
+        up               fortunate    selfish       selfish
+        same             nice         silent        unfortunate
+        down             concession   concession    unfortunate
+
+    The sensitivity to the preferences of the opponent is the share of
+    concession, nice and fortunate moves over the share of the others, above 1
+    the agent responds to what the opponent wants. The concession rate is how far
+    the agent conceded, from its maximum utility (1) to the utility it has in the
+    best bid of its opponent (0) [Baarslag et al. 2011].
+
+    The offers of all traces are put in one set of arrays, so the analysis costs
+    a few array operations regardless of the number of traces.
+
+    Returns:
+        tuple[list, dict]: the analysis per agent per trace, and per agent class
+            over the whole corpus.
+    """
+    trace_index, party, own, opponent, full_yield = _offers(results_traces)
+    num_offers = len(own)
+
+    # sort the offers per party per trace, keeping the order of the trace
+    order = np.lexsort((np.arange(num_offers), party, trace_index))
+    trace_index, party = trace_index[order], party[order]
+    own, opponent, full_yield = own[order], opponent[order], full_yield[order]
+
+    # a move is the step from the previous offer of the same party in the same trace
+    group_start = np.ones(num_offers, dtype=bool)
+    group_start[1:] = (trace_index[1:] != trace_index[:-1]) | (party[1:] != party[:-1])
+    is_move = ~group_start
+    move_group = (np.cumsum(group_start) - 1)[is_move]
+    own_delta = np.diff(own, prepend=0)[is_move]
+    opponent_delta = np.diff(opponent, prepend=0)[is_move]
+
+    moves = classify_moves(own_delta, opponent_delta, epsilon)
+
+    starts = np.flatnonzero(group_start)
+    counts = np.zeros((len(starts), len(MOVE_TYPES)), dtype=int)
+    np.add.at(counts, (move_group, moves), 1)
+
+    min_own = np.minimum.reduceat(own, starts) if num_offers else np.zeros(0)
+    concession_rate = np.clip((1 - min_own) / np.maximum(1 - full_yield[starts], epsilon), 0, 1)
+
+    results = []
+    for group, start in enumerate(starts):
+        actor = _parties(results_traces[trace_index[start]])[party[start]]
+        results.append(
+            {
+                "trace": int(trace_index[start]),
+                "party": actor,
+                "agent": _agent(results_traces[trace_index[start]], actor),
+                "moves": dict(zip(MOVE_TYPES, counts[group].tolist())),
+                "sensitivity": _sensitivity(counts[group]),
+                "concession_rate": float(concession_rate[group]),
+            }
+        )
+
+    # totals per agent class over the corpus
+    totals: dict[str, np.ndarray] = defaultdict(lambda: np.zeros(len(MOVE_TYPES), dtype=int))
+    rates: dict[str, list[float]] = defaultdict(list)
+    for result, group_counts in zip(results, counts):
+        totals[result["agent"]] += group_counts
+        rates[result["agent"]].append(result["concession_rate"])
+    summary = {
+        agent: {
+            "moves": dict(zip(MOVE_TYPES, (total / max(total.sum(), 1)).tolist())),
+            "sensitivity": _sensitivity(total),
+            "concession_rate": float(np.mean(rates[agent])),
+        }
+        for agent, total in totals.items()
+    }
+
+    return results, summary
+
+
+def classify_moves(own_delta: np.ndarray, opponent_delta: np.ndarray, epsilon: float = 1e-6) -> np.ndarray:
+    """
+    Returns the move type (an index into MOVE_TYPES) of every change in own and
+    opponent utility, see the table of analyse_traces
+    """
+    own_sign = np.where(own_delta > epsilon, 1, np.where(own_delta < -epsilon, -1, 0))
+    opponent_sign = np.where(opponent_delta > epsilon, 1, np.where(opponent_delta < -epsilon, -1, 0))
+    # move type by the sign of the (own, opponent) change, rows and columns ordered down, same, up
+    move_table = np.array(
+        [
+            [UNFORTUNATE, CONCESSION, CONCESSION],
+            [UNFORTUNATE, SILENT, NICE],
+            [SELFISH, SELFISH, FORTUNATE],
+        ]
+    )
+    return move_table[own_sign + 1, opponent_sign + 1]
+
+
+def _offers(results_traces: list[dict]) -> tuple[np.ndarray, ...]:
+    # flattens the offers of all traces into arrays
+    trace_index, party, own, opponent, full_yield = [], [], [], [], []
+    for index, results_trace in enumerate(results_traces):
+        parties = _parties(results_trace)
+        # quick and dirty check, the moves are defined for two parties
+        assert len(parties) == 2
+        profiles = [results_trace["partyprofiles"][p]["profile"] for p in parties]
+        yields = [_full_yield(profiles[0], profiles[1]), _full_yield(profiles[1], profiles[0])]
+        for action in results_trace["actions"]:
+            if "Offer" not in action:
+                continue
+            offer = action["Offer"]
+            actor = parties.index(offer["actor"])
+            trace_index.append(index)
+            party.append(actor)
+            own.append(offer["utilities"][parties[actor]])
+            opponent.append(offer["utilities"][parties[1 - actor]])
+            full_yield.append(yields[actor])
+
+    return (
+        np.array(trace_index, dtype=int),
+        np.array(party, dtype=int),
+        np.array(own, dtype=float),
+        np.array(opponent, dtype=float),
+        np.array(full_yield, dtype=float),
+    )
+
+
+def _parties(results_trace: dict) -> list[str]:
+    return list(results_trace["partyprofiles"].keys())
+
+
+def _agent(results_trace: dict, party: str) -> str:
+    return results_trace["partyprofiles"][party]["party"]["partyref"].split(".")[-1]
+
+
+@lru_cache(maxsize=None)
+def _full_yield(own_profile: str, opponent_profile: str) -> float:
+    # own utility of the best bid of the opponent, among those the best one for us
+    # (imported here, so the move classification does not need the runners)
+    from utils.runners import get_utility_function
+
+    own = get_utility_function(own_profile)
+    opponent = get_utility_function(opponent_profile)
+    utility = 0.0
+    for issue in own.getDomain().getIssues():
+        values = own.getDomain().getValues(issue)
+        best = max(float(opponent.getUtilities()[issue].getUtility(v)) for v in values)
+        utility += float(own.getWeight(issue)) * max(
+            float(own.getUtilities()[issue].getUtility(v))
+            for v in values
+            if float(opponent.getUtilities()[issue].getUtility(v)) == best
+        )
+    return utility
+
+
+def _sensitivity(counts: np.ndarray) -> float:
+    responsive = counts[[CONCESSION, NICE, FORTUNATE]].sum()
+    other = counts[[SELFISH, UNFORTUNATE, SILENT]].sum()
+    if other == 0:
+        return float("inf") if responsive else float("nan")
+    return float(responsive / other)
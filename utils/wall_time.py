@@ -0,0 +1,39 @@
+from collections import defaultdict
+from time import perf_counter
+
+from utils.party_hooks import party_hooks
+
+
+class WallTimeTracker:
+    """
+    Tracks the wall time every party spends handling Informs during a session.
+    Time spent in a nested call of another party is counted for that party, not
+    for the caller.
+
+        with WallTimeTracker(agents) as tracker:
+            runner.run()
+        tracker.get_times()  # party name -> seconds
+    """
+
+    def __init__(self, agents: list[str]) -> None:
+        self._agents = agents
+        self._times: dict[str, float] = defaultdict(float)
+        self._started: dict[str, float] = {}
+        self._hooks = None
+
+    def __enter__(self) -> "WallTimeTracker":
+        self._hooks = party_hooks(self._agents, self._enter, self._exit)
+        self._hooks.__enter__()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._hooks.__exit__(*exc_info)
+
+    def get_times(self) -> dict[str, float]:
+        return dict(self._times)
+
+    def _enter(self, party: str) -> None:
+        self._started[party] = perf_counter()
+
+    def _exit(self, party: str) -> None:
+        self._times[party] += perf_counter() - self._started.pop(party)
@@ -0,0 +1,126 @@
+import json
+import os
+from time import time
+from typing import Any
+from uuid import uuid4
+
+
+class DirectoryQueue:
+    """
+    Work queue in a (shared) directory, so workers on any host that can see the
+    directory can take part. Every task is a JSON file that moves between
+    subdirectories:
+
+        pending/ -> claimed/ -> done/
+
+    Claiming is a rename, which is atomic, so exactly one worker gets a task. The
+    modification time of a claimed task is its lease: the worker renews it while
+    it works, and tasks whose lease ran out (a dead worker) move back to pending.
+    Results are written to a temporary file first and then renamed, so a reader
+    never sees half a result. Closing the queue writes a marker with a new id for
+    the run, so workers can tell the end of the run they take part in from a
+    marker that an earlier run left behind.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        for directory in ("pending", "claimed", "done"):
+            os.makedirs(os.path.join(path, directory), exist_ok=True)
+
+    def clear(self) -> None:
+        # removes the tasks and results of an earlier run
+        for directory in ("pending", "claimed", "done"):
+            for name in os.listdir(os.path.join(self.path, directory)):
+                os.remove(os.path.join(self.path, directory, name))
+        if self.closed_run() is not None:
+            os.remove(os.path.join(self.path, "closed"))
+
+    def publish(self, task_id: str, task: Any) -> None:
+        self._write(os.path.join(self.path, "pending", f"{task_id}.json"), task)
+
+    def claim(self) -> tuple[str, Any] | None:
+        """
+        Returns the id and content of a pending task, or None if there is none
+        """
+        for name in sorted(os.listdir(os.path.join(self.path, "pending"))):
+            if not name.endswith(".json"):
+                continue
+            pending = os.path.join(self.path, "pending", name)
+            claimed = os.path.join(self.path, "claimed", name)
+            try:
+                # the lease starts now, a task that waited longer than the lease
+                # would otherwise look expired the moment it is claimed
+                os.utime(pending)
+                os.rename(pending, claimed)
+                with open(claimed) as f:
+                    return name[: -len(".json")], json.load(f)
+            except FileNotFoundError:
+                # another worker was first (or the task was requeued right away)
+                continue
+        return None
+
+    def renew(self, task_id: str) -> None:
+        try:
+            os.utime(os.path.join(self.path, "claimed", f"{task_id}.json"))
+        except FileNotFoundError:
+            # the lease ran out and the task was requeued, it will simply run twice
+            pass
+
+    def complete(self, task_id: str, result: Any) -> None:
+        self._write(os.path.join(self.path, "done", f"{task_id}.json"), result)
+        try:
+            os.remove(os.path.join(self.path, "claimed", f"{task_id}.json"))
+        except FileNotFoundError:
+            pass
+
+    def requeue_expired(self, lease_seconds: float) -> list[str]:
+        """
+        Moves claimed tasks whose lease ran out back to pending and returns their ids
+        """
+        requeued = []
+        now = time()
+        for name in os.listdir(os.path.join(self.path, "claimed")):
+            claimed = os.path.join(self.path, "claimed", name)
+            try:
+                if now - os.path.getmtime(claimed) <= lease_seconds:
+                    continue
+                if os.path.exists(os.path.join(self.path, "done", name)):
+                    # finished just now, only the cleanup is missing
+                    os.remove(claimed)
+                    continue
+                os.rename(claimed, os.path.join(self.path, "pending", name))
+                requeued.append(name[: -len(".json")])
+            except FileNotFoundError:
+                continue
+        return requeued
+
+    def results(self) -> dict[str, Any]:
+        results = {}
+        for name in os.listdir(os.path.join(self.path, "done")):
+            if name.endswith(".json"):
+                with open(os.path.join(self.path, "done", name)) as f:
+                    results[name[: -len(".json")]] = json.load(f)
+        return results
+
+    def count_done(self) -> int:
+        return sum(1 for name in os.listdir(os.path.join(self.path, "done")) if name.endswith(".json"))
+
+    def close(self) -> None:
+        # tells the workers that no more tasks will come
+        self._write(os.path.join(self.path, "closed"), uuid4().hex)
+
+    def closed_run(self) -> str | None:
+        """
+        Returns the id of the run that closed the queue, None while it is open
+        """
+        try:
+            with open(os.path.join(self.path, "closed")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, path: str, content: Any) -> None:
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            f.write(json.dumps(content))
+        os.replace(temporary, path)